@@ -0,0 +1,269 @@
+"""
+자동완성 엔진(autocomplete1 / autocomplete2) 오프라인 평가 + 지연시간 벤치마크
+
+쿼리 로그를 재생하여 엔진 / 설정별로
+- 지연시간 p50/p95/p99, 처리량(req/s)
+- peak RSS (in-process 모드만)
+- Context KV 캐시 hit rate (in-process는 직접, HTTP는 /stats 전후 차이)
+- 품질: 실제로 선택된 검색어에 대한 MRR, hit@k
+를 측정하여 JSON으로 저장 (모델 버전별 회귀 추적용)
+
+쿼리 로그 형식 (한 줄에 하나)
+    <입력 중인 쿼리>\t<최종 선택된 검색어>     e.g. "강남역 맛\t강남역 맛집"
+    <최종 선택된 검색어>                       마지막 단어를 첫 글자만 남겨 입력 쿼리를 만듦 ("강남역 맛집" -> "강남역 맛")
+추천 결과(full)가 선택된 검색어의 prefix이면(공백 무시) 정답으로 간주
+
+in-process 모드: 엔진 / 설정마다 별도 프로세스에서 get_recommendations를 직접 호출 (RSS가 섞이지 않도록)
+    설정은 "정밀도[:Context 캐시 MB]" 목록 (e.g. fp32:256,int8:256,fp32:0)
+HTTP 모드: 실행 중인 서버의 search endpoint에 동시 요청
+
+사용 예:
+    python scripts/bench_autocomplete.py --log queries.tsv --engines autocomplete1,autocomplete2 --configs fp32:256,int8:256
+    python scripts/bench_autocomplete.py --log queries.tsv \
+        --url v1=http://localhost:8001/api/v1/search --url v2=http://localhost:8002/api/v2/search --concurrency 8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import resource
+import subprocess
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+DEFAULT_MODEL_DIRS = {
+    "autocomplete1": "./model",
+    "autocomplete2": "./downloaded_model",
+}
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def peak_rss_mb() -> float:
+    # Linux의 ru_maxrss 단위는 KB
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_query_log(path: str, limit: int):
+    """(입력 쿼리, 선택된 검색어) 리스트"""
+    pairs = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            if "\t" in line:
+                query, chosen = line.split("\t", 1)
+            else:
+                chosen = line.strip()
+                words = chosen.split(" ")
+                query = " ".join(words[:-1] + [words[-1][:1]])
+            if query and chosen:
+                pairs.append((query, chosen))
+            if limit and len(pairs) >= limit:
+                break
+    return pairs
+
+
+def rank_of(suggestions, chosen: str):
+    """정답인 첫 추천의 순위 (1부터), 없으면 None"""
+    target = chosen.replace(" ", "")
+    for rank, text in enumerate(suggestions, start=1):
+        if target.startswith(text.replace(" ", "")):
+            return rank
+    return None
+
+
+def summarize(pairs, suggestions, latencies, elapsed, k):
+    ranks = [rank_of(suggestions[i], chosen) for i, (_, chosen) in enumerate(pairs) if suggestions[i] is not None]
+    errors = sum(1 for s in suggestions if s is None)
+    result = {
+        "requests": len(pairs),
+        "errors": errors,
+        "duration_s": elapsed,
+        "throughput_rps": (len(pairs) - errors) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mrr": sum(1.0 / r for r in ranks if r) / max(len(ranks), 1),
+    }
+    for cutoff in sorted({1, 3, k}):
+        result[f"hit@{cutoff}"] = sum(1 for r in ranks if r and r <= cutoff) / max(len(ranks), 1)
+    return result
+
+
+def cache_hit_rate(before: dict, after: dict) -> dict:
+    hits = after["hits"] - before.get("hits", 0)
+    prefix_hits = after["prefix_hits"] - before.get("prefix_hits", 0)
+    misses = after["misses"] - before.get("misses", 0)
+    lookups = hits + prefix_hits + misses
+    return {
+        "hits": hits,
+        "prefix_hits": prefix_hits,
+        "misses": misses,
+        "hit_rate": (hits + prefix_hits) / lookups if lookups else 0.0,
+    }
+
+
+def run_worker(args):
+    """한 엔진 / 설정으로 모델을 로드하고 쿼리 로그를 재생한 결과를 JSON으로 stdout에 출력"""
+    precision, _, cache_mb = args.worker.partition(":")
+    app_dir = os.path.abspath(os.path.join(args.was_dir, args.engine))
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    app = importlib.import_module("main")
+
+    model_dir = args.model_dir or DEFAULT_MODEL_DIRS.get(args.engine, "./model")
+    app.tokenizer = app.AutoTokenizer.from_pretrained(model_dir)
+    app.build_vocab_index()
+    if cache_mb:
+        app.context_cache.max_bytes = int(cache_mb) * 1024 * 1024
+
+    start = time.perf_counter()
+    app.model = app.load_model(model_dir, app.Precision(precision), "cpu")
+    load_s = time.perf_counter() - start
+
+    pairs = load_query_log(args.log, args.limit)
+    app.get_recommendations(pairs[0][0], args.k, "full")  # warm-up
+    cache_before = app.context_cache.stats()
+
+    suggestions = []
+    latencies = []
+    start = time.perf_counter()
+    for query, _ in pairs:
+        request_start = time.perf_counter()
+        suggestions.append([text for text, _ in app.get_recommendations(query, args.k, "full")])
+        latencies.append((time.perf_counter() - request_start) * 1000)
+    elapsed = time.perf_counter() - start
+
+    result = summarize(pairs, suggestions, latencies, elapsed, args.k)
+    result.update({
+        "engine": args.engine,
+        "config": args.worker,
+        "transport": "inprocess",
+        "load_s": load_s,
+        "peak_rss_mb": peak_rss_mb(),
+        "context_cache": cache_hit_rate(cache_before, app.context_cache.stats()),
+    })
+    print(json.dumps(result, ensure_ascii=False))
+
+
+def fetch_json(url: str, timeout: float):
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return json.loads(response.read())
+    except (urllib.error.URLError, ValueError):
+        return None
+
+
+def run_http(name: str, url: str, pairs, args) -> dict:
+    """search endpoint에 concurrency개 스레드로 쿼리 로그를 나눠 보냄"""
+    stats_url = url.rsplit("/search", 1)[0] + "/stats"
+    stats_before = fetch_json(stats_url, args.timeout)
+
+    suggestions = [None] * len(pairs)
+    latencies = []
+    next_index = iter(range(len(pairs)))
+    lock = threading.Lock()
+
+    def client():
+        while True:
+            with lock:
+                i = next(next_index, None)
+            if i is None:
+                return
+            params = urllib.parse.urlencode({"q": pairs[i][0], "n": args.k, "type": "full"})
+            request_start = time.perf_counter()
+            body = fetch_json(f"{url}?{params}", args.timeout)
+            latency = (time.perf_counter() - request_start) * 1000
+            if body is not None:
+                suggestions[i] = [s["subkey"] for s in body.get("subkeys", [])]
+                with lock:
+                    latencies.append(latency)
+
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = summarize(pairs, suggestions, latencies, elapsed, args.k)
+    result.update({"engine": name, "config": url, "transport": "http", "concurrency": args.concurrency})
+    stats_after = fetch_json(stats_url, args.timeout)
+    if stats_before and stats_after and "context_cache" in stats_after:
+        result["context_cache"] = cache_hit_rate(stats_before.get("context_cache", {}), stats_after["context_cache"])
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--log", required=True, help="쿼리 로그 경로")
+    parser.add_argument("--limit", type=int, default=0, help="앞에서부터 사용할 쿼리 수 (0이면 전체)")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--was-dir", default="was")
+    parser.add_argument("--engines", default="", help="in-process로 측정할 엔진 (e.g. autocomplete1,autocomplete2)")
+    parser.add_argument("--configs", default="fp32", help="정밀도[:Context 캐시 MB] 목록")
+    parser.add_argument("--model-dir", default=None, help="엔진 디렉토리 기준 모델 경로 (기본값은 엔진별 경로)")
+    parser.add_argument("--url", action="append", default=[], help="HTTP로 측정할 search endpoint (이름=URL)")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    parser.add_argument("--engine", default=None, help=argparse.SUPPRESS)
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    args.log = os.path.abspath(args.log)
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = []
+    for engine in [e for e in args.engines.split(",") if e]:
+        for config in args.configs.split(","):
+            command = [
+                sys.executable, os.path.abspath(__file__), "--worker", config, "--engine", engine,
+                "--log", args.log, "--limit", str(args.limit), "--k", str(args.k),
+                "--was-dir", os.path.abspath(args.was_dir),
+            ]
+            if args.model_dir:
+                command += ["--model-dir", args.model_dir]
+            output = subprocess.run(command, check=True, stdout=subprocess.PIPE, text=True).stdout
+            results.append(json.loads(output.strip().splitlines()[-1]))
+
+    if args.url:
+        pairs = load_query_log(args.log, args.limit)
+        for spec in args.url:
+            name, sep, url = spec.partition("=")
+            if not sep or "://" in name:
+                name, url = spec, spec
+            results.append(run_http(name, url, pairs, args))
+
+    for r in results:
+        cache = r.get("context_cache", {}).get("hit_rate")
+        print(
+            f"{r['engine']:>14} [{r['transport']:>9}] {r['config']}: "
+            f"p50={r['p50_ms']:7.1f}ms  p95={r['p95_ms']:7.1f}ms  p99={r['p99_ms']:7.1f}ms  "
+            f"{r['throughput_rps']:6.1f} req/s  rss={r.get('peak_rss_mb', float('nan')):7.1f}MB  "
+            f"cache={'-' if cache is None else f'{cache:.2f}'}  mrr={r['mrr']:.3f}  hit@{args.k}={r[f'hit@{args.k}']:.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+자동완성 API 마이크로 배칭 벤치마크
+
+같은 쿼리 세트를 동시성(concurrency) 별로 돌려서
+unbatched(요청마다 forward pass) vs batched(BatchScheduler) 모드의
+처리량(req/s)과 지연시간(p50/p95/p99)을 비교
+
+사용 예:
+    python scripts/bench_batching.py --app-dir was/autocomplete2 --concurrency 1,4,8,16
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import importlib
+
+DEFAULT_QUERIES = [
+    "강남역 ㅁ", "강남역 맛", "강남역 맛집 ㅊ", "아이폰 ㄱ", "아이폰 케",
+    "제주도 ㅎ", "제주도 호", "서울 날씨 ㅇ", "부산 ㅎ", "여름 휴가 ㅊ",
+    "삼성 ㄱ", "노트북 ㅊ", "홍대 ㅋ", "맛", "ㄴ", "캠핑 ㅇ",
+]
+
+
+def load_app(app_dir: str):
+    """서비스 디렉토리의 main.py를 import 하고 모델을 로드"""
+    app_dir = os.path.abspath(app_dir)
+    os.chdir(app_dir)  # main.py가 ./model 등 상대 경로를 사용
+    sys.path.insert(0, app_dir)
+    main = importlib.import_module("main")
+    main.load_model_and_vocab()
+    return main
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+async def run_level(main, queries, concurrency: int, num_requests: int, batched: bool) -> dict:
+    """concurrency 개의 클라이언트가 num_requests 개의 요청을 나눠서 보냄"""
+    latencies = []
+    counter = iter(range(num_requests))
+
+    async def client():
+        for i in counter:
+            query = queries[i % len(queries)]
+            start = time.perf_counter()
+            if batched:
+                await main.get_recommendations_batched(query, 5, "full")
+            else:
+                # 기존 서버와 동일하게 event loop 위에서 동기 호출
+                main.get_recommendations(query, 5, "full")
+                await asyncio.sleep(0)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    if batched:
+        main.batch_scheduler = main.BatchScheduler(main.BATCH_MAX_SIZE, main.BATCH_MAX_WAIT_MS)
+        main.batch_scheduler.start()
+
+    start = time.perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "mode": "batched" if batched else "unbatched",
+        "concurrency": concurrency,
+        "requests": num_requests,
+        "throughput_rps": num_requests / elapsed,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+    }
+    if batched:
+        scheduler = main.batch_scheduler
+        result["avg_batch_size"] = scheduler.num_requests / max(scheduler.num_batches, 1)
+        await scheduler.stop()
+        main.batch_scheduler = None
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete2")
+    parser.add_argument("--concurrency", default="1,4,8,16")
+    parser.add_argument("--requests", type=int, default=128, help="동시성 레벨별 요청 수")
+    parser.add_argument("--queries", default=None, help="한 줄에 쿼리 하나씩 있는 파일")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries, "r") as f:
+            queries = [line.strip() for line in f if line.strip()]
+
+    json_path = os.path.abspath(args.json) if args.json else None
+    app = load_app(args.app_dir)
+
+    # 매 요청마다 forward pass 비용을 측정하도록 Context KV 캐시를 끔
+    app.context_cache.max_bytes = 0
+
+    # warm-up
+    app.get_recommendations(queries[0], 5, "full")
+
+    results = []
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        for batched in (False, True):
+            result = asyncio.run(run_level(app, queries, concurrency, args.requests, batched))
+            results.append(result)
+            print(
+                f"{result['mode']:>9} c={concurrency:<3} "
+                f"{result['throughput_rps']:8.1f} req/s  "
+                f"p50={result['p50_ms']:7.1f}ms  p95={result['p95_ms']:7.1f}ms  p99={result['p99_ms']:7.1f}ms"
+                + (f"  batch={result['avg_batch_size']:.1f}" if batched else "")
+            )
+
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {json_path}")
+
+
+if __name__ == "__main__":
+    main()
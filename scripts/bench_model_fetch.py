@@ -0,0 +1,138 @@
+"""
+MinIO 모델 다운로드 벤치마크 (기존 순차 download_file vs ModelFetcher)
+
+로컬 S3 호환 서버에 모델 크기의 임의 파일을 올려두고 다음을 측정
+- legacy: list_objects_v2 한 번 + 파일별 순차 s3.download_file (기존 load_model_and_vocab)
+- cold: 빈 디렉토리에서 ModelFetcher.fetch() (병렬 Range GET + ETag 검증)
+- warm: 같은 디렉토리에서 다시 fetch() (manifest가 같으면 다운로드 없음, Pod 재시작)
+- resume: 큰 파일의 절반을 받은 상태에서 fetch() (중단된 다운로드 이어받기)
+
+--endpoint-url이 없으면 moto 서버(pip install "moto[server]")를 띄워서 사용
+사용 예:
+    python scripts/bench_model_fetch.py --file-mb 1024,64,1
+    python scripts/bench_model_fetch.py --endpoint-url http://localhost:9000 --workers 8 --part-mb 16
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import importlib
+
+import boto3
+import botocore.config
+
+BUCKET = "bench-autocomplete"
+PREFIX = "tiny_model/"
+
+
+def start_local_server():
+    from moto.server import ThreadedMotoServer
+
+    server = ThreadedMotoServer(port=0)
+    server.start()
+    host, port = server.get_host_and_port()
+    return server, f"http://{host}:{port}"
+
+
+def upload_files(s3, sizes_mb):
+    s3.create_bucket(Bucket=BUCKET)
+    for i, size_mb in enumerate(sizes_mb):
+        with tempfile.NamedTemporaryFile() as f:
+            for _ in range(int(size_mb)):
+                f.write(os.urandom(1024 * 1024))
+            f.write(os.urandom(int((size_mb % 1) * 1024 * 1024)))
+            f.flush()
+            # upload_file은 8MB 이상이면 multipart로 올림 (ETag "<md5>-<파트 수>")
+            s3.upload_file(f.name, BUCKET, f"{PREFIX}file_{i}.bin")
+
+
+def legacy_download(s3, save_dir):
+    response = s3.list_objects_v2(Bucket=BUCKET, Prefix=PREFIX)
+    for obj in response.get("Contents", []):
+        s3.download_file(BUCKET, obj["Key"], os.path.join(save_dir, os.path.basename(obj["Key"])))
+
+
+def timed(fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete2")
+    parser.add_argument("--endpoint-url", default=None)
+    parser.add_argument("--file-mb", default="512,64,1", help="업로드할 파일 크기(MB) 목록")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--part-mb", type=int, default=16)
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    sys.path.insert(0, app_dir)
+    app = importlib.import_module("main")
+
+    server = None
+    endpoint_url = args.endpoint_url
+    if endpoint_url is None:
+        server, endpoint_url = start_local_server()
+
+    s3 = boto3.client(
+        "s3",
+        endpoint_url=endpoint_url,
+        aws_access_key_id=os.environ.get("MINIO_ACCESS_KEY", "minioadmin"),
+        aws_secret_access_key=os.environ.get("MINIO_SECRET_KEY", "minioadmin"),
+        region_name="us-east-1",
+        config=botocore.config.Config(max_pool_connections=args.workers),
+    )
+    sizes_mb = [float(size) for size in args.file_mb.split(",")]
+    upload_files(s3, sizes_mb)
+
+    def make_fetcher(save_dir):
+        return app.ModelFetcher(
+            s3, BUCKET, PREFIX, save_dir,
+            max_workers=args.workers, part_size=args.part_mb * app.ModelFetcher.MIB
+        )
+
+    results = {"total_mb": sum(sizes_mb), "workers": args.workers, "part_mb": args.part_mb}
+    work_dir = tempfile.mkdtemp()
+    try:
+        legacy_dir = os.path.join(work_dir, "legacy")
+        os.makedirs(legacy_dir)
+        results["legacy_s"] = timed(lambda: legacy_download(s3, legacy_dir))
+
+        fetch_dir = os.path.join(work_dir, "fetch")
+        results["cold_s"] = timed(lambda: make_fetcher(fetch_dir).fetch())
+        results["warm_s"] = timed(lambda: make_fetcher(fetch_dir).fetch())
+
+        # 가장 큰 파일의 앞쪽 절반 파트만 받은 상태를 만든 뒤 이어받기
+        resume_dir = os.path.join(work_dir, "resume")
+        fetcher = make_fetcher(resume_dir)
+        largest = max(fetcher.list_objects(), key=lambda obj: obj["Size"])
+        entry = {"key": largest["Key"], "etag": largest["ETag"].strip('"'), "size": largest["Size"]}
+        os.makedirs(resume_dir)
+        with app.ThreadPoolExecutor(max_workers=args.workers) as executor:
+            futures = fetcher.start_file(entry, executor)
+            for future in futures[len(futures) // 2:]:
+                future.cancel()
+        results["resume_s"] = timed(lambda: make_fetcher(resume_dir).fetch())
+
+        for name in ("legacy_s", "cold_s", "warm_s", "resume_s"):
+            print(f"{name[:-2]:>6}: {results[name]:7.2f}s")
+        print(f"speedup (legacy / cold): {results['legacy_s'] / results['cold_s']:.1f}x")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if server is not None:
+            server.stop()
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
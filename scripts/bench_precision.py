@@ -0,0 +1,129 @@
+"""
+자동완성 모델 정밀도(fp32 / bf16 / int8) 벤치마크
+
+정밀도별로 별도 프로세스에서 모델을 로드하여 (RSS가 서로 섞이지 않도록)
+- 로드 시간, 로드 후 RSS
+- 요청당 지연시간 p50/p95 (Context KV 캐시를 끄고 매 요청 forward pass)
+- fp32 대비 Top-K 추천 겹침 비율(overlap), 1순위 일치율(top1)
+을 측정
+
+사용 예:
+    python scripts/bench_precision.py --app-dir was/autocomplete2 --model-dir ./downloaded_model
+    python scripts/bench_precision.py --app-dir was/autocomplete1 --model-dir ./model --modes fp32,int8
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+
+DEFAULT_QUERIES = [
+    "강남역 ㅁ", "강남역 맛", "강남역 맛집 ㅊ", "아이폰 ㄱ", "아이폰 케",
+    "제주도 ㅎ", "제주도 호", "서울 날씨 ㅇ", "부산 ㅎ", "여름 휴가 ㅊ",
+    "삼성 ㄱ", "노트북 ㅊ", "홍대 ㅋ", "맛", "ㄴ", "캠핑 ㅇ",
+]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run_worker(args):
+    """한 정밀도로 모델을 로드하고 측정 결과를 JSON으로 stdout에 출력"""
+    app_dir = os.path.abspath(args.app_dir)
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    app = importlib.import_module("main")
+
+    app.tokenizer = app.AutoTokenizer.from_pretrained(args.model_dir)
+    app.build_vocab_index()
+    app.context_cache.max_bytes = 0
+
+    start = time.perf_counter()
+    app.model = app.load_model(args.model_dir, app.Precision(args.worker), "cpu")
+    load_s = time.perf_counter() - start
+
+    queries = DEFAULT_QUERIES
+    app.get_recommendations(queries[0], args.k, "token")  # warm-up
+
+    latencies = []
+    suggestions = {}
+    for _ in range(args.repeat):
+        for query in queries:
+            start = time.perf_counter()
+            suggestions[query] = [text for text, _ in app.get_recommendations(query, args.k, "token")]
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    print(json.dumps({
+        "mode": args.worker,
+        "load_s": load_s,
+        "rss_mb": rss_mb(),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "suggestions": suggestions,
+    }, ensure_ascii=False))
+
+
+def compare(candidate: dict, reference: dict):
+    overlaps = []
+    top1 = []
+    for query, expected in reference.items():
+        if not expected:
+            continue
+        actual = candidate.get(query, [])
+        overlaps.append(len(set(actual) & set(expected)) / len(expected))
+        top1.append(bool(actual) and actual[0] == expected[0])
+    return sum(overlaps) / max(len(overlaps), 1), sum(top1) / max(len(top1), 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete2")
+    parser.add_argument("--model-dir", default="./downloaded_model", help="app-dir 기준 모델 경로")
+    parser.add_argument("--modes", default="fp32,bf16,int8")
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = {}
+    for mode in ["fp32"] + [m for m in args.modes.split(",") if m != "fp32"]:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker", mode,
+             "--app-dir", args.app_dir, "--model-dir", args.model_dir,
+             "--k", str(args.k), "--repeat", str(args.repeat)],
+            check=True, stdout=subprocess.PIPE, text=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+
+    reference = results["fp32"]["suggestions"]
+    for mode, result in results.items():
+        result["overlap"], result["top1"] = compare(result["suggestions"], reference)
+        print(
+            f"{mode:>5}: load={result['load_s']:5.1f}s  rss={result['rss_mb']:7.1f}MB  "
+            f"p50={result['p50_ms']:7.1f}ms  p95={result['p95_ms']:7.1f}ms  "
+            f"overlap@{args.k}={result['overlap']:.2f}  top1={result['top1']:.2f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(list(results.values()), f, indent=2, ensure_ascii=False)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
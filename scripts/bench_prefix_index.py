@@ -0,0 +1,124 @@
+"""
+어휘집 Prefix 인덱스 벤치마크 (pytrie.StringTrie vs PrefixIndex)
+
+- 구축 시간: 매 Pod 기동 시 수행되는 어휘집 -> 인덱스 구축
+- 로드 시간: 저장된 인덱스 파일을 mmap으로 로드
+- 조회 지연: fragment prefix 검색 (토큰 ID 리스트/텐서 생성까지)
+- RSS 증가량: 인덱스 구축 전후 프로세스 RSS 차이
+- 결과 일치 여부: 모든 prefix에 대해 두 인덱스가 같은 토큰 ID를 반환하는지 확인
+- 자모/초성 whitelist 조회 지연: "맛ㅈ", "마", "ㄱㄴㅇ" 같이 조합 중인 fragment
+
+pytrie가 설치되어 있지 않으면 PrefixIndex만 측정
+사용 예:
+    python scripts/bench_prefix_index.py --app-dir was/autocomplete2
+"""
+import os
+import gc
+import sys
+import time
+import argparse
+import tempfile
+import importlib
+
+try:
+    import pytrie
+except ImportError:
+    pytrie = None
+
+DEFAULT_PREFIXES = ["맛", "강", "강남", "아이", "제주", "서울", "a", "s", "삼성", "노트", "캠", "홍"]
+PARTIAL_FRAGMENTS = ["마", "맛ㅈ", "가ㅇ", "ㄱㄴㅇ", "ㅁㅈ", "ㅅ", "고", "아이ㅍ", "제ㅈ", "서우"]
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as f:
+        return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def measure_build(build_fn):
+    gc.collect()
+    before = rss_mb()
+    start = time.perf_counter()
+    index = build_fn()
+    elapsed = (time.perf_counter() - start) * 1000
+    gc.collect()
+    return index, elapsed, rss_mb() - before
+
+
+def time_lookup(lookup_fn, prefixes, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for prefix in prefixes:
+            lookup_fn(prefix)
+    return (time.perf_counter() - start) / (repeat * len(prefixes)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete2")
+    parser.add_argument("--model-dir", default="./model", help="app-dir 기준 tokenizer 경로")
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    app = importlib.import_module("main")
+
+    app.tokenizer = app.AutoTokenizer.from_pretrained(args.model_dir)
+    app.build_vocab_index()
+    pairs = list(app.iter_clean_tokens())
+    items = list(app.PrefixIndex.build(pairs).items())
+    print(f"vocab: {len(app.vocab)} tokens, {len(items)} unique keys")
+
+    whitelist_us = time_lookup(app.get_whitelist_ids, PARTIAL_FRAGMENTS, args.repeat)
+    print(f"jamo/choseong whitelist lookup: {whitelist_us:7.1f}us/fragment")
+    for fragment in PARTIAL_FRAGMENTS:
+        print(f"  {fragment!r}: {app.get_whitelist_ids(fragment).numel()} tokens")
+
+    def build_trie():
+        trie = pytrie.StringTrie()
+        for key, token_id in pairs:
+            if key in trie:
+                trie[key].append(token_id)
+            else:
+                trie[key] = [token_id]
+        return trie
+
+    def trie_lookup(prefix):
+        try:
+            return [i for key, ids in trie.items(prefix=prefix) if key != prefix for i in ids]
+        except KeyError:
+            return []
+
+    index, index_ms, index_mb = measure_build(lambda: app.PrefixIndex.build(pairs))
+    print(f"PrefixIndex   build: {index_ms:8.1f}ms  rss +{index_mb:6.1f}MB")
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "prefix_index.bin")
+        index.save(path)
+        loaded, load_ms, load_mb = measure_build(lambda: app.PrefixIndex.load(path))
+        print(f"PrefixIndex   mmap load: {load_ms:4.1f}ms  rss +{load_mb:6.1f}MB  file {os.path.getsize(path) / 1024:.0f}KB")
+
+        index_us = time_lookup(lambda p: loaded.prefix_ids(p, include_exact=False), DEFAULT_PREFIXES, args.repeat)
+        print(f"PrefixIndex   lookup: {index_us:7.1f}us/prefix")
+
+        if pytrie is None:
+            print("pytrie 미설치: StringTrie 비교 생략")
+            return
+
+        trie, trie_ms, trie_mb = measure_build(build_trie)
+        print(f"pytrie        build: {trie_ms:8.1f}ms  rss +{trie_mb:6.1f}MB")
+        trie_us = time_lookup(trie_lookup, DEFAULT_PREFIXES, args.repeat)
+        print(f"pytrie        lookup: {trie_us:7.1f}us/prefix")
+
+        # 모든 키의 모든 prefix에 대해 결과 비교
+        prefixes = {key[:i] for key, _ in items for i in range(1, len(key) + 1)}
+        mismatches = [
+            p for p in prefixes
+            if sorted(trie_lookup(p)) != sorted(loaded.prefix_ids(p, include_exact=False).tolist())
+        ]
+        print(f"match check: {len(prefixes) - len(mismatches)}/{len(prefixes)} prefixes identical")
+
+
+if __name__ == "__main__":
+    main()
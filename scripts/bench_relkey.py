@@ -0,0 +1,107 @@
+"""
+연관 검색어(relkey1) 생성 벤치마크: llama.cpp context pool 크기 x 동시 클라이언트 수
+
+pool 크기별로 별도 프로세스에서 모델을 로드하고 (LLAMA_POOL_SIZE / LLAMA_THREADS 환경 변수),
+동시 클라이언트 1, 4, 16개가 결과 캐시를 거치지 않고 generate_keywords를 호출할 때의
+- 처리량 (req/s, 생성 tokens/s)
+- 요청 지연시간 p50 / p95
+를 측정
+
+사용 예:
+    python scripts/bench_relkey.py --app-dir was/relkey1 --pool-sizes 1,2 --threads 2 --concurrency 1,4,16
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+DEFAULT_QUERIES = [
+    "강남역 맛집", "아이폰", "제주도 여행", "서울 날씨", "부산 호텔", "여름 휴가",
+    "삼성 갤럭시", "노트북 추천", "홍대 카페", "캠핑 용품", "다이어트 식단", "주식 투자",
+]
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run_worker(args):
+    app_dir = os.path.abspath(args.app_dir)
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    app = importlib.import_module("main")
+    app.load_model()
+    app.generate_keywords(DEFAULT_QUERIES[0], 5)  # warm-up
+
+    results = []
+    for concurrency in [int(c) for c in args.concurrency.split(",")]:
+        latencies = []
+        tokens_before = app.llama_pool.generated_tokens
+
+        def client(i):
+            start = time.perf_counter()
+            app.generate_keywords(DEFAULT_QUERIES[i % len(DEFAULT_QUERIES)], 10)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            list(executor.map(client, range(args.requests)))
+        elapsed = time.perf_counter() - start
+
+        results.append({
+            "pool_size": app.LLAMA_POOL_SIZE,
+            "threads": app.LLAMA_THREADS,
+            "concurrency": concurrency,
+            "throughput_rps": args.requests / elapsed,
+            "tokens_per_sec": (app.llama_pool.generated_tokens - tokens_before) / elapsed,
+            "p50_ms": percentile(latencies, 50),
+            "p95_ms": percentile(latencies, 95),
+        })
+    print(json.dumps(results))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/relkey1")
+    parser.add_argument("--pool-sizes", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=2, help="context별 스레드 수")
+    parser.add_argument("--concurrency", default="1,4,16")
+    parser.add_argument("--requests", type=int, default=32, help="동시성 레벨별 요청 수")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args)
+        return
+
+    results = []
+    for pool_size in [int(p) for p in args.pool_sizes.split(",")]:
+        env = dict(os.environ, LLAMA_POOL_SIZE=str(pool_size), LLAMA_THREADS=str(args.threads))
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--worker",
+             "--app-dir", args.app_dir, "--concurrency", args.concurrency, "--requests", str(args.requests)],
+            check=True, stdout=subprocess.PIPE, text=True, env=env
+        ).stdout
+        for result in json.loads(output.strip().splitlines()[-1]):
+            results.append(result)
+            print(
+                f"pool={result['pool_size']}x{result['threads']}t c={result['concurrency']:<3} "
+                f"{result['throughput_rps']:6.2f} req/s  {result['tokens_per_sec']:7.1f} tok/s  "
+                f"p50={result['p50_ms']:7.1f}ms  p95={result['p95_ms']:7.1f}ms"
+            )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+단어 벡터 인덱스 벤치마크: 전체 비교(brute-force) 대비 IVF 근사 검색의 recall@k / 지연시간
+
+- exact: 정규화 벡터 전체와 내적 (gensim most_similar와 같은 결과)
+- ivf nprobe=N: N개 리스트만 비교
+recall@k = IVF Top-K 중 exact Top-K에 포함되는 비율
+
+사용 예:
+    python scripts/bench_vector_index.py --index-dir /mnt/data/w2v_index --app-dir was/relkey1 --nprobe 1,4,8,16,32
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import importlib
+
+import numpy as np
+
+
+def percentile(values, p):
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def run(index, query_ids, k, nprobe):
+    latencies = []
+    results = []
+    for word_id in query_ids:
+        vector = np.asarray(index.vectors[word_id])
+        start = time.perf_counter()
+        found = index.search(vector, k, exclude={word_id}, nprobe=nprobe)
+        latencies.append((time.perf_counter() - start) * 1000)
+        results.append({word for word, _ in found})
+    return results, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", default="/mnt/data/w2v_index")
+    parser.add_argument("--app-dir", default="was/relkey1", help="vector_index.py(VectorIndex)가 있는 서비스 디렉토리")
+    parser.add_argument("--nprobe", default="1,4,8,16,32")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000, help="검색어로 사용할 임의 단어 수")
+    parser.add_argument("--head", action="store_true", help="빈도 상위 단어만 검색어로 사용 (head 쿼리)")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    sys.path.insert(0, os.path.abspath(args.app_dir))
+    module = importlib.import_module("vector_index")
+    index = module.VectorIndex(os.path.abspath(args.index_dir))
+
+    rng = np.random.default_rng(0)
+    population = min(len(index), args.queries * 10) if args.head else len(index)
+    query_ids = rng.choice(population, size=min(args.queries, population), replace=False)
+
+    exact, exact_latencies = run(index, query_ids, args.k, nprobe=0)
+    results = [{
+        "mode": "exact", "nprobe": 0, "recall": 1.0,
+        "p50_ms": percentile(exact_latencies, 50), "p95_ms": percentile(exact_latencies, 95),
+    }]
+
+    if index.centroids is None:
+        print("IVF 인덱스가 없어 exact만 측정합니다.")
+    else:
+        for nprobe in [int(n) for n in args.nprobe.split(",")]:
+            approx, latencies = run(index, query_ids, args.k, nprobe)
+            recall = np.mean([len(a & e) / max(len(e), 1) for a, e in zip(approx, exact)])
+            results.append({
+                "mode": "ivf", "nprobe": nprobe, "recall": float(recall),
+                "p50_ms": percentile(latencies, 50), "p95_ms": percentile(latencies, 95),
+            })
+
+    print(f"{len(index)} words, {len(query_ids)} queries, k={args.k}")
+    for r in results:
+        print(f"{r['mode']:>5} nprobe={r['nprobe']:<4} recall@{args.k}={r['recall']:.3f}  "
+              f"p50={r['p50_ms']:7.3f}ms  p95={r['p95_ms']:7.3f}ms")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+자동완성 whitelist 필터링 마이크로 벤치마크
+
+모델 forward pass를 제외한 "fragment -> whitelist -> 마스킹 -> Top-K" 구간만
+기존 방식(Python 루프 + 전체 vocab -Inf 마스크)과
+현재 방식(자모/초성 Prefix 인덱스 + gather/topk)으로 비교
+(현재 방식은 조합 중인 음절까지 매칭하므로 whitelist는 기존보다 넓을 수 있음)
+
+모델 가중치 없이 tokenizer 파일만 있으면 실행 가능
+사용 예:
+    python scripts/bench_whitelist.py --app-dir was/autocomplete2
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+
+import torch
+
+DEFAULT_QUERIES = [
+    "강남역 ㅁ", "강남역 맛", "강남역 맛집 ㅊ", "아이폰 ㄱ", "아이폰 케",
+    "제주도 ㅎ", "제주도 호", "서울 날씨 ㅇ", "부산 ㅎ", "여름 휴가 ㅊ",
+    "삼성 ㄱ", "노트북 ㅊ", "홍대 ㅋ", "맛", "ㄴ", "캠핑 ㅇ",
+]
+
+
+def build_legacy_index(main):
+    """기존 load_model_and_vocab이 만들던 초성 맵과 음절 prefix 인덱스"""
+    choseong_to_ids_map = {}
+    pairs = []
+    for clean_token, token_id in main.iter_clean_tokens():
+        choseong = main.get_choseong(clean_token[0])
+        if choseong:
+            choseong_to_ids_map.setdefault(choseong, []).append(token_id)
+        pairs.append((clean_token, token_id))
+    return choseong_to_ids_map, main.PrefixIndex.build(pairs)
+
+
+def legacy_select(main, legacy_index, context_ids, log_probs, fragment, k):
+    """기존 get_recommendations의 (2-2) ~ (5) 구간"""
+    choseong_to_ids_map, syllable_index = legacy_index
+    blacklist_ids = set(context_ids)
+    whitelist_ids = []
+
+    if len(fragment) == 1 and fragment in main.CHOSEONG_SET:
+        if fragment in choseong_to_ids_map:
+            for token_id in choseong_to_ids_map[fragment]:
+                if token_id in blacklist_ids: continue
+                whitelist_ids.append(token_id)
+    else:
+        # 기존 pytrie.StringTrie.items(prefix=...)와 같은 순회를 PrefixIndex.items로 재현
+        for clean_token, token_id_list in syllable_index.items(fragment):
+            if clean_token == fragment:
+                continue
+            for token_id in token_id_list:
+                if token_id in blacklist_ids: continue
+                whitelist_ids.append(token_id)
+
+    if not whitelist_ids:
+        return [], []
+
+    mask = torch.ones_like(log_probs) * -float("Inf")
+    mask[whitelist_ids] = 0.0
+    filtered_logits = log_probs + mask
+    top_k = torch.topk(filtered_logits, min(k, len(whitelist_ids)))
+    return top_k.indices.tolist(), top_k.values.tolist()
+
+
+def time_per_call(fn, inputs, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for args in inputs:
+            fn(*args)
+    return (time.perf_counter() - start) / (repeat * len(inputs)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete2")
+    parser.add_argument("--model-dir", default="./model", help="app-dir 기준 tokenizer 경로")
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--k", type=int, default=15)
+    args = parser.parse_args()
+
+    app_dir = os.path.abspath(args.app_dir)
+    os.chdir(app_dir)
+    sys.path.insert(0, app_dir)
+    app = importlib.import_module("main")
+
+    app.tokenizer = app.AutoTokenizer.from_pretrained(args.model_dir)
+    start = time.perf_counter()
+    app.build_vocab_index()
+    print(f"vocab index build: {(time.perf_counter() - start) * 1000:.1f}ms ({len(app.vocab)} tokens)")
+
+    torch.manual_seed(0)
+    log_probs = torch.log_softmax(torch.randn(len(app.tokenizer)), dim=-1)
+
+    inputs = []
+    for query in DEFAULT_QUERIES:
+        context, fragment = app.split_prompt(query)
+        context_ids = app.encode_context(context)
+        inputs.append((context_ids, log_probs, fragment, args.k))
+
+    legacy_index = build_legacy_index(app)
+    legacy_us = time_per_call(lambda *a: legacy_select(app, legacy_index, *a), inputs, args.repeat)
+    vectorized_us = time_per_call(app.select_candidates, inputs, args.repeat)
+
+    print(f"legacy (python loop + full mask): {legacy_us:9.1f} us/request")
+    print(f"vectorized (gather + topk)      : {vectorized_us:9.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Head 쿼리 자동완성 테이블 생성 (was/autocomplete2의 CompletionTable)
+
+검색 로그에서 가장 많이 들어온 검색어(prefix) 상위 N개에 대해 get_recommendations를 미리 실행하고,
+결과를 mmap 가능한 테이블 파일로 저장
+서버는 COMPLETION_TABLE_RELOAD_SEC 주기로 파일 변경을 감지하여 재시작 없이 새 테이블로 교체
+(즉시 교체: POST /api/v2/completion-table/reload)
+
+로그 형식: 한 줄에 검색어 하나 (또는 "검색어<TAB>횟수")
+--expand-prefixes: 로그가 최종 검색어일 때, 입력 중에 요청되는 모든 글자 단위 prefix로 펼쳐서 집계
+
+사용 예:
+    python scripts/build_completion_table.py --app-dir was/autocomplete2 \
+        --query-log queries.tsv --top 20000 --max-n 10 --output completion_table.bin
+    kubectl cp completion_table.bin <pod>:/app/completion_table.bin
+"""
+import os
+import sys
+import time
+import argparse
+import importlib
+from collections import Counter
+
+RETURN_TYPES = ("full", "token")
+
+
+def load_app(app_dir: str):
+    """서비스 디렉토리의 main.py를 import 하고 모델을 로드"""
+    app_dir = os.path.abspath(app_dir)
+    os.chdir(app_dir)  # main.py가 ./downloaded_model 등 상대 경로를 사용
+    sys.path.insert(0, app_dir)
+    main = importlib.import_module("main")
+    main.load_model_and_vocab()
+    return main
+
+
+def count_queries(path: str, expand_prefixes: bool, max_length: int) -> Counter:
+    counts = Counter()
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line.strip():
+                continue
+            query, _, count = line.partition("\t")
+            count = int(count) if count.strip() else 1
+
+            if expand_prefixes:
+                for i in range(1, min(len(query), max_length) + 1):
+                    if query[:i].strip():
+                        counts[query[:i]] += count
+            elif len(query) <= max_length:
+                counts[query] += count
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete2")
+    parser.add_argument("--query-log", required=True)
+    parser.add_argument("--top", type=int, default=20000, help="테이블에 넣을 검색어 수")
+    parser.add_argument("--max-n", type=int, default=10, help="검색어별 저장할 추천 수 (n이 이보다 크면 모델로 fallback)")
+    parser.add_argument("--max-length", type=int, default=25, help="API의 q 최대 길이")
+    parser.add_argument("--expand-prefixes", action="store_true")
+    parser.add_argument("--output", default="completion_table.bin")
+    args = parser.parse_args()
+
+    counts = count_queries(args.query_log, args.expand_prefixes, args.max_length)
+    head = counts.most_common(args.top)
+    total = sum(counts.values())
+    covered = sum(count for _, count in head)
+    print(f"queries: {len(counts)} unique / {total} total, top {len(head)} cover {covered / max(total, 1):.1%}")
+
+    output = os.path.abspath(args.output)
+    app = load_app(args.app_dir)
+
+    entries = {}
+    start = time.perf_counter()
+    for i, (query, _) in enumerate(head, 1):
+        entries[query] = {
+            return_type: app.get_recommendations(query, args.max_n, return_type)
+            for return_type in RETURN_TYPES
+        }
+        if i % 1000 == 0:
+            print(f"  {i}/{len(head)} ({time.perf_counter() - start:.1f}s)")
+
+    table = app.CompletionTable.build(entries, args.max_n, app.vocab_fingerprint)
+    table.save(output)
+    print(f"Saved {output}: {len(table)} keys, {os.path.getsize(output) / 1024:.0f}KB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+word2vec 모델 -> 최근접 이웃 검색용 벡터 인덱스 생성
+
+출력 디렉토리:
+- vectors.npy          L2 정규화된 float32 [단어 수, 차원] (서버에서 mmap 로드, 내적 = cosine 유사도)
+- words.txt            행 번호 순 단어 목록
+- ivf_centroids.npy    (--nlist > 0) spherical k-means 중심 [nlist, 차원]
+- ivf_list_offsets.npy 중심별 단어 구간 [nlist + 1]
+- ivf_list_ids.npy     중심 순으로 정렬한 단어 ID
+- meta.json
+
+사용 예:
+    python scripts/build_vector_index.py --w2v /mnt/data/w2v.bin --output /mnt/data/w2v_index
+    python scripts/build_vector_index.py --w2v /mnt/data/w2v.kv --output /mnt/data/w2v_index --nlist 0   # IVF 없이 전체 비교만
+"""
+import os
+import json
+import time
+import argparse
+
+import numpy as np
+from gensim.models import KeyedVectors
+
+
+def load_keyed_vectors(path: str) -> KeyedVectors:
+    if path.endswith(".kv"):
+        return KeyedVectors.load(path, mmap="r")
+    return KeyedVectors.load_word2vec_format(path, binary=not path.endswith(".txt"))
+
+
+def assign_clusters(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    assign = np.empty(len(vectors), dtype=np.int64)
+    for start in range(0, len(vectors), chunk_size):
+        chunk = np.asarray(vectors[start:start + chunk_size])
+        assign[start:start + chunk_size] = np.argmax(chunk @ centroids.T, axis=1)
+    return assign
+
+
+def train_kmeans(vectors: np.ndarray, nlist: int, iters: int, sample: int, seed: int) -> np.ndarray:
+    """정규화된 벡터에 대한 spherical k-means (내적 최대 중심으로 할당, 중심은 평균을 다시 정규화)"""
+    rng = np.random.default_rng(seed)
+    train = vectors[rng.choice(len(vectors), size=min(sample, len(vectors)), replace=False)]
+    centroids = train[rng.choice(len(train), size=nlist, replace=False)].copy()
+
+    for _ in range(iters):
+        assign = assign_clusters(train, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, train)
+        counts = np.bincount(assign, minlength=nlist)
+        # 빈 클러스터는 임의의 학습 벡터로 다시 시작
+        empty = counts == 0
+        sums[empty] = train[rng.choice(len(train), size=int(empty.sum()))]
+        centroids = sums / np.linalg.norm(sums, axis=1, keepdims=True).clip(min=1e-12)
+    return centroids.astype(np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--w2v", default="/mnt/data/w2v.bin", help="word2vec binary / .txt 또는 gensim .kv")
+    parser.add_argument("--output", default="/mnt/data/w2v_index")
+    parser.add_argument("--nlist", type=int, default=-1, help="IVF 리스트 수 (-1: 4*sqrt(단어 수), 0: IVF 없음)")
+    parser.add_argument("--iters", type=int, default=10)
+    parser.add_argument("--sample", type=int, default=200000, help="k-means 학습에 사용할 벡터 수")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    kv = load_keyed_vectors(args.w2v)
+    words = list(kv.index_to_key)
+    if any("\n" in word for word in words):
+        raise ValueError("줄바꿈이 포함된 단어가 있어 words.txt로 저장할 수 없습니다.")
+
+    vectors = np.asarray(kv.vectors, dtype=np.float32)
+    vectors = vectors / np.linalg.norm(vectors, axis=1, keepdims=True).clip(min=1e-12)
+    print(f"loaded {len(words)} words x {vectors.shape[1]} dims ({time.perf_counter() - start:.1f}s)")
+
+    os.makedirs(args.output, exist_ok=True)
+    np.save(os.path.join(args.output, "vectors.npy"), vectors)
+    with open(os.path.join(args.output, "words.txt"), "w", encoding="utf-8") as f:
+        f.write("\n".join(words))
+
+    nlist = int(4 * np.sqrt(len(words))) if args.nlist < 0 else args.nlist
+    nlist = min(nlist, len(words))
+    if nlist > 1:
+        start = time.perf_counter()
+        centroids = train_kmeans(vectors, nlist, args.iters, args.sample, args.seed)
+        assign = assign_clusters(vectors, centroids)
+        list_ids = np.argsort(assign, kind="stable").astype(np.int64)
+        list_offsets = np.concatenate([[0], np.cumsum(np.bincount(assign, minlength=nlist))]).astype(np.int64)
+
+        np.save(os.path.join(args.output, "ivf_centroids.npy"), centroids)
+        np.save(os.path.join(args.output, "ivf_list_offsets.npy"), list_offsets)
+        np.save(os.path.join(args.output, "ivf_list_ids.npy"), list_ids)
+        sizes = np.diff(list_offsets)
+        print(
+            f"IVF: {nlist} lists (size min={sizes.min()} mean={sizes.mean():.0f} max={sizes.max()}, "
+            f"{time.perf_counter() - start:.1f}s)"
+        )
+
+    with open(os.path.join(args.output, "meta.json"), "w") as f:
+        json.dump({"source": args.w2v, "words": len(words), "dim": int(vectors.shape[1]), "nlist": nlist}, f)
+    print(f"Saved {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+"""
+모델을 서비스 실행 dtype의 safetensors로 변환
+
+MODEL_MMAP=1 로 실행하면 가중치를 safetensors에서 mmap으로 읽어 worker 간에 공유하는데,
+파일의 dtype이 MODEL_PRECISION과 다르면 변환된 텐서가 worker마다 복사됨
+미리 같은 dtype으로 저장해두면 변환 없이 그대로 공유 (pytorch_model.bin만 있는 모델도 safetensors로 변환)
+
+사용 예:
+    python scripts/convert_safetensors.py --model-dir was/autocomplete1/model --output was/autocomplete1/model_fp32
+    python scripts/convert_safetensors.py --model-dir ./downloaded_model --output ./tiny_model_bf16 --dtype bf16
+    mc cp --recursive ./tiny_model_bf16/ minio/autocomplete/tiny_model/
+"""
+import os
+import shutil
+import argparse
+
+import torch
+from transformers import AutoModelForCausalLM
+
+DTYPES = {"fp32": torch.float32, "bf16": torch.bfloat16, "fp16": torch.float16}
+WEIGHT_FILES = ("model.safetensors", "model.safetensors.index.json", "pytorch_model.bin", "pytorch_model.bin.index.json")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model-dir", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--dtype", choices=sorted(DTYPES), default="fp32")
+    parser.add_argument("--max-shard-size", default="10GB", help="mmap 로드는 sharded 파일도 지원")
+    args = parser.parse_args()
+
+    model = AutoModelForCausalLM.from_pretrained(args.model_dir, torch_dtype=DTYPES[args.dtype])
+    model.save_pretrained(args.output, safe_serialization=True, max_shard_size=args.max_shard_size)
+
+    # tokenizer 등 가중치 외 파일은 그대로 복사
+    for name in os.listdir(args.model_dir):
+        source = os.path.join(args.model_dir, name)
+        target = os.path.join(args.output, name)
+        if name in WEIGHT_FILES or name.startswith(("model-", "pytorch_model-")) or os.path.exists(target):
+            continue
+        if os.path.isfile(source):
+            shutil.copy2(source, target)
+
+    for name in sorted(os.listdir(args.output)):
+        print(f"{name:40s} {os.path.getsize(os.path.join(args.output, name)) / (1024 * 1024):10.1f}MB")
+
+
+if __name__ == "__main__":
+    main()
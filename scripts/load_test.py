@@ -0,0 +1,126 @@
+"""
+API 부하 테스트: 검색 endpoint에 동시 요청을 보내는 동안 헬스체크(`/`)의 지연시간을 함께 측정
+
+inference pool 적용 전/후 서버에 각각 실행하여 비교
+(적용 전에는 추론이 event loop를 막아 헬스체크 tail latency가 검색 요청 지연만큼 늘어남)
+
+사용 예:
+    python scripts/load_test.py --base-url http://localhost:8000 \
+        --search-path /api/v2/search --health-path / --concurrency 16 --duration 30
+    python scripts/load_test.py --base-url http://localhost:8000 \
+        --search-path /api/v1/related/search --health-path /api/v1/related --label after
+"""
+import json
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+
+DEFAULT_QUERIES = [
+    "강남역 ㅁ", "강남역 맛", "강남역 맛집 ㅊ", "아이폰 ㄱ", "아이폰 케",
+    "제주도 ㅎ", "제주도 호", "서울 날씨 ㅇ", "부산 ㅎ", "여름 휴가 ㅊ",
+]
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    index = min(len(values) - 1, int(round(p / 100.0 * (len(values) - 1))))
+    return values[index]
+
+
+def timed_get(url: str, timeout: float):
+    """(지연시간 ms, HTTP status) 반환. 연결 실패/타임아웃은 status 0"""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except Exception:
+        status = 0
+    return (time.perf_counter() - start) * 1000, status
+
+
+def summarize(samples) -> dict:
+    latencies = [latency for latency, status in samples if status == 200]
+    statuses = {}
+    for _, status in samples:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    return {
+        "requests": len(samples),
+        "status": statuses,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies) if latencies else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--search-path", default="/api/v2/search")
+    parser.add_argument("--health-path", default="/")
+    parser.add_argument("--n", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30.0, help="측정 시간(초)")
+    parser.add_argument("--health-interval", type=float, default=0.1, help="헬스체크 간격(초)")
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--label", default="")
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    search_samples = []
+    health_samples = []
+    deadline = time.time() + args.duration
+
+    def search_client(seed: int):
+        rng = random.Random(seed)
+        while time.time() < deadline:
+            params = urllib.parse.urlencode({"q": rng.choice(DEFAULT_QUERIES), "n": args.n})
+            search_samples.append(timed_get(f"{args.base_url}{args.search_path}?{params}", args.timeout))
+
+    def health_client():
+        while time.time() < deadline:
+            health_samples.append(timed_get(f"{args.base_url}{args.health_path}", args.timeout))
+            time.sleep(args.health_interval)
+
+    threads = [threading.Thread(target=search_client, args=(i,)) for i in range(args.concurrency)]
+    threads.append(threading.Thread(target=health_client))
+    start = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - start
+
+    result = {
+        "label": args.label,
+        "concurrency": args.concurrency,
+        "duration_s": elapsed,
+        "search": summarize(search_samples),
+        "health": summarize(health_samples),
+    }
+    result["search"]["throughput_rps"] = result["search"]["status"].get("200", 0) / elapsed
+
+    for name in ("search", "health"):
+        r = result[name]
+        print(
+            f"[{args.label or 'run'}] {name:>6}: {r['requests']:6d} req  status={r['status']}  "
+            f"p50={r['p50_ms']:8.1f}ms  p95={r['p95_ms']:8.1f}ms  p99={r['p99_ms']:8.1f}ms"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
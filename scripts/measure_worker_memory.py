@@ -0,0 +1,121 @@
+"""
+uvicorn worker 수별 프로세스 메모리 측정
+
+서비스를 uvicorn --workers N 으로 띄우고 모든 worker가 준비되면
+worker별 RSS / PSS / USS(Private_Clean + Private_Dirty)를 /proc/<pid>/smaps_rollup에서 읽음
+- RSS: mmap된 가중치 페이지도 포함되므로 worker를 늘려도 worker당 값은 비슷함
+- USS: 해당 worker에만 있는 메모리 (worker를 하나 늘릴 때 실제로 늘어나는 양)
+- PSS: 공유 페이지를 공유하는 프로세스 수로 나눠 더한 값 (합계가 Pod 메모리 사용량에 가까움)
+
+사용 예:
+    python scripts/measure_worker_memory.py --app-dir was/autocomplete1 --workers 1,2,4
+    python scripts/measure_worker_memory.py --app-dir was/autocomplete1 --workers 1,2,4 --mmap 0   # 비교용
+"""
+import os
+import json
+import time
+import signal
+import argparse
+import subprocess
+import urllib.request
+
+
+def read_smaps_rollup(pid: int) -> dict:
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1]) / 1024
+    return {
+        "rss_mb": values.get("Rss", 0.0),
+        "pss_mb": values.get("Pss", 0.0),
+        "uss_mb": values.get("Private_Clean", 0.0) + values.get("Private_Dirty", 0.0),
+        "shared_mb": values.get("Shared_Clean", 0.0) + values.get("Shared_Dirty", 0.0),
+    }
+
+
+def child_pids(pid: int) -> list:
+    children = []
+    task_dir = f"/proc/{pid}/task"
+    for tid in os.listdir(task_dir):
+        with open(f"{task_dir}/{tid}/children") as f:
+            children.extend(int(child) for child in f.read().split())
+    return children
+
+
+def wait_ready(url: str, timeout: float):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=5) as response:
+                if response.status == 200:
+                    return
+        except Exception:
+            pass
+        time.sleep(2)
+    raise TimeoutError(f"{url} 응답 없음")
+
+
+def measure(args, workers: int) -> dict:
+    env = dict(os.environ, MODEL_MMAP=args.mmap, BATCH_ENABLED="0")
+    server = subprocess.Popen(
+        ["uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(args.port), "--workers", str(workers)],
+        cwd=os.path.abspath(args.app_dir), env=env
+    )
+    try:
+        # 요청은 아무 worker나 받으므로, 모든 worker가 모델을 로드할 때까지 충분히 요청을 보냄
+        url = f"http://127.0.0.1:{args.port}{args.search_path}?q=%EA%B0%95%EB%82%A8%EC%97%AD+%E3%85%81"
+        wait_ready(url, args.timeout)
+        for _ in range(workers * 10):
+            urllib.request.urlopen(url, timeout=60).read()
+        time.sleep(args.settle)
+
+        # uvicorn은 multiprocessing으로 worker를 띄우므로 손자 프로세스까지 포함 (resource tracker 등 제외)
+        children = child_pids(server.pid)
+        pids = children + [pid for child in children for pid in child_pids(child)]
+        per_worker = [read_smaps_rollup(pid) for pid in pids]
+        per_worker = sorted((w for w in per_worker if w["rss_mb"] > 100), key=lambda w: -w["rss_mb"])[:workers]
+    finally:
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    return {
+        "workers": workers,
+        "mmap": args.mmap,
+        "per_worker": per_worker,
+        "total_pss_mb": sum(w["pss_mb"] for w in per_worker),
+        "avg_uss_mb": sum(w["uss_mb"] for w in per_worker) / max(len(per_worker), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app-dir", default="was/autocomplete1")
+    parser.add_argument("--search-path", default="/api/v1/search")
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--mmap", default="1", choices=["0", "1"])
+    parser.add_argument("--port", type=int, default=18000)
+    parser.add_argument("--timeout", type=float, default=600.0, help="모델 로드 대기 시간(초)")
+    parser.add_argument("--settle", type=float, default=3.0)
+    parser.add_argument("--json", default=None, help="결과를 저장할 JSON 경로")
+    args = parser.parse_args()
+
+    results = []
+    for workers in [int(w) for w in args.workers.split(",")]:
+        result = measure(args, workers)
+        results.append(result)
+        print(
+            f"workers={workers} mmap={args.mmap}: "
+            f"USS/worker={result['avg_uss_mb']:8.1f}MB  total PSS={result['total_pss_mb']:8.1f}MB  "
+            f"RSS/worker={[round(w['rss_mb']) for w in result['per_worker']]}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"Saved {args.json}")
+
+
+if __name__ == "__main__":
+    main()
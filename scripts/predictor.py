@@ -1,16 +1,72 @@
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, HTTPException
 from gensim.models import KeyedVectors
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import threading
+import sys
 import os
 
+# VectorIndex는 relkey 서비스와 같은 구현을 사용 (was/relkey1/vector_index.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "was", "relkey1"))
+from vector_index import VectorIndex
+
+# scripts/build_vector_index.py 로 만든 인덱스가 있으면 mmap으로 로드해서 사용하고,
+# 없으면 기존처럼 w2v.bin 전체를 읽어 gensim most_similar(전체 비교)로 응답
+W2V_PATH = os.environ.get("W2V_PATH", "/models/w2v.bin")
+W2V_INDEX_DIR = os.environ.get("W2V_INDEX_DIR", "/models/w2v_index")
+# IVF 인덱스에서 비교할 리스트 수 (클수록 recall이 높고 느림, 0이면 전체 비교)
+W2V_NPROBE = int(os.environ.get("W2V_NPROBE", "8"))
+# 전체 비교 시 한 번에 행렬곱할 단어 수 (유사도 행렬 크기 = 단어 수 x vocab x 4 bytes)
+W2V_BATCH_ROWS = int(os.environ.get("W2V_BATCH_ROWS", "64"))
+
 app = FastAPI()
-model = KeyedVectors.load_word2vec_format("/models/w2v.bin", binary=True)
+model = None
+model_lock = threading.Lock()
+
+
+def get_model():
+    """첫 요청 시 한 번만 로드 (import 시점에 w2v.bin 전체를 읽지 않음)"""
+    global model
+    if model is None:
+        with model_lock:
+            if model is None:
+                if os.path.exists(os.path.join(W2V_INDEX_DIR, "vectors.npy")):
+                    model = VectorIndex(W2V_INDEX_DIR, W2V_NPROBE, W2V_BATCH_ROWS)
+                else:
+                    model = KeyedVectors.load_word2vec_format(W2V_PATH, binary=True)
+    return model
+
+
+def most_similar(m, words, topn, nprobe):
+    if isinstance(m, VectorIndex):
+        return m.most_similar_batch(words, topn, nprobe)
+    return [[[w, float(s)] for w, s in m.most_similar(word, topn=topn)] for word in words]
+
+
+class BatchRequest(BaseModel):
+    words: List[str]
+    topn: int = Field(5, ge=1)
+    nprobe: Optional[int] = None
+
 
 @app.get("/similar")
-def similar(word: str = Query(...), topn: int = Query(5)):
-    if word not in model:
+def similar(word: str = Query(...), topn: int = Query(5, ge=1), nprobe: Optional[int] = Query(None)):
+    m = get_model()
+    if word not in m:
         return {"word": word, "related": []}
-    sims = model.most_similar(word, topn=topn)
-    return {"word": word, "related": [[w, float(s)] for w,s in sims]}
+    related = most_similar(m, [word], topn, W2V_NPROBE if nprobe is None else nprobe)[0]
+    return {"word": word, "related": related}
+
+
+@app.post("/similar/batch")
+def similar_batch(request: BatchRequest):
+    if len(request.words) > 1000:
+        raise HTTPException(status_code=400, detail="words는 최대 1000개까지 요청할 수 있습니다.")
+    m = get_model()
+    known = [w for w in dict.fromkeys(request.words) if w in m]
+    nprobe = W2V_NPROBE if request.nprobe is None else request.nprobe
+    related = dict(zip(known, most_similar(m, known, request.topn, nprobe))) if known else {}
+    return {"results": [{"word": w, "related": related.get(w, [])} for w in request.words]}
 
 
 if __name__ == "__main__":
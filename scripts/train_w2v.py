@@ -1,12 +1,112 @@
+"""
+검색어 코퍼스로 word2vec 학습
+
+- 코퍼스를 메모리에 올리지 않고 한 줄씩 읽음 (단일 파일 또는 shard 디렉토리, .gz 지원)
+- --update: 기존 모델(.model)에 새 데이터(e.g. 새로 쌓인 하루치 로그)만 추가 학습
+- 출력: <output>.bin (word2vec binary), <output>.kv (KeyedVectors, mmap 로드 가능), <output>.model (추가 학습용)
+
+사용 예:
+    python scripts/train_w2v.py --corpus /mnt/data/corpus.txt --output /mnt/data/w2v
+    python scripts/train_w2v.py --corpus /mnt/data/logs/2024-06-01/ --update /mnt/data/w2v.model --output /mnt/data/w2v
+"""
 from gensim.models import Word2Vec
+import argparse
+import gzip
+import os
+
+
+def cpu_limit():
+    """Pod의 CPU limit (cgroup v2 cpu.max), limit이 없으면 CPU 개수"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return max(1, int(int(quota) / int(period)))
+    except (OSError, ValueError):
+        pass
+    return os.cpu_count() or 1
+
+
+class Corpus:
+    """파일 또는 디렉토리(정렬된 shard 파일들)를 한 줄씩 읽어 토큰 리스트로 반환 (epoch마다 다시 읽음)"""
+
+    def __init__(self, path):
+        if os.path.isdir(path):
+            self.files = sorted(
+                os.path.join(path, name) for name in os.listdir(path)
+                if not name.startswith(".") and os.path.isfile(os.path.join(path, name))
+            )
+        else:
+            self.files = [path]
+
+    def __iter__(self):
+        for path in self.files:
+            opener = gzip.open if path.endswith(".gz") else open
+            with opener(path, "rt", encoding="utf-8", errors="ignore") as f:
+                for line in f:
+                    tokens = line.split()
+                    if tokens:
+                        yield tokens
+
+
+def corpus_kwargs(path):
+    """
+    압축되지 않은 단일 파일은 corpus_file 모드로 학습 (worker마다 파일 구간을 나눠 읽어 worker 수만큼 빨라짐)
+    shard 디렉토리 / gzip은 iterator로 학습
+    """
+    if os.path.isfile(path) and not path.endswith(".gz"):
+        return {"corpus_file": path}
+    return {"corpus_iterable": Corpus(path)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.environ.get("W2V_CORPUS", "/mnt/data/corpus.txt"))
+    parser.add_argument("--output", default=os.environ.get("W2V_OUTPUT", "/mnt/data/w2v"), help="출력 경로 (.bin은 떼고 사용)")
+    parser.add_argument("--update", default=None, help="추가 학습할 기존 모델(.model) 경로")
+    parser.add_argument("--vector-size", type=int, default=int(os.environ.get("W2V_VECTOR_SIZE", "100")))
+    parser.add_argument("--window", type=int, default=int(os.environ.get("W2V_WINDOW", "5")))
+    parser.add_argument("--min-count", type=int, default=int(os.environ.get("W2V_MIN_COUNT", "1")),
+                        help="이 횟수 미만으로 등장한 단어는 어휘에서 제외")
+    parser.add_argument("--epochs", type=int, default=int(os.environ.get("W2V_EPOCHS", "5")))
+    parser.add_argument("--workers", type=int, default=int(os.environ.get("W2V_WORKERS", str(cpu_limit()))))
+    args = parser.parse_args()
+
+    output = args.output[:-len(".bin")] if args.output.endswith(".bin") else args.output
+    corpus = corpus_kwargs(args.corpus)
+
+    if args.update:
+        # 기존 어휘에 새 단어를 추가하고 새 데이터로만 학습 (min_count 등은 기존 모델 설정을 따름)
+        model = Word2Vec.load(args.update)
+        model.workers = args.workers
+        model.build_vocab(**corpus, update=True)
+        model.train(**corpus, total_examples=model.corpus_count, total_words=model.corpus_total_words,
+                    epochs=model.epochs)
+    else:
+        model = Word2Vec(
+            vector_size=args.vector_size,
+            window=args.window,
+            min_count=args.min_count,
+            epochs=args.epochs,
+            workers=args.workers,
+        )
+        model.build_vocab(**corpus)
+        if len(model.wv) == 0:
+            # gensim은 어휘가 비어 있으면 학습 단계에서 원인을 알기 어려운 오류를 냄
+            raise SystemExit(
+                f"어휘가 비어 있습니다: {args.corpus}에 {args.min_count}번 이상 등장한 단어가 없습니다. "
+                f"코퍼스를 확인하거나 --min-count(W2V_MIN_COUNT)를 낮추세요."
+            )
+        model.train(**corpus, total_examples=model.corpus_count, total_words=model.corpus_total_words,
+                    epochs=model.epochs)
 
-sentences=[]
+    model.wv.save_word2vec_format(f"{output}.bin", binary=True)
+    model.wv.save(f"{output}.kv")
+    model.save(f"{output}.model")
 
-with open("/mnt/data/corpus.txt","r") as f:
-    for line in f:
-        sentences.append(line.strip().split())
+    print(f"vocab: {len(model.wv)} words, workers={args.workers}")
+    print(f"Saved {output}.bin / {output}.kv / {output}.model")
 
-model = Word2Vec(sentences, vector_size=100, window=5, min_count=1, workers=2)
-model.wv.save_word2vec_format("/mnt/data/w2v.bin", binary=True)
 
-print("Saved /mnt/data/w2v.bin")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
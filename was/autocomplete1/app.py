@@ -1,6 +1,7 @@
 import streamlit as st
 import requests
 import time
+from requests.adapters import HTTPAdapter
 # 🌟 [삭제] st_keyup 제거 (기본 st.text_input 사용)
 # from st_keyup import st_keyup
 
@@ -9,8 +10,9 @@ API_BASE_URL = "http://s-extension-dev.onkakao.net"
 PAGE_TITLE = "LLM 검색어 시스템"
 PAGE_ICON = "🔍"
 
-# 모델의 응답 속도가 느리므로 타임아웃을 넉넉하게 설정
+# 모델의 응답 속도가 느리므로 응답 타임아웃은 넉넉하게, 연결 타임아웃은 짧게 설정
 TIMEOUT_SECONDS = 60.0
+CONNECT_TIMEOUT_SECONDS = 3.0
 
 st.set_page_config(page_title=PAGE_TITLE, page_icon=PAGE_ICON)
 
@@ -57,6 +59,60 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+
+# --- API 호출 ---
+@st.cache_resource
+def get_session() -> requests.Session:
+    """keep-alive 연결을 재사용하는 세션 (Streamlit rerun 사이에도 공유)"""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def call_api(path: str, params: dict) -> dict:
+    """API 호출 결과 (status, JSON body, latency ms, 오류 메시지)"""
+    start_time = time.time()
+    try:
+        response = get_session().get(
+            f"{API_BASE_URL}{path}",
+            params=params,
+            timeout=(CONNECT_TIMEOUT_SECONDS, TIMEOUT_SECONDS)
+        )
+        return {
+            "status": response.status_code,
+            "body": response.json() if response.status_code == 200 else None,
+            "latency": (time.time() - start_time) * 1000,
+            "error": None,
+        }
+    except requests.exceptions.Timeout:
+        return {"status": None, "body": None, "latency": None, "error": f"타임아웃 발생 (>{TIMEOUT_SECONDS}s)"}
+    except Exception as e:
+        return {"status": None, "body": None, "latency": None, "error": f"연결 실패: {e}"}
+
+
+def fetch_results(query: str) -> dict:
+    """
+    gateway 한 번의 호출로 자동완성 / 연관검색어 결과를 함께 받음
+    (gateway가 두 엔진을 동시에 호출하고, 기한을 넘긴 엔진은 status="timeout"으로 빈 결과를 반환)
+    """
+    result = call_api("/api/v1/suggest/search", {"q": query, "n": 5, "rel_n": 8})
+    if result["error"] or result["status"] != 200:
+        return {"query": query, "auto": result, "rel": result}
+
+    sections = {}
+    for name in ("auto", "rel"):
+        section = result["body"][name]
+        sections[name] = {
+            "status": 200 if section["status"] == "ok" else section["status"],
+            "body": {"subkeys": section["subkeys"]},
+            "latency": section["latency"],
+            "error": section["error"],
+        }
+    return {"query": query, **sections}
+
+
 st.title(f"{PAGE_ICON} {PAGE_TITLE}")
 st.write("KoGPT(자동완성)와 Qwen(연관검색어) 모델이 엔터 입력 시 결과를 보여줍니다.")
 
@@ -87,79 +143,59 @@ if submitted or st.session_state.submitted_query:
         # 빈 쿼리 제출 시 무시
         st.stop()
 
+    # 🌟 같은 검색어로 rerun 될 때(다른 위젯 조작 등)는 다시 호출하지 않고 이전 결과 사용
+    results = st.session_state.get("results")
+    if submitted or results is None or results["query"] != target_query:
+        with st.spinner("자동완성 후보 / 연관 키워드 생성 중... (LLM 추론)"):
+            results = fetch_results(target_query)
+        st.session_state.results = results
+
     st.divider()
 
     # 2. 레이아웃 분할 (왼쪽: 자동완성, 오른쪽: 연관검색어)
     col1, col2 = st.columns(2)
 
-    # === 왼쪽: 자동완성 (Auto) 서비스 호출 ===
+    # === 왼쪽: 자동완성 (Auto) 서비스 결과 ===
     with col1:
         st.subheader("1️⃣ 자동완성 후보 (KoGPT)")
-        with st.spinner("자동완성 후보 로딩 중..."):
-            try:
-                start_time_auto = time.time()
-
-                auto_response = requests.get(
-                    f"{API_BASE_URL}/api/v1/auto/search",
-                    params={"q": target_query, "n": 5, "type": "full"},
-                    timeout=TIMEOUT_SECONDS
-                )
-                latency_auto = (time.time() - start_time_auto) * 1000
-
-                if auto_response.status_code == 200:
-                    data = auto_response.json()
-                    subkeys = data.get("subkeys", [])
-
-                    st.markdown(f'<div class="latency-metric">⚡ Latency: {latency_auto:.0f}ms</div>', unsafe_allow_html=True)
-                    st.markdown('<div class="suggestion-box">', unsafe_allow_html=True)
-
-                    if subkeys:
-                        for item in subkeys:
-                            keyword = item.get('subkey', '')
-                            prob = item.get('prob', 0.0)
-                            st.markdown(f"**{keyword}** <small>({prob:.2%})</small>", unsafe_allow_html=True)
-                    else:
-                        st.info("자동완성 결과 없음.")
-
-                    st.markdown('</div>', unsafe_allow_html=True)
-                else:
-                    st.error(f"자동완성 API 오류: {auto_response.status_code}")
-
-            except requests.exceptions.Timeout:
-                st.error(f"자동완성 API 타임아웃 발생 (>{TIMEOUT_SECONDS}s)")
-            except Exception as e:
-                st.error(f"자동완성 API 연결 실패: {e}")
-
-    # === 오른쪽: 연관검색어 (Relkey) 서비스 호출 ===
+        auto = results["auto"]
+
+        if auto["error"]:
+            st.error(f"자동완성 API {auto['error']}")
+        elif auto["status"] == 200:
+            subkeys = auto["body"].get("subkeys", [])
+
+            st.markdown(f'<div class="latency-metric">⚡ Latency: {auto["latency"]:.0f}ms</div>', unsafe_allow_html=True)
+            st.markdown('<div class="suggestion-box">', unsafe_allow_html=True)
+
+            if subkeys:
+                for item in subkeys:
+                    keyword = item.get('subkey', '')
+                    prob = item.get('prob', 0.0)
+                    st.markdown(f"**{keyword}** <small>({prob:.2%})</small>", unsafe_allow_html=True)
+            else:
+                st.info("자동완성 결과 없음.")
+
+            st.markdown('</div>', unsafe_allow_html=True)
+        else:
+            st.error(f"자동완성 API 오류: {auto['status']}")
+
+    # === 오른쪽: 연관검색어 (Relkey) 서비스 결과 ===
     with col2:
         st.subheader("2️⃣ 연관 검색어 생성 (Qwen)")
-        with st.spinner("연관 키워드 생성 중... (LLM 추론)"):
-            try:
-                start_time_rel = time.time()
-
-                rel_response = requests.get(
-                    f"{API_BASE_URL}/api/v1/relkey/search",
-                    params={"q": target_query, "n": 8},
-                    timeout=TIMEOUT_SECONDS
-                )
-
-                latency_rel = (time.time() - start_time_rel) * 1000
-
-                if rel_response.status_code == 200:
-                    rel_data = rel_response.json()
-                    related_keywords = rel_data.get("subkeys", []) # RelkeyResponse의 subkeys 사용
-
-                    st.markdown(f'<div class="latency-metric">⚡ Generation Latency: {latency_rel:.0f}ms</div>', unsafe_allow_html=True)
-
-                    if related_keywords:
-                        tags_html = "".join([f'<span class="related-tag"># {kw}</span>' for kw in related_keywords])
-                        st.markdown(tags_html, unsafe_allow_html=True)
-                    else:
-                        st.info("연관 키워드 생성 결과 없음.")
-                else:
-                    st.error(f"연관검색어 API 오류: {rel_response.status_code}")
-
-            except requests.exceptions.Timeout:
-                st.error(f"연관검색어 API 타임아웃 발생 (>{TIMEOUT_SECONDS}s)")
-            except Exception as e:
-                st.error(f"연관검색어 API 연결 실패: {e}")
+        rel = results["rel"]
+
+        if rel["error"]:
+            st.error(f"연관검색어 API {rel['error']}")
+        elif rel["status"] == 200:
+            related_keywords = rel["body"].get("subkeys", []) # RelkeyResponse의 subkeys 사용
+
+            st.markdown(f'<div class="latency-metric">⚡ Generation Latency: {rel["latency"]:.0f}ms</div>', unsafe_allow_html=True)
+
+            if related_keywords:
+                tags_html = "".join([f'<span class="related-tag"># {kw}</span>' for kw in related_keywords])
+                st.markdown(tags_html, unsafe_allow_html=True)
+            else:
+                st.info("연관 키워드 생성 결과 없음.")
+        else:
+            st.error(f"연관검색어 API 오류: {rel['status']}")
@@ -1,4 +1,11 @@
 import os
+import json
+import time
+import shutil
+import hashlib
+import itertools
+import numpy as np
+import torch
 from transformers import (
     Trainer,
     TrainingArguments,
@@ -7,31 +14,122 @@ from transformers import (
     PreTrainedTokenizerFast,
     DataCollatorForLanguageModeling,
 )
-from datasets import load_dataset
 
 
 # -- 0. functions
-def tokenize_function(examples):
-    return tokenizer(examples["text"])
-
-
-def chunking(examples):
-    # concat all keywords
-    concatenated_examples = {k: sum(examples[k], []) for k in examples.keys()}
-    total_length = len(concatenated_examples[list(examples.keys())[0]])
-
-    # remove over size keywords
-    total_length = (total_length // BLOCK_SIZE) * BLOCK_SIZE
-
-    # split concated keywords by BLOCK_SIZE
-    result = {
-        k: [t[i : i + BLOCK_SIZE] for i in range(0, total_length, BLOCK_SIZE)]
-        for k, t in concatenated_examples.items()
-    }
-
-    # 'labels' == 'input_ids' in Causal LM task
-    result["labels"] = result["input_ids"].copy()
-    return result
+def file_hash(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_fingerprint(path):
+    # 큰 데이터 파일은 내용을 읽지 않고 (경로, 크기, 수정 시각)으로 변경 여부를 판단
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}:{stat.st_size}:{stat.st_mtime_ns}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def iter_keyword_batches(path, batch_size):
+    # 파일 전체를 메모리에 올리지 않고 batch_size 줄씩 읽음 (빈 줄은 제외)
+    batch = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if not line:
+                continue
+            batch.append(line)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def build_token_cache(cache_dir):
+    """
+    keywords.txt를 한 번만 토큰화하여 cache_dir에 저장
+    - tokens.bin: 모든 키워드의 토큰 ID를 이어 붙인 1차원 배열 (vocab이 65536 미만이면 uint16, 아니면 uint32)
+    - offsets.npy: 키워드 i의 토큰은 tokens[offsets[i]:offsets[i + 1]]
+    - meta.json: dtype, 토큰/키워드 수
+    임시 디렉토리에 쓴 뒤 rename 하므로 중간에 중단되어도 깨진 캐시가 남지 않음
+    """
+    dtype = np.uint16 if len(tokenizer) < 2 ** 16 else np.uint32
+    tmp_dir = f"{cache_dir}.tmp"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+
+    start = time.perf_counter()
+    lengths = []
+    num_tokens = 0
+    with open(os.path.join(tmp_dir, "tokens.bin"), "wb") as f:
+        for batch in iter_keyword_batches(DATA_FILE, TOKENIZE_BATCH_SIZE):
+            # fast tokenizer의 batch 인코딩은 Rust에서 병렬로 처리됨
+            input_ids = tokenizer(batch)["input_ids"]
+            # batch 단위로 한 번에 배열로 변환하여 기록 (토큰마다 Python 루프를 돌지 않음)
+            lengths.append(np.asarray(list(map(len, input_ids)), dtype=np.int64))
+            flat = np.asarray(list(itertools.chain.from_iterable(input_ids)), dtype=dtype)
+            flat.tofile(f)
+            num_tokens += len(flat)
+
+    lengths = np.concatenate(lengths) if lengths else np.zeros(0, dtype=np.int64)
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    np.save(os.path.join(tmp_dir, "offsets.npy"), offsets)
+
+    elapsed = time.perf_counter() - start
+    meta = {"dtype": np.dtype(dtype).name, "num_tokens": int(num_tokens), "num_keywords": len(lengths)}
+    with open(os.path.join(tmp_dir, "meta.json"), "w") as f:
+        json.dump(meta, f)
+
+    shutil.rmtree(cache_dir, ignore_errors=True)
+    os.rename(tmp_dir, cache_dir)
+    print(
+        f"토큰화 완료: 키워드 {len(lengths):,}개, 토큰 {num_tokens:,}개, {elapsed:.1f}s "
+        f"({len(lengths) / max(elapsed, 1e-9):,.0f} keywords/s, {num_tokens / max(elapsed, 1e-9):,.0f} tokens/s)"
+    )
+
+
+def load_token_cache():
+    # 토크나이저 파일 내용과 데이터 파일의 (경로, 크기, 수정 시각)이 모두 같을 때만 캐시 재사용
+    # (데이터 파일 전체를 해싱하면 캐시를 쓸 때마다 토큰화에 맞먹는 시간이 걸리므로 stat만 사용)
+    key = f"{file_hash(TOKENIZER_FILE)[:16]}-{file_fingerprint(DATA_FILE)[:16]}"
+    cache_dir = os.path.join(CACHE_DIR, key)
+    if not os.path.exists(os.path.join(cache_dir, "meta.json")):
+        print(f"토큰 캐시 없음, 새로 생성: {cache_dir}")
+        build_token_cache(cache_dir)
+    else:
+        print(f"토큰 캐시 재사용: {cache_dir}")
+
+    with open(os.path.join(cache_dir, "meta.json")) as f:
+        meta = json.load(f)
+    if meta["num_tokens"] == 0:
+        # 빈 파일은 mmap할 수 없으므로 ("cannot mmap an empty file") 여기서 원인을 알려줌
+        raise ValueError(f"{DATA_FILE}에서 토큰이 하나도 나오지 않았습니다. 학습 데이터를 확인하세요. (캐시: {cache_dir})")
+    tokens = np.memmap(os.path.join(cache_dir, "tokens.bin"), dtype=meta["dtype"], mode="r", shape=(meta["num_tokens"],))
+    offsets = np.load(os.path.join(cache_dir, "offsets.npy"), mmap_mode="r")
+    return tokens, offsets
+
+
+class PackedDataset(torch.utils.data.Dataset):
+    """
+    모든 키워드를 이어 붙인 토큰 배열을 BLOCK_SIZE씩 잘라 학습 샘플로 사용 (남는 꼬리는 버림)
+    샘플은 memmap의 slice로 필요할 때만 읽으므로 전체 토큰을 메모리에 올리지 않음
+    'labels'는 data_collator가 input_ids로 채움 (Causal LM)
+    """
+
+    def __init__(self, tokens, block_size):
+        self.tokens = tokens
+        self.block_size = block_size
+
+    def __len__(self):
+        return len(self.tokens) // self.block_size
+
+    def __getitem__(self, i):
+        block = self.tokens[i * self.block_size:(i + 1) * self.block_size]
+        return {"input_ids": torch.from_numpy(block.astype(np.int64))}
 
 
 # -- 1. configs
@@ -41,6 +139,8 @@ GDRIVE_PATH = "/content/drive/MyDrive/autocomplete"
 DATA_FILE = f"{GDRIVE_PATH}/data/keywords.txt"
 TOKENIZER_FILE = f"{GDRIVE_PATH}/data/bpe-tokenizer.json"
 OUTPUT_DIR = f"{GDRIVE_PATH}/model1"
+CACHE_DIR = f"{GDRIVE_PATH}/data/token_cache"    # 토큰화 결과 캐시 (토크나이저 해시 / 데이터 파일 fingerprint별 디렉토리)
+TOKENIZE_BATCH_SIZE = 10000
 
 print(f"Tokenize file: {TOKENIZER_FILE}")
 print(f"Data file: {DATA_FILE}")
@@ -58,22 +158,9 @@ tokenizer = PreTrainedTokenizerFast(
 )
 print(f"토크나이저 로드 완료. Vocab size: {tokenizer.vocab_size}")
 
-raw_datasets = load_dataset("text", data_files=DATA_FILE, split="train")
-tokenized_datasets = raw_datasets.map(
-    tokenize_function,
-    batched=True,
-    num_proc=4,                 # 4개의 CPU 코어를 사용하여 병렬 처리
-    remove_columns=["text"]     # 토큰화 후 원본 텍스트 컬럼 삭제
-)
-print(f"원본 데이터 사이즈: {raw_datasets.dataset_size}")
-
-# chunking
-lm_datasets = tokenized_datasets.map(
-    chunking,
-    batched=True,
-    num_proc=4,
-)
-print(f"데이터 전처리 완료. 총 {len(lm_datasets)}개의 학습 샘플 생성.")
+tokens, offsets = load_token_cache()
+lm_datasets = PackedDataset(tokens, BLOCK_SIZE)
+print(f"데이터 전처리 완료. 키워드 {len(offsets) - 1:,}개, 토큰 {len(tokens):,}개, 총 {len(lm_datasets)}개의 학습 샘플 생성.")
 
 
 # -- 3. training config
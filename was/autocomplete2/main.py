@@ -1,15 +1,54 @@
 import os
+import re
+import json
+import math
+import random
+import mmap
 import boto3
+import botocore.config
 import torch
-import pytrie
+import asyncio
+import struct
+import hashlib
 import logging
+import threading
+import time
 
 from enum import Enum
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
 from functools import lru_cache
-from fastapi import FastAPI, Query
+from contextlib import contextmanager, nullcontext
+from importlib.util import find_spec
+from concurrent.futures import ThreadPoolExecutor, Future
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
-from transformers import AutoModelForCausalLM, AutoTokenizer
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+from transformers import AutoModelForCausalLM, AutoTokenizer, AutoConfig
+
+try:
+    from transformers import DynamicCache
+except ImportError:  # 구버전 transformers는 past_key_values를 튜플로 주고받음
+    DynamicCache = None
+
+try:
+    from transformers.modeling_utils import no_init_weights
+except ImportError:  # 초기화를 건너뛰지 못함 (load 시 경고)
+    no_init_weights = None
+
+# ORJSONResponse는 orjson이 없어도 import되고 응답할 때 실패하므로 설치 여부를 먼저 확인
+if find_spec("orjson") is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:  # orjson이 없으면 표준 json으로 직렬화
+    from fastapi.responses import JSONResponse as FastJSONResponse
+
+try:
+    from prometheus_client import CollectorRegistry, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+except ImportError:  # prometheus_client가 없으면 /metrics 비활성화
+    Histogram = None
 
 
 # --- 로깅 설정 ---
@@ -23,6 +62,18 @@ class ReturnType(str, Enum):
     token = "token"
 
 
+class SearchMode(str, Enum):
+    NEXT = "next"        # 다음 토큰 하나
+    PHRASE = "phrase"    # 여러 토큰으로 이어지는 구문
+
+
+class Precision(str, Enum):
+    FP32 = "fp32"
+    BF16 = "bf16"    # CPU의 AVX512-BF16/AMX에서 빠르고, 가중치 메모리 절반
+    FP16 = "fp16"    # GPU 전용 (CPU에서는 느리거나 내부적으로 fp32로 upcast)
+    INT8 = "int8"    # Linear 가중치 동적 양자화 (CPU 전용)
+
+
 class SubkeyResponse(BaseModel):
     subkey: str
     prob: float
@@ -41,10 +92,80 @@ app = FastAPI(title="TinyLlama Autocomplete API")
 model = None
 tokenizer = None
 vocab = {}
-choseong_to_ids_map = {}
-syllable_trie = None
+vocab_fingerprint = b""  # 어휘집 hash (인덱스/자동완성 테이블이 같은 tokenizer로 만들어졌는지 확인)
+jamo_index = None        # 자모 분해 문자열 -> 토큰 ID (조합 중인 음절 prefix 검색)
+choseong_index = None    # 초성 문자열 -> 토큰 ID (e.g. "ㄱㄴㅇ" -> "강남역")
+token_texts = []         # 토큰 ID -> tokenizer.decode([토큰 ID]) (요청마다 decode 하지 않도록 미리 계산)
+join_texts = None        # 토큰 ID -> 문장 뒤에 이어 붙일 문자열 (None이면 decode 사용, 표 전체가 None이면 비활성화)
+JAMO_INDEX_FILE = "jamo_index.bin"
+CHOSEONG_INDEX_FILE = "choseong_index.bin"
 BPE_SPACE = "\u2581"
 
+# 마이크로 배칭 설정: 동시에 들어온 요청을 BATCH_MAX_WAIT_MS 동안 모아 한 번에 추론
+BATCH_ENABLED = os.environ.get("BATCH_ENABLED", "1") == "1"
+BATCH_MAX_SIZE = int(os.environ.get("BATCH_MAX_SIZE", "8"))
+BATCH_MAX_WAIT_MS = float(os.environ.get("BATCH_MAX_WAIT_MS", "5"))
+batch_scheduler = None
+
+# Context KV 캐시 설정: context 토큰 ID별 past_key_values/log 확률을 byte 단위로 제한하여 보관
+CONTEXT_CACHE_MAX_MB = int(os.environ.get("CONTEXT_CACHE_MAX_MB", "256"))
+
+# 추론 Worker Pool 설정: 동시에 실행할 추론 수 / 대기열 길이 (초과 시 503)
+# tokenizer가 thread-safe 하지 않을 수 있어 기본값은 1 (torch 연산 자체는 intra-op 스레드로 병렬화)
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", "1"))
+INFERENCE_QUEUE_SIZE = int(os.environ.get("INFERENCE_QUEUE_SIZE", "32"))
+# 클라이언트 연결 끊김 확인 주기(초): 끊긴 요청의 아직 시작하지 않은 추론은 취소
+DISCONNECT_POLL_SEC = float(os.environ.get("DISCONNECT_POLL_SEC", "0.05"))
+
+# phrase 모드 beam search 설정: beam 수 / 최대 생성 토큰 수 / 시간 예산 (초과 시 확장 중단)
+PHRASE_BEAM_WIDTH = int(os.environ.get("PHRASE_BEAM_WIDTH", "4"))
+PHRASE_MAX_NEW_TOKENS = int(os.environ.get("PHRASE_MAX_NEW_TOKENS", "4"))
+PHRASE_TIME_BUDGET_MS = float(os.environ.get("PHRASE_TIME_BUDGET_MS", "300"))
+# 요청 한 번에 받을 수 있는 최대 추천 수 (phrase 모드는 beam 수가 n 이상으로 늘어나므로 연산량 제한)
+MAX_NUM_RESULTS = int(os.environ.get("MAX_NUM_RESULTS", "20"))
+
+# 모델 연산 정밀도 (fp32 / bf16 / fp16 / int8)
+# PRECISION_VALIDATE=1이고 fp32가 아니면 기동 시 fp32 모델과 샘플 프롬프트의 Top-K 추천을 비교하고,
+# 겹치는 비율이 PRECISION_MIN_OVERLAP 미만이면 fp32로 fallback
+# (검증 중에는 모델 2개 분량의 메모리/기동 시간을 쓰므로 기본은 끄고, 정밀도를 바꿀 때 scripts/bench_precision.py로 미리 확인)
+MODEL_PRECISION = Precision(os.environ.get("MODEL_PRECISION", "bf16"))
+PRECISION_VALIDATE = os.environ.get("PRECISION_VALIDATE", "0") == "1"
+PRECISION_VALIDATION_PROMPTS = [
+    p for p in os.environ.get(
+        "PRECISION_VALIDATION_PROMPTS", "강남역 ㅁ,강남역 맛,아이폰 ㄱ,제주도 ㅎ,서울 날씨 ㅇ,여름 휴가 ㅊ,맛,ㄴ"
+    ).split(",") if p
+]
+PRECISION_VALIDATION_TOPK = int(os.environ.get("PRECISION_VALIDATION_TOPK", "5"))
+PRECISION_MIN_OVERLAP = float(os.environ.get("PRECISION_MIN_OVERLAP", "0.6"))
+precision_report = {}
+
+# 가중치를 safetensors에서 mmap으로 로드 (uvicorn --workers N / WEB_CONCURRENCY로 띄운 worker들이 가중치 메모리를 공유)
+MODEL_MMAP = os.environ.get("MODEL_MMAP", "1") == "1"
+
+# 모델 로드 후 readiness 전에 실행할 warm-up 쿼리 (쉼표 구분, 빈 값이면 생략)
+WARMUP_QUERIES = [
+    q for q in os.environ.get(
+        "WARMUP_QUERIES", "강남역 ㅁ,강남역 맛,아이폰 ㄱ,제주도 ㅎ,서울 날씨 ㅇ,여름 휴가 ㅊ,맛,ㄴ"
+    ).split(",") if q
+]
+
+# Head 쿼리 자동완성 테이블: 미리 계산한 결과를 모델보다 먼저 조회 / 파일 변경 확인 주기(초, 0이면 자동 reload 안 함)
+COMPLETION_TABLE_PATH = os.environ.get("COMPLETION_TABLE_PATH", "./completion_table.bin")
+COMPLETION_TABLE_RELOAD_SEC = float(os.environ.get("COMPLETION_TABLE_RELOAD_SEC", "30"))
+
+# MinIO 모델 다운로드 설정: 동시 다운로드 수 / Range GET 파트 크기
+MINIO_ENDPOINT = os.environ.get("MINIO_ENDPOINT", "http://minio-service.autocomplete.svc.cluster.local:9000")
+MODEL_BUCKET = os.environ.get("MODEL_BUCKET", "autocomplete")
+MODEL_PREFIX = os.environ.get("MODEL_PREFIX", "tiny_model/")
+MODEL_DOWNLOAD_WORKERS = int(os.environ.get("MODEL_DOWNLOAD_WORKERS", "8"))
+MODEL_DOWNLOAD_PART_MB = int(os.environ.get("MODEL_DOWNLOAD_PART_MB", "16"))
+
+# 기동 시 join_tokens 결과를 tokenizer.decode와 비교할 표본 수 (0이면 생략, 다르면 표를 사용하지 않음)
+TOKEN_TEXT_CHECK_SIZE = int(os.environ.get("TOKEN_TEXT_CHECK_SIZE", "1000"))
+
+# Prometheus 지표(/metrics) 사용 여부 (0이면 구간별 타이머도 기록하지 않음)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
 # --- 3. 한글 초성(Jamo) 분리 헬퍼 ---
 CHOSEONG_LIST = [
     'ㄱ', 'ㄲ', 'ㄴ', 'ㄷ', 'ㄸ', 'ㄹ', 'ㅁ', 'ㅂ', 'ㅃ', 'ㅅ', 'ㅆ',
@@ -63,6 +184,54 @@ def get_choseong(char):
         return None
 
 
+# 중성 / 종성 (유니코드 한글 음절 = 0xAC00 + (초성 * 21 + 중성) * 28 + 종성)
+JUNGSEONG_LIST = [
+    'ㅏ', 'ㅐ', 'ㅑ', 'ㅒ', 'ㅓ', 'ㅔ', 'ㅕ', 'ㅖ', 'ㅗ', 'ㅘ', 'ㅙ',
+    'ㅚ', 'ㅛ', 'ㅜ', 'ㅝ', 'ㅞ', 'ㅟ', 'ㅠ', 'ㅡ', 'ㅢ', 'ㅣ'
+]
+JONGSEONG_LIST = [
+    '', 'ㄱ', 'ㄲ', 'ㄳ', 'ㄴ', 'ㄵ', 'ㄶ', 'ㄷ', 'ㄹ', 'ㄺ', 'ㄻ', 'ㄼ', 'ㄽ', 'ㄾ',
+    'ㄿ', 'ㅀ', 'ㅁ', 'ㅂ', 'ㅄ', 'ㅅ', 'ㅆ', 'ㅇ', 'ㅈ', 'ㅊ', 'ㅋ', 'ㅌ', 'ㅍ', 'ㅎ'
+]
+# 두 번의 키 입력으로 만들어지는 겹모음/겹받침은 입력 순서대로 분해 (e.g. "괜" 입력 중 "고" 상태도 매칭)
+COMPOUND_JAMO = {
+    'ㅘ': 'ㅗㅏ', 'ㅙ': 'ㅗㅐ', 'ㅚ': 'ㅗㅣ', 'ㅝ': 'ㅜㅓ', 'ㅞ': 'ㅜㅔ', 'ㅟ': 'ㅜㅣ', 'ㅢ': 'ㅡㅣ',
+    'ㄳ': 'ㄱㅅ', 'ㄵ': 'ㄴㅈ', 'ㄶ': 'ㄴㅎ', 'ㄺ': 'ㄹㄱ', 'ㄻ': 'ㄹㅁ', 'ㄼ': 'ㄹㅂ', 'ㄽ': 'ㄹㅅ',
+    'ㄾ': 'ㄹㅌ', 'ㄿ': 'ㄹㅍ', 'ㅀ': 'ㄹㅎ', 'ㅄ': 'ㅂㅅ'
+}
+
+
+def decompose_jamo(text: str) -> str:
+    """
+    한글 음절을 키 입력 순서의 자모 문자열로 분해 (한글 외 문자는 그대로)
+    예: "맛집" -> "ㅁㅏㅅㅈㅣㅂ", "맛ㅈ" -> "ㅁㅏㅅㅈ", "과" -> "ㄱㅗㅏ"
+    """
+    jamo = []
+    for char in text:
+        if '가' <= char <= '힣':
+            index = ord(char) - ord('가')
+            jamo.append(CHOSEONG_LIST[index // (21 * 28)])
+            jamo.append(JUNGSEONG_LIST[(index % (21 * 28)) // 28])
+            jamo.append(JONGSEONG_LIST[index % 28])
+        else:
+            jamo.append(char)
+    return "".join(COMPOUND_JAMO.get(j, j) for j in jamo)
+
+
+def get_choseong_string(text: str) -> str:
+    """
+    앞에서부터 초성을 추출할 수 있는 문자까지의 초성 문자열
+    예: "강남역" -> "ㄱㄴㅇ", "맛집a" -> "ㅁㅈ"
+    """
+    choseong_chars = []
+    for char in text:
+        choseong = get_choseong(char)
+        if choseong is None:
+            break
+        choseong_chars.append(choseong)
+    return "".join(choseong_chars)
+
+
 def is_valid_suggestion(text: str) -> bool:
     """
     추천된 단어가 유효한지 검사합니다.
@@ -85,30 +254,364 @@ def is_valid_suggestion(text: str) -> bool:
 
     # 그 외(ㄱ, ㅏ, A, 1, !, ? 등)는 False
     return False
-# def quantize_model(model_instance, device):
-#     """CPU 추론 속도를 높이기 위해 모델을 8-bit로 양자화"""
-#     if device == "cpu":
-#         try:
-#             # torch.quantization.quantize_dynamic을 사용하여
-#             # 모델의 Linear 레이어들을 int8로 변환
-#             model_quantized = torch.quantization.quantize_dynamic(
-#                 model_instance, {torch.nn.Linear}, dtype=torch.qint8
-#             )
-#             print("--- 🧠 (최적화) CPU 모델 동적 양자화(int8) 적용 완료 ---")
-#             return model_quantized
-#         except Exception as e:
-#             print(f"--- ⚠️ (경고) 모델 양자화 실패: {e} ---")
-#             return model_instance
-#     return model_instance
+def quantize_model(model_instance):
+    """CPU 추론 속도를 높이기 위해 모델의 Linear 레이어 가중치를 int8로 동적 양자화"""
+    return torch.quantization.quantize_dynamic(
+        model_instance, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+# --- 3-1. 어휘집 Prefix 인덱스 ---
+EMPTY_IDS = torch.empty(0, dtype=torch.long)
+
+
+class _KeyView:
+    """PrefixIndex의 정렬된 키(UTF-8 bytes)를 bisect 할 수 있도록 시퀀스처럼 감싼 뷰"""
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return bytes(self.blob[self.offsets[i]:self.offsets[i + 1]])
+
+
+class PrefixIndex:
+    """
+    정렬된 토큰 문자열 테이블 + flat 토큰 ID 배열 기반 prefix 인덱스 (pytrie.StringTrie 대체)
+    - 키는 UTF-8 바이트 순으로 정렬되어 있어, 같은 prefix를 가진 키들은 연속 구간을 이룸
+    - 키별 토큰 ID도 같은 순서로 이어 붙였으므로, prefix 검색 결과는 ids 배열의 연속 구간(복사 없음)
+    - 파일로 저장해두면 다음 기동 시 재구축 없이 mmap으로 로드
+    """
+    MAGIC = b"PFXIDX01"
+    HEADER = struct.Struct("<8s24sQQQ")  # magic, fingerprint, 키 개수, ID 개수, 키 blob 크기
+
+    def __init__(self, key_blob, key_offsets, id_offsets, ids, fingerprint: bytes = b""):
+        self.key_blob = key_blob
+        self.key_offsets = key_offsets
+        self.id_offsets = id_offsets
+        self.ids = ids
+        self.fingerprint = fingerprint
+        self.keys = _KeyView(key_blob, key_offsets)
+
+    @classmethod
+    def build(cls, items, fingerprint: bytes = b""):
+        """
+        (키 문자열, 토큰 ID) 쌍으로 인덱스 구축 (같은 키의 ID는 한 그룹으로 묶음)
+        """
+        grouped = {}
+        for key, token_id in items:
+            grouped.setdefault(key.encode("utf-8"), []).append(token_id)
+
+        key_blob = bytearray()
+        key_offsets = array("Q", [0])
+        id_offsets = array("Q", [0])
+        ids = array("q")
+        for key in sorted(grouped):
+            key_blob += key
+            key_offsets.append(len(key_blob))
+            ids.extend(grouped[key])
+            id_offsets.append(len(ids))
+
+        return cls(bytes(key_blob), key_offsets, id_offsets, ids, fingerprint)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix_range(self, prefix: str, include_exact: bool = True) -> Tuple[int, int]:
+        """prefix로 시작하는 키들의 [lo, hi) 구간"""
+        encoded = prefix.encode("utf-8")
+        lo = bisect_left(self.keys, encoded)
+        # UTF-8에는 0xFF 바이트가 없으므로 prefix + 0xFF 는 prefix로 시작하는 모든 키보다 큼
+        hi = bisect_left(self.keys, encoded + b"\xff", lo)
+        if not include_exact and lo < hi and self.keys[lo] == encoded:
+            lo += 1
+        return lo, hi
+
+    def prefix_ids(self, prefix: str, include_exact: bool = True) -> torch.Tensor:
+        """prefix로 시작하는 모든 키의 토큰 ID 텐서 (ids 배열을 복사 없이 참조)"""
+        lo, hi = self.prefix_range(prefix, include_exact)
+        start, end = self.id_offsets[lo], self.id_offsets[hi]
+        if start == end:
+            return EMPTY_IDS
+        return torch.frombuffer(self.ids, dtype=torch.int64, offset=start * 8, count=end - start)
+
+    def items(self, prefix: str = ""):
+        """(키 문자열, [토큰 ID, ...]) 순회 (pytrie.StringTrie.items(prefix=...)와 동일한 결과)"""
+        lo, hi = self.prefix_range(prefix)
+        for i in range(lo, hi):
+            key = self.keys[i].decode("utf-8")
+            yield key, list(self.ids[self.id_offsets[i]:self.id_offsets[i + 1]])
+
+    def save(self, path: str):
+        """임시 파일에 쓴 뒤 rename 하여, 다른 프로세스가 쓰다 만 파일을 읽지 않도록 함"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.fingerprint, len(self), len(self.ids), len(self.key_blob)
+            ))
+            for arr in (self.key_offsets, self.id_offsets, self.ids):
+                f.write(memoryview(arr).cast("B"))
+            f.write(self.key_blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        """
+        저장된 인덱스를 mmap으로 로드 (ACCESS_COPY: 페이지는 page cache를 공유하되 쓰기 가능한 버퍼로 노출)
+        """
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+        magic, fingerprint, n_keys, n_ids, blob_size = cls.HEADER.unpack_from(mm, 0)
+        if magic != cls.MAGIC:
+            raise ValueError(f"{path}: PrefixIndex 파일이 아닙니다.")
+
+        view = memoryview(mm)
+        offset = cls.HEADER.size
+        key_offsets = view[offset:offset + (n_keys + 1) * 8].cast("Q")
+        offset += (n_keys + 1) * 8
+        id_offsets = view[offset:offset + (n_keys + 1) * 8].cast("Q")
+        offset += (n_keys + 1) * 8
+        ids = view[offset:offset + n_ids * 8].cast("q")
+        offset += n_ids * 8
+        key_blob = view[offset:offset + blob_size]
+
+        return cls(key_blob, key_offsets, id_offsets, ids, fingerprint)
+
+
+# --- 3-2. MinIO 모델 다운로드 ---
+class ModelFetcher:
+    """
+    MinIO(S3)의 모델 파일을 save_dir로 병렬 다운로드
+    - list_objects_v2는 paginator로 전체 목록 조회 (1000개 제한 없음)
+    - 파일을 part_size 단위 Range GET으로 나눠 여러 파일/파트를 동시에 다운로드
+    - 다운로드 완료 파일의 ETag/크기를 manifest에 기록해두고, 다음 기동 시 같으면 건너뜀
+    - 받는 중인 파일은 <파일>.part + 완료 파트 목록(<파일>.part.json)으로 남겨, 중단 후 재시작 시 이어받음
+    - ETag(MD5, multipart는 파트 MD5들의 MD5)로 무결성 확인 후 rename
+    """
+    MANIFEST_FILE = ".manifest.json"
+    MIB = 1024 * 1024
+
+    def __init__(self, s3, bucket: str, prefix: str, save_dir: str, max_workers: int = 8, part_size: int = 16 * MIB):
+        self.s3 = s3
+        self.bucket = bucket
+        self.prefix = prefix
+        self.save_dir = save_dir
+        self.max_workers = max_workers
+        self.part_size = part_size
+        self.manifest_path = os.path.join(save_dir, self.MANIFEST_FILE)
+        self.lock = threading.Lock()
+        self.downloaded_bytes = 0
+        self.skipped_files = 0
+
+    def list_objects(self) -> list:
+        paginator = self.s3.get_paginator("list_objects_v2")
+        objects = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix):
+            for obj in page.get("Contents", []):
+                if not obj["Key"].endswith("/"):
+                    objects.append(obj)
+        return objects
+
+    def fetch(self):
+        """
+        목록 조회 -> 변경된 파일만 병렬 다운로드 -> 검증 -> manifest 갱신
+        MinIO에 접근할 수 없더라도 manifest의 파일이 모두 로컬에 있으면 그대로 사용
+        """
+        os.makedirs(self.save_dir, exist_ok=True)
+        manifest = self.load_manifest()
+        start = time.perf_counter()
+
+        try:
+            objects = self.list_objects()
+        except Exception as e:
+            if manifest and all(self.is_current(manifest, entry) for entry in manifest.values()):
+                logger.warning(f"⚠️ MinIO 목록 조회 실패, 로컬 모델({len(manifest)}개 파일)을 사용합니다: {e}")
+                return
+            raise
+        if not objects:
+            raise FileNotFoundError(f"MinIO에 모델 파일이 없습니다: s3://{self.bucket}/{self.prefix}")
+
+        pending = []
+        for obj in objects:
+            entry = {"key": obj["Key"], "etag": obj["ETag"].strip('"'), "size": obj["Size"]}
+            if self.is_current(manifest, entry):
+                self.skipped_files += 1
+            else:
+                pending.append(entry)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="model-fetch") as executor:
+            jobs = [(entry, self.start_file(entry, executor)) for entry in pending]
+            for entry, futures in jobs:
+                part_md5s = [future.result() for future in futures]
+                self.finish_file(entry, part_md5s)
+                manifest[entry["key"]] = entry
+                self.save_manifest(manifest)
+
+        elapsed = time.perf_counter() - start
+        logger.info(
+            f"--- 모델 다운로드: {len(pending)}개 파일 {self.downloaded_bytes / self.MIB:.1f}MB "
+            f"({elapsed:.1f}s), {self.skipped_files}개 파일은 변경 없음 ---"
+        )
+
+    def local_path(self, key: str) -> str:
+        return os.path.join(self.save_dir, os.path.basename(key))
+
+    def is_current(self, manifest: dict, entry: dict) -> bool:
+        recorded = manifest.get(entry["key"])
+        path = self.local_path(entry["key"])
+        return (
+            recorded is not None
+            and recorded["etag"] == entry["etag"]
+            and recorded["size"] == entry["size"]
+            and os.path.exists(path)
+            and os.path.getsize(path) == entry["size"]
+        )
+
+    def file_part_size(self, entry: dict) -> int:
+        """
+        multipart로 업로드된 파일(ETag "<md5>-<파트 수>")은 업로드 파트 크기로 나눠 받아야
+        파트별 MD5로 ETag를 검증할 수 있음 (업로드 도구는 보통 MiB 단위 파트를 사용)
+        """
+        _, _, num_parts = entry["etag"].partition("-")
+        if num_parts:
+            per_part = math.ceil(entry["size"] / int(num_parts))
+            return math.ceil(per_part / self.MIB) * self.MIB
+        return self.part_size
+
+    def start_file(self, entry: dict, executor: ThreadPoolExecutor) -> list:
+        """
+        .part 파일을 준비하고 아직 받지 않은 파트의 다운로드를 executor에 제출
+        (이미 받은 파트는 기록해둔 MD5를 바로 결과로 사용)
+        """
+        path = self.local_path(entry["key"])
+        part_size = self.file_part_size(entry)
+        num_parts = math.ceil(entry["size"] / part_size)
+
+        state = self.load_part_state(path)
+        if state.get("etag") != entry["etag"] or state.get("part_size") != part_size:
+            # 처음 받거나 원본이 바뀐 경우: 처음부터 다시
+            state = {"etag": entry["etag"], "part_size": part_size, "done": {}}
+            with open(f"{path}.part", "wb") as f:
+                f.truncate(entry["size"])
+            self.save_part_state(path, state)
+        elif state["done"]:
+            logger.info(f"Resuming: {entry['key']} ({len(state['done'])}/{num_parts} parts)")
+
+        futures = []
+        for index in range(num_parts):
+            done_md5 = state["done"].get(str(index))
+            if done_md5 is not None:
+                future = Future()
+                future.set_result(done_md5)
+            else:
+                future = executor.submit(self.download_part, entry, path, state, index, part_size)
+            futures.append(future)
+        return futures
+
+    def download_part(self, entry: dict, path: str, state: dict, index: int, part_size: int) -> str:
+        start = index * part_size
+        end = min(start + part_size, entry["size"]) - 1
+        response = self.s3.get_object(
+            Bucket=self.bucket,
+            Key=entry["key"],
+            Range=f"bytes={start}-{end}",
+            IfMatch=entry["etag"],  # 다운로드 도중 원본이 교체되면 실패
+        )
+
+        md5 = hashlib.md5()
+        offset = start
+        fd = os.open(f"{path}.part", os.O_WRONLY)
+        try:
+            for chunk in response["Body"].iter_chunks(chunk_size=self.MIB):
+                os.pwrite(fd, chunk, offset)
+                md5.update(chunk)
+                offset += len(chunk)
+        finally:
+            os.close(fd)
+        if offset != end + 1:
+            raise IOError(f"{entry['key']}: part {index} 크기 불일치 ({offset - start} != {end + 1 - start})")
+
+        with self.lock:
+            state["done"][str(index)] = md5.hexdigest()
+            self.downloaded_bytes += offset - start
+            self.save_part_state(path, state)
+        return md5.hexdigest()
+
+    def finish_file(self, entry: dict, part_md5s: list):
+        """ETag 검증 후 .part -> 최종 파일로 rename"""
+        path = self.local_path(entry["key"])
+        etag = entry["etag"]
+        md5_hex, _, num_parts = etag.partition("-")
+
+        if num_parts:
+            # multipart ETag: 파트별 MD5(binary)를 이어 붙인 값의 MD5
+            actual = hashlib.md5(b"".join(bytes.fromhex(m) for m in part_md5s)).hexdigest()
+            actual = f"{actual}-{len(part_md5s)}"
+        elif len(part_md5s) <= 1:
+            actual = part_md5s[0] if part_md5s else hashlib.md5(b"").hexdigest()
+        else:
+            actual = self.file_md5(f"{path}.part")
+
+        if len(md5_hex) == 32 and actual != etag:
+            # 검증 실패 파일은 이어받지 않고 다음 기동 시 처음부터 다시 받음
+            os.remove(f"{path}.part")
+            os.remove(f"{path}.part.json")
+            raise IOError(f"{entry['key']}: checksum 불일치 (ETag {etag}, 다운로드 {actual})")
+
+        os.replace(f"{path}.part", path)
+        os.remove(f"{path}.part.json")
+
+    @staticmethod
+    def file_md5(path: str) -> str:
+        md5 = hashlib.md5()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(ModelFetcher.MIB), b""):
+                md5.update(chunk)
+        return md5.hexdigest()
+
+    @staticmethod
+    def load_part_state(path: str) -> dict:
+        if not os.path.exists(f"{path}.part") or not os.path.exists(f"{path}.part.json"):
+            return {}
+        try:
+            with open(f"{path}.part.json", "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    @staticmethod
+    def save_part_state(path: str, state: dict):
+        write_json_atomic(f"{path}.part.json", state)
+
+    def load_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_manifest(self, manifest: dict):
+        write_json_atomic(self.manifest_path, manifest)
+
+
+def write_json_atomic(path: str, data: dict):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
 
 
 # --- 4. API 서버 시작 시 모델 로드 ---
-@app.on_event("startup")
 def load_model_and_vocab():
     """
     FastAPI 서버가 시작될 때, 모델과 어휘집을 전역 변수(RAM)에 로드
     """
-    global model, tokenizer, vocab, choseong_to_ids_map, syllable_trie
+    global model, tokenizer
 
     # # 로컬 테스트용
     # save_dir = "./model"
@@ -116,88 +619,1052 @@ def load_model_and_vocab():
 
     s3 = boto3.client(
         's3',
-        endpoint_url="http://minio-service.autocomplete.svc.cluster.local:9000",
-        aws_access_key_id='minioadmin',
-        aws_secret_access_key='minioadmin',
-        region_name='us-east-1'
+        endpoint_url=MINIO_ENDPOINT,
+        aws_access_key_id=os.environ.get("MINIO_ACCESS_KEY", "minioadmin"),
+        aws_secret_access_key=os.environ.get("MINIO_SECRET_KEY", "minioadmin"),
+        region_name='us-east-1',
+        config=botocore.config.Config(max_pool_connections=MODEL_DOWNLOAD_WORKERS)
     )
-    bucket_name = "autocomplete"
-    dir_prefix = "tiny_model/"
     save_dir = "./downloaded_model"
-    os.makedirs(save_dir, exist_ok=True)
 
     print("--- 📥 MinIO에서 모델 다운로드 시작... ---")
+    fetcher = ModelFetcher(
+        s3, MODEL_BUCKET, MODEL_PREFIX, save_dir,
+        max_workers=MODEL_DOWNLOAD_WORKERS,
+        part_size=MODEL_DOWNLOAD_PART_MB * ModelFetcher.MIB
+    )
     try:
-        response = s3.list_objects_v2(Bucket=bucket_name, Prefix=dir_prefix)
-        if 'Contents' in response:
-            for obj in response["Contents"]:
-                file_key = obj["Key"]
-                if file_key.endswith('/'):
-                    continue
-                local_file_path = os.path.join(save_dir, os.path.basename(file_key))
-
-                logger.info(f"Downloading: {file_key}")
-                s3.download_file(bucket_name, file_key, local_file_path)
-        else:
-            logger.warning("⚠️ MinIO 버킷이 비어있습니다.")
+        fetcher.fetch()
     except Exception as e:
-        logger.error(f"MinIO Error: {e}")
+        logger.error(f"❌ MinIO 모델 다운로드 실패: {e}")
+        raise e
     print("--- ✅ 다운로드 완료. 모델 로딩 시작... ---")
 
     try:
         tokenizer = AutoTokenizer.from_pretrained(save_dir, use_fast=False)
-        model = AutoModelForCausalLM.from_pretrained(
-            save_dir,
-            torch_dtype=torch.float16,       # 🌟 [수정 3] 메모리 절약을 위해 FP16 로드 권장
-            device_map="auto"          # GPU/CPU 자동 할당
-        )
+        # GPU or CPU (CPU에서는 fp16 대신 bf16/int8 권장)
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+        model = load_model(save_dir, MODEL_PRECISION, device)
     except Exception as e:
         logger.error(f"❌ 모델 로드 실패: {e}")
         logger.error("모델 경로에 config.json, tokenizer.model(또는 json), model.safetensors가 있는지 확인하세요.")
         raise e
 
-    # GPU or CPU
-    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"--- 모델 로딩 완료 ({device}, {MODEL_PRECISION.value}) ---")
 
-    # # quantize model
-    # model = quantize_model(model_32, device)
+    # 어휘집 및 초성 맵 구축
+    build_vocab_index(save_dir)
+    print("--- 자모 & 초성 Prefix 인덱스 구축 완료. API 서버 준비 완료 ---")
 
-    model.to(device)
-    model.eval()
-    print(f"--- 모델 로딩 완료 ({device}) ---")
+    # fp32가 아니면 fp32 모델과 추천 결과 비교 (whitelist 인덱스가 필요하므로 인덱스 구축 이후)
+    if MODEL_PRECISION != Precision.FP32 and PRECISION_VALIDATE:
+        precision_report.update(validate_precision(save_dir, device))
 
-    # 어휘집 및 초성 맵 구축
-    vocab = tokenizer.get_vocab()
-    print(f"--- 어휘집({len(vocab)}개) 분석 및 초성 맵 구축 중... ---")
 
-    # create vocab with trie
-    syllable_trie = pytrie.StringTrie()
+SAFETENSORS_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+    "U8": torch.uint8, "BOOL": torch.bool,
+}
+
+
+def mmap_safetensors(path: str) -> dict:
+    """
+    safetensors 파일을 mmap 하여 {이름: 텐서}로 반환 (텐서는 복사 없이 파일 페이지를 가리킴)
+    ACCESS_COPY라 쓰기 전까지는 page cache의 같은 물리 페이지를 모든 worker 프로세스가 공유
+    """
+    with open(path, "rb") as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+
+    header_size, = struct.unpack_from("<Q", mm, 0)
+    header = json.loads(mm[8:8 + header_size])
+    data_start = 8 + header_size
+
+    tensors = {}
+    for name, info in header.items():
+        if name == "__metadata__":
+            continue
+        dtype = SAFETENSORS_DTYPES[info["dtype"]]
+        start, end = info["data_offsets"]
+        if start == end:
+            tensors[name] = torch.empty(info["shape"], dtype=dtype)
+            continue
+        item_size = torch.empty(0, dtype=dtype).element_size()
+        tensors[name] = torch.frombuffer(
+            mm, dtype=dtype, offset=data_start + start, count=(end - start) // item_size
+        ).view(info["shape"])
+    return tensors
+
+
+def safetensors_files(save_dir: str) -> List[str]:
+    """save_dir의 safetensors 파일 목록 (단일 파일 또는 sharded index)"""
+    if os.path.exists(os.path.join(save_dir, "model.safetensors")):
+        return [os.path.join(save_dir, "model.safetensors")]
+
+    index_path = os.path.join(save_dir, "model.safetensors.index.json")
+    if os.path.exists(index_path):
+        with open(index_path, "r") as f:
+            weight_map = json.load(f)["weight_map"]
+        return [os.path.join(save_dir, name) for name in sorted(set(weight_map.values()))]
+    return []
 
+
+def load_model_mmap(save_dir: str, dtype: torch.dtype, config=None):
+    """
+    가중치를 safetensors mmap 텐서로 연결하여 모델 생성 (from_pretrained처럼 가중치를 힙에 복사하지 않음)
+    - 같은 파일을 mmap 하는 uvicorn worker들은 가중치 페이지를 공유하므로 worker 수만큼 RSS가 늘지 않음
+    - 파일의 dtype이 실행 dtype과 다르면 변환된 텐서는 worker마다 별도 메모리 (convert_safetensors.py로 미리 변환)
+    safetensors 파일이 없거나 키가 맞지 않으면 None (from_pretrained로 fallback)
+    """
+    files = safetensors_files(save_dir)
+    if not files:
+        return None
+
+    if config is None:
+        config = AutoConfig.from_pretrained(save_dir)
+
+    # 가중치 초기화를 건너뛰고 빈 텐서로 모델 구조만 생성 (빈 텐서는 페이지를 건드리지 않아 RSS 증가 없음)
+    if no_init_weights is None:
+        logger.warning("no_init_weights를 찾지 못해 모델 구조 생성 시 가중치 랜덤 초기화를 건너뛰지 못합니다.")
+    with no_init_weights() if no_init_weights is not None else nullcontext():
+        model_instance = AutoModelForCausalLM.from_config(config, torch_dtype=dtype)
+
+    expected = model_instance.state_dict().keys()
+    prefix = model_instance.base_model_prefix
+    state_dict = {}
+    converted = 0
+    for path in files:
+        for key, tensor in mmap_safetensors(path).items():
+            if key not in expected and f"{prefix}.{key}" in expected:
+                key = f"{prefix}.{key}"
+            if tensor.is_floating_point() and tensor.dtype != dtype:
+                tensor = tensor.to(dtype)
+                converted += 1
+            state_dict[key] = tensor
+
+    result = model_instance.load_state_dict(state_dict, strict=False, assign=True)
+    model_instance.tie_weights()
+
+    tied_output = getattr(config, "tie_word_embeddings", False)
+    missing = [key for key in result.missing_keys if not (tied_output and key.endswith("lm_head.weight"))]
+    if missing:
+        logger.warning(f"⚠️ safetensors에 없는 가중치가 있어 from_pretrained로 로드합니다: {missing[:5]}")
+        return None
+    if converted:
+        logger.warning(f"⚠️ {converted}개 텐서를 {dtype}로 변환하여 worker 간 공유되지 않습니다.")
+    return model_instance
+
+
+def load_model(save_dir: str, precision: Precision, device: str):
+    """
+    precision에 맞춰 모델 로드 (int8은 fp32로 로드한 뒤 동적 양자화)
+    """
+    dtype = {
+        Precision.BF16: torch.bfloat16,
+        Precision.FP16: torch.float16,
+    }.get(precision, torch.float32)
+
+    model_instance = None
+    if MODEL_MMAP and device == "cpu":
+        model_instance = load_model_mmap(save_dir, dtype)
+    if model_instance is None:
+        model_instance = AutoModelForCausalLM.from_pretrained(save_dir, torch_dtype=dtype)
+
+    # int8 양자화 결과는 worker마다 별도 메모리 (mmap 공유는 fp32/bf16/fp16 가중치에만 적용)
+    if precision == Precision.INT8:
+        if device == "cpu":
+            model_instance = quantize_model(model_instance)
+        else:
+            logger.warning("⚠️ int8 동적 양자화는 CPU 전용이라 fp32로 실행합니다.")
+
+    model_instance.to(device)
+    model_instance.eval()
+    return model_instance
+
+
+def next_token_candidates(model_instance, prompt: str, k: int) -> List[int]:
+    """prompt에 대한 Top-K 추천 토큰 ID (Context KV 캐시를 거치지 않고 주어진 모델로 직접 계산)"""
+    context, fragment = split_prompt(prompt)
+    context_ids = encode_context(context)
+    with torch.no_grad():
+        logits = model_instance(
+            input_ids=torch.tensor([context_ids], dtype=torch.long, device=model_instance.device)
+        ).logits[0, -1, :]
+    top_ids, _ = select_candidates(context_ids, torch.log_softmax(logits.float(), dim=-1), fragment, k)
+    return top_ids
+
+
+def validate_precision(save_dir: str, device: str):
+    """
+    현재 model과 fp32 모델의 샘플 프롬프트 Top-K 추천을 비교
+    (overlap: 두 Top-K 집합이 겹치는 비율의 평균, top1: 1순위가 같은 비율)
+    겹치는 비율이 PRECISION_MIN_OVERLAP 미만이면 fp32 모델을 반환하여 교체
+    """
+    global model
+
+    reference = load_model(save_dir, Precision.FP32, device)
+    overlaps = []
+    top1_matches = []
+    for prompt in PRECISION_VALIDATION_PROMPTS:
+        candidate_ids = next_token_candidates(model, prompt, PRECISION_VALIDATION_TOPK)
+        reference_ids = next_token_candidates(reference, prompt, PRECISION_VALIDATION_TOPK)
+        if not reference_ids:
+            continue
+        overlaps.append(len(set(candidate_ids) & set(reference_ids)) / len(reference_ids))
+        top1_matches.append(bool(candidate_ids) and candidate_ids[0] == reference_ids[0])
+
+    overlap = sum(overlaps) / len(overlaps) if overlaps else 1.0
+    report = {
+        "precision": MODEL_PRECISION.value,
+        "prompts": len(overlaps),
+        "topk": PRECISION_VALIDATION_TOPK,
+        "overlap": overlap,
+        "top1": sum(top1_matches) / len(top1_matches) if top1_matches else 1.0,
+        "fallback": overlap < PRECISION_MIN_OVERLAP,
+    }
+    if report["fallback"]:
+        logger.warning(f"⚠️ {MODEL_PRECISION.value} 추천 결과가 fp32와 달라 fp32로 전환합니다: {report}")
+        model = reference
+        report["precision"] = Precision.FP32.value
+    else:
+        logger.info(f"--- {MODEL_PRECISION.value} 정밀도 검증 통과: {report} ---")
+        del reference
+    return report
+
+
+def iter_clean_tokens():
+    """
+    어휘집의 (공백 기호를 제거한 토큰 문자열, 토큰 ID) 순회
+    """
     for token_text, token_id in vocab.items():
         if token_text.startswith("##"): continue
 
         clean_token = token_text.replace(BPE_SPACE, "")
-
         if not clean_token: continue
 
-        first_char = clean_token[0]
-        choseong = get_choseong(first_char)
+        yield clean_token, token_id
+
+
+def load_or_build_index(index_path: str, items, fingerprint: bytes) -> PrefixIndex:
+    """
+    index_path에 같은 어휘집(fingerprint)으로 만든 인덱스 파일이 있으면 mmap으로 로드하고,
+    없으면 구축 후 저장
+    """
+    if index_path and os.path.exists(index_path):
+        try:
+            index = PrefixIndex.load(index_path)
+            if index.fingerprint == fingerprint:
+                return index
+            logger.info(f"어휘집이 변경되어 인덱스를 다시 구축합니다: {index_path}")
+        except (OSError, ValueError, struct.error) as e:
+            logger.warning(f"⚠️ 인덱스 로드 실패: {e}")
+
+    index = PrefixIndex.build(items, fingerprint)
+    if index_path:
+        try:
+            index.save(index_path)
+        except OSError as e:
+            logger.warning(f"⚠️ 인덱스 저장 실패: {e}")
+    return index
+
 
-        if choseong:
-            if choseong not in choseong_to_ids_map:
-                choseong_to_ids_map[choseong] = []
-            choseong_to_ids_map[choseong].append(token_id)
+def build_vocab_index(index_dir: str = None):
+    """
+    tokenizer의 어휘집으로 자모 / 초성 Prefix 인덱스를 구축
+    index_dir이 주어지면 인덱스 파일을 저장해두고 다음 기동 시 재사용
+    """
+    global vocab, vocab_fingerprint, jamo_index, choseong_index
+
+    vocab = tokenizer.get_vocab()
+    print(f"--- 어휘집({len(vocab)}개) 분석 및 자모/초성 인덱스 구축 중... ---")
+
+    fingerprint = hashlib.sha1(
+        json.dumps(sorted(vocab.items()), ensure_ascii=False).encode("utf-8")
+    ).hexdigest()[:24].encode("ascii")
+    vocab_fingerprint = fingerprint
+
+    jamo_items = []
+    choseong_items = []
+    for clean_token, token_id in iter_clean_tokens():
+        jamo_items.append((decompose_jamo(clean_token), token_id))
+
+        choseong_string = get_choseong_string(clean_token)
+        if choseong_string:
+            choseong_items.append((choseong_string, token_id))
+
+    jamo_index = load_or_build_index(
+        os.path.join(index_dir, JAMO_INDEX_FILE) if index_dir else None, jamo_items, fingerprint
+    )
+    choseong_index = load_or_build_index(
+        os.path.join(index_dir, CHOSEONG_INDEX_FILE) if index_dir else None, choseong_items, fingerprint
+    )
+    build_token_texts()
+
+
+BYTE_TOKEN_PATTERN = re.compile(r"<0x[0-9A-Fa-f]{2}>")
 
-        if clean_token in syllable_trie:
-            syllable_trie[clean_token].append(token_id)
+
+def build_token_texts():
+    """
+    token_texts / join_texts를 만들고 tokenizer.decode와 비교 검증
+    표를 만들 수 없거나 검증에 실패하면 decode 결과만 사용 (join_texts = None)
+    """
+    global token_texts, join_texts
+
+    try:
+        token_texts, join_texts = convert_token_texts()
+    except Exception as e:  # e.g. decoder가 없는 tokenizer
+        logger.warning(f"⚠️ 토큰 문자열 표를 만들 수 없어 tokenizer.decode를 사용합니다: {e}")
+        disable_join_texts()
+        return
+    verify_token_texts()
+
+
+def disable_join_texts():
+    global token_texts, join_texts
+
+    token_texts = tokenizer.batch_decode([[token_id] for token_id in range(len(tokenizer))], skip_special_tokens=True)
+    join_texts = None
+
+
+def convert_token_texts():
+    """
+    서비스가 로드한 tokenizer로 토큰별 문자열 표를 계산
+    - token_texts: 토큰 하나만 decode한 문자열
+    - join_texts: 일반 토큰 뒤에 이어 붙였을 때 늘어나는 문자열 (기준 토큰 "가" 뒤에 붙여 변환한 차이)
+      added 토큰(slow tokenizer는 앞뒤 문자열과 공백으로 구분)과 byte 토큰(앞뒤 byte와 합쳐져 한 글자)은
+      앞뒤 토큰에 따라 결과가 달라지므로 None으로 두고 join_tokens에서 decode 사용
+    slow tokenizer의 decode는 호출마다 느리므로 일반 토큰은 convert_tokens_to_string으로 변환
+    """
+    tokens = tokenizer.convert_ids_to_tokens(list(range(len(tokenizer))))
+    special_ids = set(tokenizer.all_special_ids)
+    boundary_ids = {token_id for token_id in tokenizer.added_tokens_decoder if token_id not in special_ids}
+    boundary_ids.update(token_id for token_id, token in enumerate(tokens) if BYTE_TOKEN_PATTERN.fullmatch(token))
+
+    anchor = tokenizer.convert_ids_to_tokens(tokenizer("가", add_special_tokens=False).input_ids)
+    anchor_text = tokenizer.convert_tokens_to_string(list(anchor))
+
+    texts = []
+    joins = []
+    for token_id, token in enumerate(tokens):
+        if token_id in special_ids:
+            texts.append("")
+            joins.append("")
+        elif token_id in boundary_ids:
+            texts.append(tokenizer.decode([token_id], skip_special_tokens=True))
+            joins.append(None)
         else:
-            syllable_trie[clean_token] = [token_id]
+            texts.append(tokenizer.convert_tokens_to_string([token]))
+            joined = tokenizer.convert_tokens_to_string(anchor + [token])
+            # byte-level BPE에서 글자의 일부만 가진 토큰은 단독으로 변환하면 "\ufffd"가 됨
+            if joined.startswith(anchor_text) and "\ufffd" not in joined:
+                joins.append(joined[len(anchor_text):])
+            else:
+                joins.append(None)
+    return texts, joins
+
+
+def verify_token_texts():
+    """
+    표본 (context, 토큰 1~3개)에 대해 token_texts / join_tokens 결과를 tokenizer.decode와 비교하고,
+    하나라도 다르면 join_texts를 비활성화 (모든 요청이 decode 사용)
+    context는 warm-up 쿼리로 만든 실제 형태 (빈 context 또는 공백으로 끝나는 문자열)
+    """
+    if TOKEN_TEXT_CHECK_SIZE <= 0:
+        return
+    queries = WARMUP_QUERIES or ["강남역 맛"]
+    contexts = sorted({encode_context(split_prompt(q)[0]) for q in queries} | {encode_context(q + " ") for q in queries})
+    candidates = [token_id for token_id, text in enumerate(join_texts) if text is not None]
+    rng = random.Random(0)
+
+    mismatches = 0
+    example = None
+    for _ in range(TOKEN_TEXT_CHECK_SIZE):
+        context_ids = rng.choice(contexts)
+        token_ids = rng.sample(candidates, rng.choice((1, 2, 3)))
+        checks = [
+            (tokenizer.decode(list(context_ids) + token_ids, skip_special_tokens=True), join_tokens(context_ids, token_ids)),
+            (tokenizer.decode(token_ids[:1], skip_special_tokens=True), token_texts[token_ids[0]]),
+        ]
+        for expected, actual in checks:
+            if expected != actual:
+                mismatches += 1
+                example = example or (expected, actual)
+
+    if mismatches:
+        logger.warning(
+            f"⚠️ 토큰 문자열 표가 tokenizer.decode와 {mismatches}건 달라 사용하지 않습니다 "
+            f"(e.g. {example[0]!r} != {example[1]!r})"
+        )
+        disable_join_texts()
+    else:
+        logger.info(f"--- 토큰 문자열 표 검증 통과 ({TOKEN_TEXT_CHECK_SIZE}개 표본) ---")
+
+
+# --- 4-1. Context KV 캐시 ---
+class CacheEntry:
+    __slots__ = ("past_key_values", "log_probs", "nbytes")
+
+    def __init__(self, past_key_values, log_probs: torch.Tensor):
+        self.past_key_values = past_key_values
+        self.log_probs = log_probs
+        self.nbytes = log_probs.numel() * log_probs.element_size()
+        for key, value in past_key_values:
+            self.nbytes += key.numel() * key.element_size() + value.numel() * value.element_size()
+
+
+class ContextCache:
+    """
+    context 토큰 ID(tuple) -> (past_key_values, 다음 토큰 log 확률) LRU 캐시
+    - 전체 크기를 byte 단위(max_bytes)로 제한하고, 초과 시 오래된 항목부터 제거
+    - 저장된 context의 모든 prefix를 인덱싱하여, 새 context와 가장 길게 겹치는
+      context의 KV를 잘라 재사용 (새로 늘어난 토큰만 계산)
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.entries = OrderedDict()
+        # prefix(tuple) -> 해당 prefix를 가진 (가장 최근) context key
+        self.prefix_owner = {}
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.prefix_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: tuple):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+            return entry
+
+    def peek(self, key: tuple):
+        """LRU 순서와 hit/miss 카운터를 건드리지 않고 조회"""
+        with self.lock:
+            return self.entries.get(key)
+
+    def lookup_prefix(self, key: tuple):
+        """
+        key와 가장 길게 겹치는 저장된 context의 KV를 (겹치는 길이, past_key_values)로 반환
+        겹치는 부분이 없으면 (0, None)
+        """
+        with self.lock:
+            for length in range(len(key) - 1, 0, -1):
+                owner = self.prefix_owner.get(key[:length])
+                if owner is None:
+                    continue
+                self.entries.move_to_end(owner)
+                self.prefix_hits += 1
+                past = tuple(
+                    (k[:, :, :length, :], v[:, :, :length, :])
+                    for k, v in self.entries[owner].past_key_values
+                )
+                return length, past
+            self.misses += 1
+            return 0, None
+
+    def put(self, key: tuple, past_key_values, log_probs: torch.Tensor):
+        entry = CacheEntry(past_key_values, log_probs)
+        if entry.nbytes > self.max_bytes:
+            return
+
+        with self.lock:
+            if key in self.entries:
+                self._remove(key)
+            self.entries[key] = entry
+            self.current_bytes += entry.nbytes
+            for length in range(1, len(key) + 1):
+                self.prefix_owner[key[:length]] = key
+
+            while self.current_bytes > self.max_bytes:
+                oldest = next(iter(self.entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def _remove(self, key: tuple):
+        entry = self.entries.pop(key)
+        self.current_bytes -= entry.nbytes
+        for length in range(1, len(key) + 1):
+            if self.prefix_owner.get(key[:length]) == key:
+                del self.prefix_owner[key[:length]]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "bytes": self.current_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "prefix_hits": self.prefix_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+context_cache = ContextCache(CONTEXT_CACHE_MAX_MB * 1024 * 1024)
+
+
+def to_legacy_cache(past_key_values):
+    """모델이 반환한 Cache 객체를 ((key, value), ...) 튜플 형태로 변환"""
+    if hasattr(past_key_values, "to_legacy_cache"):
+        return past_key_values.to_legacy_cache()
+    return past_key_values
+
+
+def to_model_cache(legacy_past):
+    """((key, value), ...) 튜플을 모델 입력용 Cache 객체로 변환 (구버전 transformers는 튜플 그대로)"""
+    if DynamicCache is not None:
+        return DynamicCache.from_legacy_cache(legacy_past)
+    return legacy_past
+
+
+# --- 4-2. 추론 Worker Pool ---
+class InferencePool:
+    """
+    blocking 추론을 event loop 밖의 bounded thread pool에서 실행
+    (torch / llama.cpp 연산은 GIL을 풀기 때문에 thread로 충분)
+    - max_workers: 동시에 실행되는 추론 수
+    - max_queue: 실행을 기다릴 수 있는 요청 수. 가득 차면 대기시키지 않고 바로 503 반환 (load shedding)
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        # 실행 중 + 대기 중인 요청 수 (event loop 스레드에서만 변경)
+        self.pending = 0
+        self.rejected = 0
+
+    def check(self):
+        """대기열이 가득 찼으면 503 (자리는 잡지 않음)"""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="추론 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.",
+                headers={"Retry-After": "1"}
+            )
+
+    @contextmanager
+    def admit(self):
+        self.check()
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE)
+
+
+# --- 4-3. Head 쿼리 자동완성 테이블 ---
+class CompletionTable:
+    """
+    자주 들어오는 검색어(head 쿼리)의 추천 결과를 미리 계산해둔 테이블 (scripts/build_completion_table.py로 생성)
+    - 키(검색어)는 UTF-8 바이트 순으로 정렬되어 있어 bisect로 조회
+    - 값은 return_type별 [(추천 문자열, 확률), ...] JSON (최대 max_n개)
+    - mmap으로 로드하므로 테이블 크기만큼 힙 메모리를 쓰지 않음
+    """
+    MAGIC = b"CMPTBL01"
+    HEADER = struct.Struct("<8s24sQQQQ")  # magic, 어휘집 fingerprint, 키 개수, max_n, 키 blob 크기, 값 blob 크기
+
+    def __init__(self, key_blob, key_offsets, value_blob, value_offsets, max_n: int, fingerprint: bytes = b""):
+        self.key_blob = key_blob
+        self.key_offsets = key_offsets
+        self.value_blob = value_blob
+        self.value_offsets = value_offsets
+        self.max_n = max_n
+        self.fingerprint = fingerprint
+        self.keys = _KeyView(key_blob, key_offsets)
+
+    @classmethod
+    def build(cls, entries: dict, max_n: int, fingerprint: bytes = b""):
+        """
+        entries: {검색어: {"full": [(문자열, 확률), ...], "token": [...]}}
+        """
+        encoded = sorted((q.encode("utf-8"), value) for q, value in entries.items())
+
+        key_blob = bytearray()
+        key_offsets = array("Q", [0])
+        value_blob = bytearray()
+        value_offsets = array("Q", [0])
+        for key, value in encoded:
+            key_blob += key
+            key_offsets.append(len(key_blob))
+            value_blob += json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            value_offsets.append(len(value_blob))
+
+        return cls(bytes(key_blob), key_offsets, bytes(value_blob), value_offsets, max_n, fingerprint)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, q: str, num_results: int, return_type: str):
+        """
+        테이블에 있으면 [(추천 문자열, 확률), ...], 없으면(또는 n이 max_n보다 크면) None
+        """
+        if num_results > self.max_n:
+            return None
+        encoded = q.encode("utf-8")
+        i = bisect_left(self.keys, encoded)
+        if i == len(self.keys) or self.keys[i] != encoded:
+            return None
+
+        value = json.loads(bytes(self.value_blob[self.value_offsets[i]:self.value_offsets[i + 1]]))
+        suggestions = value.get(return_type)
+        if suggestions is None:
+            return None
+        return [(text, prob) for text, prob in suggestions[:num_results]]
+
+    def save(self, path: str):
+        """임시 파일에 쓴 뒤 rename 하여, 서버가 쓰다 만 파일을 로드하지 않도록 함"""
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self.HEADER.pack(
+                self.MAGIC, self.fingerprint, len(self), self.max_n, len(self.key_blob), len(self.value_blob)
+            ))
+            for arr in (self.key_offsets, self.value_offsets):
+                f.write(memoryview(arr).cast("B"))
+            f.write(self.key_blob)
+            f.write(self.value_blob)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, fingerprint, n_keys, max_n, key_blob_size, value_blob_size = cls.HEADER.unpack_from(mm, 0)
+        if magic != cls.MAGIC:
+            raise ValueError(f"{path}: CompletionTable 파일이 아닙니다.")
+
+        view = memoryview(mm)
+        offset = cls.HEADER.size
+        key_offsets = view[offset:offset + (n_keys + 1) * 8].cast("Q")
+        offset += (n_keys + 1) * 8
+        value_offsets = view[offset:offset + (n_keys + 1) * 8].cast("Q")
+        offset += (n_keys + 1) * 8
+        key_blob = view[offset:offset + key_blob_size]
+        offset += key_blob_size
+        value_blob = view[offset:offset + value_blob_size]
+
+        return cls(key_blob, key_offsets, value_blob, value_offsets, max_n, fingerprint)
+
+
+class CompletionTableStore:
+    """
+    현재 사용 중인 CompletionTable과 테이블 적중률 카운터
+    - reload(): 새 파일을 완전히 로드한 뒤 참조만 교체하므로, 조회 중인 요청은 이전 테이블을 그대로 사용
+    - 파일 mtime/inode가 바뀌면 watch()가 자동으로 reload (Pod 재시작 불필요)
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.table = None
+        self.file_id = None
+        self.loaded_at = None
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.hits = 0
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st.st_ino, st.st_mtime_ns, st.st_size
+
+    def reload(self) -> bool:
+        """테이블 파일을 다시 로드 (파일이 없거나 어휘집이 다른 테이블이면 기존 테이블 유지)"""
+        with self.lock:
+            try:
+                file_id = self._stat()
+                table = CompletionTable.load(self.path)
+            except FileNotFoundError:
+                return False
+            except (OSError, ValueError, struct.error) as e:
+                logger.warning(f"⚠️ 자동완성 테이블 로드 실패: {e}")
+                return False
+
+            if table.fingerprint != vocab_fingerprint:
+                logger.warning(f"⚠️ 현재 어휘집과 다른 tokenizer로 만든 테이블이라 사용하지 않습니다: {self.path}")
+                self.file_id = file_id
+                return False
+
+            self.table = table
+            self.file_id = file_id
+            self.loaded_at = time.time()
+            logger.info(f"--- 자동완성 테이블 로드 완료: {len(table)}개 검색어 (max_n={table.max_n}) ---")
+            return True
+
+    def changed(self) -> bool:
+        try:
+            return self._stat() != self.file_id
+        except OSError:
+            return False
+
+    async def watch(self, interval_sec: float):
+        while True:
+            await asyncio.sleep(interval_sec)
+            if self.changed():
+                await asyncio.to_thread(self.reload)
+
+    def lookup(self, q: str, num_results: int, return_type: str):
+        self.requests += 1
+        table = self.table
+        if table is None:
+            return None
+        results = table.lookup(q, num_results, return_type)
+        if results is not None:
+            self.hits += 1
+        return results
+
+    def stats(self) -> dict:
+        table = self.table
+        return {
+            "path": self.path,
+            "keys": len(table) if table is not None else 0,
+            "max_n": table.max_n if table is not None else 0,
+            "loaded_at": self.loaded_at,
+            "requests": self.requests,
+            "hits": self.hits,
+            "served_fraction": self.hits / self.requests if self.requests else 0.0,
+        }
+
+
+completion_table = CompletionTableStore(COMPLETION_TABLE_PATH)
+completion_table_watcher = None
+
+
+# --- 4-4. Prometheus 지표 ---
+STAGE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+NO_TIMER = nullcontext()
+
+
+class Metrics:
+    """
+    /metrics로 노출하는 Prometheus 지표
+    - 요청 경로의 구간별 소요 시간 / batch 크기: Histogram에 직접 기록
+    - 대기열 길이, 캐시 hit, 모델 로드 시간 등: scrape 시점에 기존 stats()에서 읽음 (요청 경로 비용 없음)
+    비활성화 상태(METRICS_ENABLED=0 또는 prometheus_client 미설치)에서는 stage()가 빈 context manager를 반환
+    """
+
+    STAGES = ("tokenize", "forward", "softmax", "whitelist", "topk", "decode")
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled and Histogram is not None
+        if not self.enabled:
+            return
+        self.registry = CollectorRegistry()
+        stage_seconds = Histogram(
+            "autocomplete_stage_seconds", "자동완성 구간별 소요 시간", ["stage"],
+            buckets=STAGE_BUCKETS, registry=self.registry
+        )
+        # 요청마다 label을 조회하지 않도록 stage별 child를 미리 만들어 둠
+        self.stage_timers = {stage: stage_seconds.labels(stage) for stage in self.STAGES}
+        self.batch_size = Histogram(
+            "autocomplete_batch_size", "batched forward pass 한 번에 처리한 요청 수",
+            buckets=(1, 2, 4, 8, 16, 32, 64), registry=self.registry
+        )
+        self.registry.register(self)
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return NO_TIMER
+        return self.stage_timers[name].time()
+
+    def observe_batch(self, size: int):
+        if self.enabled:
+            self.batch_size.observe(size)
+
+    def collect(self):
+        pool = inference_pool.stats()
+        yield GaugeMetricFamily("autocomplete_inference_pending", "실행 중 + 대기 중인 추론 요청 수", value=pool["pending"])
+        yield CounterMetricFamily("autocomplete_inference_rejected", "대기열이 가득 차 503으로 거절한 요청 수", value=pool["rejected"])
+        yield CounterMetricFamily("autocomplete_cancelled_requests", "클라이언트 연결이 끊겨 취소한 요청 수", value=cancelled_requests)
+
+        cache = context_cache.stats()
+        lookups = CounterMetricFamily("autocomplete_context_cache_lookups", "Context KV 캐시 조회 결과", labels=["result"])
+        lookups.add_metric(["hit"], cache["hits"])
+        lookups.add_metric(["prefix_hit"], cache["prefix_hits"])
+        lookups.add_metric(["miss"], cache["misses"])
+        yield lookups
+        yield CounterMetricFamily("autocomplete_context_cache_evictions", "Context KV 캐시 eviction 수", value=cache["evictions"])
+        yield GaugeMetricFamily("autocomplete_context_cache_bytes", "Context KV 캐시 사용량", value=cache["bytes"])
+
+        table = completion_table.stats()
+        yield CounterMetricFamily("autocomplete_completion_table_requests", "자동완성 테이블 조회 수", value=table["requests"])
+        yield CounterMetricFamily("autocomplete_completion_table_hits", "자동완성 테이블에서 응답한 요청 수", value=table["hits"])
+
+        state = model_state.stats()
+        yield GaugeMetricFamily("autocomplete_model_ready", "모델 준비 완료 여부", value=1 if model_state.ready else 0)
+        if state["load_s"] is not None:
+            yield GaugeMetricFamily("autocomplete_model_load_seconds", "모델 다운로드 / 로드 / warm-up 소요 시간", value=state["load_s"])
 
-    print(f"--- 초성 맵 & Trie 구축 완료. API 서버 준비 완료 ---")
+    def render(self) -> bytes:
+        return generate_latest(self.registry)
+
+
+metrics = Metrics(METRICS_ENABLED)
 
 
 # --- 5. 자동완성 핵심 로직 ---
-@lru_cache(maxsize=2048)
+def split_prompt(full_prompt: str) -> Tuple[str, str]:
+    """
+    입력 쿼리를 마지막 공백 기준으로 Context / Fragment로 분리
+    """
+    last_space_index = full_prompt.rfind(" ")
+    if last_space_index == -1:
+        return "", full_prompt
+    return full_prompt[:last_space_index + 1], full_prompt[last_space_index + 1:]
+
+
+@lru_cache(maxsize=4096)
+def encode_context(context: str) -> Tuple[int, ...]:
+    """
+    Context 문자열을 모델 입력 토큰 ID로 변환 (Context KV 캐시의 key로 사용)
+    """
+    if not context:
+        # TinyLlama는 bos_token_id를 명시적으로 넣어주는 게 좋습니다.
+        bos_id = tokenizer.bos_token_id if tokenizer.bos_token_id else tokenizer.eos_token_id
+        return (bos_id,)
+    return tuple(tokenizer(context).input_ids)
+
+
+@lru_cache(maxsize=4096)
+def decode_context(context_ids: Tuple[int, ...]) -> str:
+    """
+    context 토큰을 문자열로 한 번만 decode (후보 토큰 문자열은 token_texts에서 이어 붙임)
+    """
+    return tokenizer.decode(list(context_ids), skip_special_tokens=True)
+
+
+def join_tokens(context_ids: Tuple[int, ...], token_ids: List[int]) -> str:
+    """
+    tokenizer.decode(context_ids + token_ids)와 같은 문자열
+    context는 한 번만 decode(decode_context) 하고 후보 토큰은 join_texts를 이어 붙임
+    표가 비활성화되었거나 앞뒤에 따라 결과가 달라지는 토큰(added / byte fallback)이 있으면 decode
+    """
+    texts = join_texts
+    if (
+            texts is None
+            or (context_ids and texts[context_ids[-1]] is None)
+            or any(texts[token_id] is None for token_id in token_ids)
+    ):
+        return tokenizer.decode(list(context_ids) + list(token_ids), skip_special_tokens=True)
+
+    context_text = decode_context(context_ids)
+    if context_text:
+        return context_text + "".join(texts[token_id] for token_id in token_ids)
+    # 문장 맨 앞 토큰은 앞 공백 처리가 tokenizer마다 다르므로 단독 decode 결과 사용 (앞의 special 토큰은 decode에서 빠짐)
+    first = 0
+    while first < len(token_ids) - 1 and not texts[token_ids[first]]:
+        first += 1
+    return token_texts[token_ids[first]] + "".join(texts[token_id] for token_id in token_ids[first + 1:])
+
+
+def run_model_batch(batch_ids: List[List[int]]) -> Tuple[torch.Tensor, list]:
+    """
+    여러 context를 오른쪽 padding 하여 한 번의 forward pass로 처리하고,
+    각 row의 마지막 실제 토큰 위치의 logits([batch, vocab])와 row별 past_key_values를 반환
+    (causal attention이므로 오른쪽 padding은 앞쪽 토큰의 결과에 영향을 주지 않음)
+    """
+    device = model.device # 모델이 로드된 device (cuda or cpu)
+    pad_id = tokenizer.pad_token_id if tokenizer.pad_token_id is not None else tokenizer.eos_token_id
+
+    lengths = [len(ids) for ids in batch_ids]
+    input_ids = torch.full((len(batch_ids), max(lengths)), pad_id, dtype=torch.long)
+    attention_mask = torch.zeros_like(input_ids)
+    for row, ids in enumerate(batch_ids):
+        input_ids[row, :len(ids)] = torch.tensor(ids, dtype=torch.long)
+        attention_mask[row, :len(ids)] = 1
+
+    with metrics.stage("forward"), torch.no_grad():
+        outputs = model(
+            input_ids=input_ids.to(device),
+            attention_mask=attention_mask.to(device),
+            use_cache=True
+        )
+
+    last_positions = torch.tensor(lengths, device=outputs.logits.device) - 1
+    rows = torch.arange(len(batch_ids), device=outputs.logits.device)
+    last_token_logits = outputs.logits[rows, last_positions, :]
+
+    # padding 위치를 잘라낸 row별 KV (캐시에 저장되므로 batch 텐서와 메모리를 공유하지 않도록 clone)
+    legacy_past = to_legacy_cache(outputs.past_key_values)
+    rows_past = [
+        tuple(
+            (key[row:row + 1, :, :length, :].clone(), value[row:row + 1, :, :length, :].clone())
+            for key, value in legacy_past
+        )
+        for row, length in enumerate(lengths)
+    ]
+    return last_token_logits, rows_past
+
+
+def extend_context(new_ids: List[int], past_key_values) -> Tuple[torch.Tensor, tuple]:
+    """
+    캐시된 past_key_values 뒤에 새로 늘어난 토큰만 forward pass
+    """
+    with metrics.stage("forward"), torch.no_grad():
+        outputs = model(
+            input_ids=torch.tensor([new_ids], dtype=torch.long, device=model.device),
+            past_key_values=to_model_cache(past_key_values),
+            use_cache=True
+        )
+    return outputs.logits[0, -1, :].clone(), to_legacy_cache(outputs.past_key_values)
+
+
+def score_contexts(batch_ids: List[List[int]]) -> List[torch.Tensor]:
+    """
+    [1단계] context별 다음 토큰 log 확률([vocab]) 계산 (Context KV 캐시 사용)
+    fragment / n / return_type과 무관하므로 같은 context의 모든 요청이 결과를 공유
+    - 완전히 같은 context: 캐시된 log 확률 반환 (forward pass 생략)
+    - 앞부분이 겹치는 context: 캐시된 KV에 이어서 늘어난 토큰만 계산
+    - 나머지: 한 번의 batched forward pass
+    """
+    results = [None] * len(batch_ids)
+    pending_rows = []
+
+    for row, ids in enumerate(batch_ids):
+        key = tuple(ids)
+        entry = context_cache.get(key)
+        if entry is not None:
+            results[row] = entry.log_probs
+            continue
+
+        prefix_length, past_key_values = context_cache.lookup_prefix(key)
+        if past_key_values is None:
+            pending_rows.append(row)
+            continue
+
+        logits, new_past = extend_context(ids[prefix_length:], past_key_values)
+        with metrics.stage("softmax"):
+            log_probs = torch.log_softmax(logits.float(), dim=-1)
+        context_cache.put(key, new_past, log_probs)
+        results[row] = log_probs
+
+    if pending_rows:
+        logits, rows_past = run_model_batch([batch_ids[row] for row in pending_rows])
+        for i, row in enumerate(pending_rows):
+            with metrics.stage("softmax"):
+                log_probs = torch.log_softmax(logits[i].float(), dim=-1)
+            context_cache.put(tuple(batch_ids[row]), rows_past[i], log_probs)
+            results[row] = log_probs
+
+    return results
+
+
+def get_whitelist_ids(fragment: str) -> torch.Tensor:
+    """
+    fragment 뒤에 이어질 수 있는 모든 토큰 ID 텐서
+    - 초성으로만 이루어진 경우(e.g. "ㅁ", "ㄱㄴㅇ"): 토큰 앞 음절들의 초성 문자열로 prefix 검색
+    - 그 외(e.g. "맛", "마", "맛ㅈ"): 자모 단위로 분해하여 prefix 검색 (조합 중인 음절도 매칭)
+      'fragment'와 정확히 일치하는 토큰은 제외 (v5 로직)
+    """
+    if fragment and all(char in CHOSEONG_SET for char in fragment):
+        return choseong_index.prefix_ids(fragment)
+    return jamo_index.prefix_ids(decompose_jamo(fragment), include_exact=False)
+
+
+def select_candidates(
+        context_ids: Tuple[int, ...],
+        log_probs: torch.Tensor,
+        fragment: str,
+        k: int
+) -> Tuple[List[int], List[float]]:
+    """
+    fragment에 맞는 whitelist 토큰 중 log 확률 상위 k개를 (토큰 ID, log 확률) 리스트로 반환
+    whitelist는 미리 만든 텐서를 사용하고, 전체 vocab 대신 whitelist 위치만 gather 하여 Top-K 추출
+    """
+    # (3) 초성(e.g. "강남역 ㅁ") / 음절(e.g. "강남역 맛", "강남역 맛ㅈ") whitelist
+    with metrics.stage("whitelist"):
+        whitelist_ids = get_whitelist_ids(fragment)
+    if whitelist_ids.numel() == 0:
+        return [], []
+
+    with metrics.stage("topk"):
+        # (4) 필터링: 컨텍스트에 이미 등장한 토큰(블랙리스트)은 -Inf 처리
+        candidate_log_probs = log_probs[whitelist_ids]
+        blacklisted = torch.isin(whitelist_ids, torch.tensor(context_ids, dtype=torch.long))
+        candidate_log_probs.masked_fill_(blacklisted.to(candidate_log_probs.device), -float("Inf"))
+
+        # (5) Top-K 추출
+        top_k = torch.topk(candidate_log_probs, min(k, whitelist_ids.numel()))
+        return whitelist_ids[top_k.indices.cpu()].tolist(), top_k.values.tolist()
+
+
+def build_recommendations(
+        context_ids: Tuple[int, ...],
+        log_probs: torch.Tensor,
+        fragment: str,
+        num_results: int,
+        return_type: str
+) -> List[Tuple[str, float]]:
+    """
+    [2단계] context의 다음 토큰 log 확률과 fragment로 추천 결과를 조합
+    모델 호출 없이 fragment / n / return_type에 따른 필터링만 수행
+    """
+    # (3) ~ (5) whitelist 필터링 및 Top-K 추출
+    # 중간에 필터링으로 버려질 것을 대비해 num_results * 3 만큼 뽑습니다.
+    top_ids, top_log_probs = select_candidates(context_ids, log_probs, fragment, num_results * 3)
+    if not top_ids:
+        return []
+
+    # (6) 결과 조합 및 필터링
+    with metrics.stage("decode"):
+        recommendations = []
+
+        # 중복 추천 방지용 Set
+        seen_texts = set()
+
+        for new_token_id_item, log_prob in zip(top_ids, top_log_probs):
+            # 목표 개수 채웠으면 중단
+            if len(recommendations) >= num_results:
+                break
+
+            # 유효성 검사 (-Inf 체크)
+            if log_prob == -float("Inf"):
+                continue
+
+            # 토큰 문자열 (미리 계산한 표에서 조회)
+            clean_token = token_texts[new_token_id_item].strip() # 앞뒤 공백 제거
+
+            # 🌟 [핵심] 1글자 쓰레기값 필터링
+            if not is_valid_suggestion(clean_token):
+                continue
+
+            probability = math.exp(log_prob)
+
+            if return_type == "token":
+                final_text = clean_token
+            else:
+                # 전체 문장 반환
+                final_text = join_tokens(context_ids, [new_token_id_item])
+
+            # 중복 제거 (혹시 모를 상황 대비)
+            if final_text in seen_texts:
+                continue
+
+            seen_texts.add(final_text)
+            recommendations.append((final_text, probability))
+
+    return recommendations
+
+
 def get_recommendations(
         full_prompt: str,
         num_results: int = 10,
@@ -206,124 +1673,475 @@ def get_recommendations(
     """
     input query를 받아서 다음에 나올 토큰을 제안
     """
-    global model, tokenizer, vocab, choseong_to_ids_map, syllable_trie
-
     # (1) Context / Fragment 분리
-    last_space_index = full_prompt.rfind(" ")
-    if last_space_index == -1:
-        context = ""
-        fragment = full_prompt
-    else:
-        context = full_prompt[:last_space_index + 1]
-        fragment = full_prompt[last_space_index + 1:]
+    context, fragment = split_prompt(full_prompt)
+
+    # 이어질 수 있는 토큰이 없으면 모델 추론 없이 종료
+    if get_whitelist_ids(fragment).numel() == 0:
+        return []
 
     # (2-1) 모델 추론
-    device = model.device # 모델이 로드된 device (cuda or cpu)
+    with metrics.stage("tokenize"):
+        context_ids = encode_context(context)
+    log_probs = score_contexts([context_ids])[0]
 
-    if not context:
-        # TinyLlama는 bos_token_id를 명시적으로 넣어주는 게 좋습니다.
-        bos_id = tokenizer.bos_token_id if tokenizer.bos_token_id else tokenizer.eos_token_id
-        input_ids_tensor = torch.tensor([[bos_id]], device=device)
-    else:
-        inputs = tokenizer(context, return_tensors="pt").to(device)
-        input_ids_tensor = inputs.input_ids
+    return build_recommendations(context_ids, log_probs, fragment, num_results, return_type)
 
-    with torch.no_grad():
-        outputs = model(input_ids=input_ids_tensor)
 
-    last_token_logits = outputs.logits[0, -1, :]
-    all_probabilities = torch.softmax(last_token_logits, dim=-1) # 확률로 변환
+# --- 5-1. 마이크로 배칭 스케줄러 ---
+class BatchScheduler:
+    """
+    동시에 들어온 요청들의 context를 최대 max_wait_ms 동안 모아서
+    한 번의 batched forward pass로 처리한 뒤, row별 log 확률을 각 요청에 돌려줌
+    """
 
-    # (2-2) 컨텍스트 중복 토큰 블랙리스트
-    blacklist_ids = set(input_ids_tensor[0].tolist())
+    def __init__(self, max_batch_size: int, max_wait_ms: float):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.queue = None
+        self.worker = None
+        # 평균 batch 크기 확인용 카운터
+        self.num_batches = 0
+        self.num_requests = 0
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self.worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self.worker is not None:
+            self.worker.cancel()
+            try:
+                await self.worker
+            except asyncio.CancelledError:
+                pass
+            self.worker = None
+
+    async def submit(self, context_ids: Tuple[int, ...]) -> torch.Tensor:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((context_ids, future))
+        return await future
+
+    async def _collect(self) -> list:
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        while len(items) < self.max_batch_size:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _run(self):
+        while True:
+            items = await self._collect()
+            # 대기 중에 취소된 요청(클라이언트 연결 끊김)은 batch에서 제외
+            items = [(context_ids, future) for context_ids, future in items if not future.cancelled()]
+            if not items:
+                continue
+
+            # 같은 context는 한 번만 계산 (e.g. "강남역 ㅁ", "강남역 맛")
+            row_of = {}
+            for context_ids, _ in items:
+                row_of.setdefault(tuple(context_ids), len(row_of))
+
+            try:
+                # forward pass는 inference pool에서 실행하여 event loop를 막지 않음
+                log_probs = await inference_pool.run(score_contexts, [list(k) for k in row_of])
+            except Exception as e:
+                logger.error(f"Batch Inference Error: {e}")
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            self.num_batches += 1
+            self.num_requests += len(items)
+            metrics.observe_batch(len(items))
+            for context_ids, future in items:
+                if not future.done():
+                    future.set_result(log_probs[row_of[tuple(context_ids)]])
+
+
+def encode_prompt(full_prompt: str) -> Optional[Tuple[Tuple[int, ...], str]]:
+    """
+    get_recommendations_batched의 tokenize 단계: (context 토큰 ID, 마지막 글자 조각)
+    조각으로 이어질 수 있는 토큰이 없으면 None
+    """
+    context, fragment = split_prompt(full_prompt)
+    if get_whitelist_ids(fragment).numel() == 0:
+        return None
 
-    # (3) 어휘집(Whitelist) 필터링
-    whitelist_ids = []
-    is_jamo_fragment = (len(fragment) == 1 and fragment in CHOSEONG_SET)
+    with metrics.stage("tokenize"):
+        context_ids = encode_context(context)
+    return context_ids, fragment
 
-    if is_jamo_fragment:
-        # 3.1: 초성(e.g. "강남역 ㅁ")일 경우, 미리 만든 '초성 맵' 사용
-        if fragment in choseong_to_ids_map:
-            for token_id in choseong_to_ids_map[fragment]:
-                if token_id in blacklist_ids: continue
-                whitelist_ids.append(token_id)
-    else:
-        # 3.2: 음절(e.g. '강남역 맛')일 경우, 'Trie'로 prefix 검색
-        try:
-            # "맛"으로 시작하는 모든 토큰 리스트
-            # (예: [("맛집", [123, 456]), ("맛있는", [789]), ...])
-            matches = syllable_trie.items(prefix=fragment)
 
-            for clean_token, token_id_list in matches:
-                # 'fragment'와 정확히 일치하는 토큰은 제외 (v5 로직)
-                if clean_token == fragment:
-                    continue
+async def get_recommendations_batched(
+        full_prompt: str,
+        num_results: int = 10,
+        return_type: str = "full"
+) -> List[Tuple[str, float]]:
+    """
+    get_recommendations와 동일하지만, 모델 추론을 BatchScheduler를 통해 수행
+    (tokenize / 후처리도 inference pool에서 실행하여 event loop를 막지 않음)
+    """
+    encoded = await inference_pool.run(encode_prompt, full_prompt)
+    if encoded is None:
+        return []
 
-                for token_id in token_id_list:
-                    if token_id in blacklist_ids: continue
-                    whitelist_ids.append(token_id)
-        except KeyError:
-            pass # Trie에 일치하는 prefix가 없는 경우
+    context_ids, fragment = encoded
+    log_probs = await batch_scheduler.submit(context_ids)
 
-    if not whitelist_ids:
-        return []
+    return await inference_pool.run(
+        build_recommendations, context_ids, log_probs, fragment, num_results, return_type
+    )
 
-    # (4) 필터링
-    mask = torch.ones_like(last_token_logits) * -float("Inf")
-    mask[whitelist_ids] = 0.0
-    filtered_logits = last_token_logits + mask
 
-    # 중간에 필터링으로 버려질 것을 대비해 num_results * 3 만큼 뽑습니다.
-    top_k_indices = torch.topk(filtered_logits, min(num_results * 3, len(whitelist_ids))).indices
+@app.on_event("startup")
+async def start_batch_scheduler():
+    global batch_scheduler
 
-    # (6) 결과 조합 및 필터링
-    recommendations = []
-    context_ids = input_ids_tensor[0]
+    if BATCH_ENABLED:
+        batch_scheduler = BatchScheduler(BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS)
+        batch_scheduler.start()
+        logger.info(f"--- 마이크로 배칭 활성화 (max_batch={BATCH_MAX_SIZE}, max_wait={BATCH_MAX_WAIT_MS}ms) ---")
 
-    # 중복 추천 방지용 Set
-    seen_texts = set()
 
-    for token_id in top_k_indices:
-        # 목표 개수 채웠으면 중단
-        if len(recommendations) >= num_results:
-            break
+@app.on_event("shutdown")
+async def stop_batch_scheduler():
+    if batch_scheduler is not None:
+        await batch_scheduler.stop()
 
-        new_token_id_item = token_id.item()
 
-        # 유효성 검사 (-Inf 체크)
-        if last_token_logits[new_token_id_item] == -float("Inf"):
-            continue
+async def start_completion_table():
+    global completion_table_watcher
 
-        # 토큰 디코딩
-        decoded_token = tokenizer.decode([new_token_id_item], skip_special_tokens=True)
-        clean_token = decoded_token.strip() # 앞뒤 공백 제거
+    # 어휘집 fingerprint로 테이블을 검증하므로 모델 로드 이후에 호출
+    await asyncio.to_thread(completion_table.reload)
+    if COMPLETION_TABLE_RELOAD_SEC > 0:
+        completion_table_watcher = asyncio.create_task(completion_table.watch(COMPLETION_TABLE_RELOAD_SEC))
 
-        # 🌟 [핵심] 1글자 쓰레기값 필터링
-        if not is_valid_suggestion(clean_token):
-            continue
 
-        probability = all_probabilities[new_token_id_item].item()
+@app.on_event("shutdown")
+async def stop_completion_table():
+    if completion_table_watcher is not None:
+        completion_table_watcher.cancel()
 
-        if return_type == "token":
-            final_text = clean_token
-        else:
-            # 전체 문장 반환
-            new_sequence_ids = torch.cat([context_ids, token_id.unsqueeze(0)], dim=0)
-            final_text = tokenizer.decode(new_sequence_ids, skip_special_tokens=True)
 
-        # 중복 제거 (혹시 모를 상황 대비)
-        if final_text in seen_texts:
-            continue
+# --- 5-2. 다중 토큰(phrase) 자동완성 ---
+def get_context_state(context_ids: Tuple[int, ...]) -> Tuple[torch.Tensor, tuple]:
+    """
+    context의 다음 토큰 log 확률과 past_key_values (Context KV 캐시 사용)
+    """
+    log_probs = score_contexts([context_ids])[0]
+    entry = context_cache.peek(tuple(context_ids))
+    if entry is not None:
+        return log_probs, entry.past_key_values
 
-        seen_texts.add(final_text)
-        recommendations.append((final_text, probability))
+    # 캐시가 꺼져 있거나 용량보다 큰 context인 경우
+    _, rows_past = run_model_batch([list(context_ids)])
+    return log_probs, rows_past[0]
 
-    return recommendations
+
+class PhraseBeamSearch:
+    """
+    첫 토큰은 fragment whitelist(초성/자모 인덱스)로 제한하고, 이후 여러 토큰을 이어 붙이는 beam search
+    - context KV(캐시)를 beam 수만큼 복제한 뒤 beam별 KV를 이어가며 매 step 새 토큰 1개만 계산
+    - time_budget_ms를 넘기면 확장을 멈추고 그때까지의 beam으로 결과를 만듦
+    - start() / step()을 나눠두어 step마다 중간 결과를 스트리밍할 수 있음
+    """
+
+    def __init__(
+            self,
+            full_prompt: str,
+            num_results: int,
+            return_type: str,
+            beam_width: int = PHRASE_BEAM_WIDTH,
+            max_new_tokens: int = PHRASE_MAX_NEW_TOKENS,
+            time_budget_ms: float = PHRASE_TIME_BUDGET_MS
+    ):
+        self.full_prompt = full_prompt
+        self.num_results = num_results
+        self.return_type = return_type
+        self.beam_width = max(beam_width, num_results)
+        self.max_new_tokens = max_new_tokens
+        self.time_budget = time_budget_ms / 1000.0
+
+        self.context_ids = ()
+        self.beams = []      # [(토큰 ID 리스트, 누적 log 확률)]
+        self.finished = []   # EOS가 선택되어 더 이상 확장하지 않는 beam
+        self.past = None     # beam들의 KV ([beam, heads, seq, dim] 튜플)
+        self.deadline = None
+        self.steps = 0
+        self.done = False
+
+    def start(self) -> List[Tuple[str, float]]:
+        """context 추론 + 첫 토큰(whitelist 제한) 선택"""
+        self.deadline = time.perf_counter() + self.time_budget
+        context, fragment = split_prompt(self.full_prompt)
+        if get_whitelist_ids(fragment).numel() == 0:
+            self.done = True
+            return []
+
+        self.context_ids = encode_context(context)
+        log_probs, past = get_context_state(self.context_ids)
+
+        top_ids, top_log_probs = select_candidates(self.context_ids, log_probs, fragment, self.beam_width * 3)
+        for token_id, log_prob in zip(top_ids, top_log_probs):
+            if len(self.beams) >= self.beam_width:
+                break
+            if log_prob == -float("Inf"):
+                continue
+            if not is_valid_suggestion(token_texts[token_id].strip()):
+                continue
+            self.beams.append(([token_id], log_prob))
+
+        if not self.beams:
+            self.done = True
+            return []
+
+        # context KV를 beam 수만큼 복제 (expand는 복사하지 않고, 다음 step의 cat에서 새 텐서가 만들어짐)
+        num_beams = len(self.beams)
+        self.past = tuple(
+            (key.expand(num_beams, -1, -1, -1), value.expand(num_beams, -1, -1, -1))
+            for key, value in past
+        )
+        self.steps = 1
+        self.done = self.steps >= self.max_new_tokens
+        return self.results()
+
+    def step(self) -> List[Tuple[str, float]]:
+        """모든 beam을 한 번의 batched forward pass로 토큰 1개씩 확장"""
+        if self.done or time.perf_counter() >= self.deadline:
+            self.done = True
+            return self.results()
+
+        device = model.device
+        input_ids = torch.tensor([[ids[-1]] for ids, _ in self.beams], dtype=torch.long, device=device)
+        with torch.no_grad():
+            outputs = model(input_ids=input_ids, past_key_values=to_model_cache(self.past), use_cache=True)
+
+        log_probs = torch.log_softmax(outputs.logits[:, -1, :].float(), dim=-1)
+        for special_id in tokenizer.all_special_ids:
+            if special_id != tokenizer.eos_token_id:
+                log_probs[:, special_id] = -float("Inf")
+        top_k = torch.topk(log_probs, self.beam_width, dim=-1)
+
+        candidates = []
+        for row, (_, score) in enumerate(self.beams):
+            for log_prob, token_id in zip(top_k.values[row].tolist(), top_k.indices[row].tolist()):
+                candidates.append((score + log_prob, row, token_id))
+        candidates.sort(reverse=True)
+
+        new_beams = []
+        parent_rows = []
+        for score, row, token_id in candidates:
+            if len(new_beams) >= self.beam_width:
+                break
+            if token_id == tokenizer.eos_token_id:
+                # 구문이 끝난 beam은 결과 후보로만 남김
+                self.finished.append((self.beams[row][0], score))
+                continue
+            new_beams.append((self.beams[row][0] + [token_id], score))
+            parent_rows.append(row)
+
+        self.steps += 1
+        if not new_beams:
+            self.beams = []
+            self.done = True
+            return self.results()
+
+        index = torch.tensor(parent_rows, dtype=torch.long, device=device)
+        self.past = tuple(
+            (key.index_select(0, index), value.index_select(0, index))
+            for key, value in to_legacy_cache(outputs.past_key_values)
+        )
+        self.beams = new_beams
+        self.done = self.steps >= self.max_new_tokens
+        return self.results()
+
+    def run(self) -> List[Tuple[str, float]]:
+        results = self.start()
+        while not self.done:
+            results = self.step()
+        return results
+
+    def results(self) -> List[Tuple[str, float]]:
+        """
+        진행 중인 beam + 끝난 beam을 길이 정규화 점수로 정렬하여 (구문, 확률) 반환
+        """
+        ranked = sorted(self.finished + self.beams, key=lambda beam: beam[1] / len(beam[0]), reverse=True)
+
+        recommendations = []
+        seen_texts = set()
+        for token_ids, score in ranked:
+            if len(recommendations) >= self.num_results:
+                break
+            if self.return_type == "token":
+                final_text = join_tokens((), token_ids).strip()
+            else:
+                final_text = join_tokens(self.context_ids, token_ids)
+            if not final_text or final_text in seen_texts:
+                continue
+            seen_texts.add(final_text)
+            recommendations.append((final_text, math.exp(score)))
+        return recommendations
+
+
+def format_sse(q: str, results: List[Tuple[str, float]], done: bool) -> str:
+    payload = {
+        "q": q,
+        "subkeys": [{"subkey": text, "prob": prob} for text, prob in results],
+        "done": done,
+    }
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def stream_phrase_search(search: PhraseBeamSearch) -> StreamingResponse:
+    """
+    beam이 한 step 확장될 때마다 중간 결과를 Server-Sent Events로 전송
+    """
+    # 대기열이 가득 차면 스트림을 열기 전에 503 반환
+    # 자리는 generator 안에서 잡고 스트림이 끝날 때 반납 (응답이 시작되지 않으면 자리를 잡지 않음)
+    inference_pool.check()
+
+    async def events():
+        with inference_pool.admit():
+            results = await inference_pool.run(search.start)
+            while True:
+                yield format_sse(search.full_prompt, results, search.done)
+                if search.done:
+                    break
+                results = await inference_pool.run(search.step)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# --- 5-3. 백그라운드 모델 로딩 / Warm-up ---
+class ModelState:
+    """
+    백그라운드 모델 로딩 상태 (starting -> loading -> warming -> ready, 실패 시 failed)
+    - 서버는 바로 뜨고 /healthz(liveness)는 로딩 중에도 200
+    - /readyz(readiness)는 warm-up 쿼리까지 끝난 뒤에만 200이라, 준비된 Pod로만 트래픽이 들어옴
+    """
+
+    def __init__(self):
+        self.status = "starting"
+        self.error = None
+        self.started_at = time.time()
+        self.ready_at = None
+        self.warmup_ms = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def require_ready(self):
+        if not self.ready:
+            raise HTTPException(
+                status_code=503,
+                detail=f"모델을 준비 중입니다 ({self.status}). 잠시 후 다시 시도하세요.",
+                headers={"Retry-After": "5"}
+            )
+
+    def stats(self) -> dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "load_s": self.ready_at - self.started_at if self.ready_at else None,
+            "warmup_ms": self.warmup_ms,
+        }
+
+
+model_state = ModelState()
+model_loader = None
+
+
+def warm_up():
+    """
+    대표 쿼리를 실제 경로로 미리 실행하여 첫 요청이 allocator / 연산 초기화 비용을 내지 않도록 함
+    (batched forward pass -> get_recommendations 순서로 실행하며, 결과는 Context KV 캐시에 남음)
+    """
+    if not WARMUP_QUERIES:
+        return
+    start = time.perf_counter()
+    contexts = list(dict.fromkeys(encode_context(split_prompt(q)[0]) for q in WARMUP_QUERIES))
+    score_contexts([list(ids) for ids in contexts[:BATCH_MAX_SIZE]])
+    for query in WARMUP_QUERIES:
+        get_recommendations(query, 10, "full")
+    model_state.warmup_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"--- Warm-up 완료: {len(WARMUP_QUERIES)}개 쿼리 ({model_state.warmup_ms:.0f}ms) ---")
+
+
+async def load_in_background():
+    """모델 다운로드 / 로드 / 인덱스 구축 / warm-up을 event loop 밖에서 실행"""
+    try:
+        model_state.status = "loading"
+        await asyncio.to_thread(load_model_and_vocab)
+        model_state.status = "warming"
+        await inference_pool.run(warm_up)
+        await start_completion_table()
+        model_state.status = "ready"
+        model_state.ready_at = time.time()
+    except Exception as e:
+        model_state.status = "failed"
+        model_state.error = str(e)
+        logger.error(f"❌ 모델 준비 실패: {e}")
+
+
+@app.on_event("startup")
+async def start_background_loading():
+    global model_loader
+
+    model_loader = asyncio.create_task(load_in_background())
 
 
 # --- 6. API 엔드포인트 ---
+cancelled_requests = 0
+
+
+async def cancel_on_disconnect(request: Request, awaitable):
+    """
+    awaitable을 실행하면서 클라이언트 연결이 끊겼는지 주기적으로 확인하고, 끊기면 취소
+    (e.g. 사용자가 다음 글자를 입력하여 이전 키 입력의 요청을 버린 경우)
+    - inference pool / batch scheduler 대기열에서 아직 시작하지 않은 추론은 실행하지 않음
+    - 이미 실행 중인 forward pass는 멈출 수 없으므로 끝까지 실행 (결과는 Context KV 캐시에 남아 다음 입력에 사용)
+    """
+    global cancelled_requests
+
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SEC)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                cancelled_requests += 1
+                raise HTTPException(status_code=499, detail="클라이언트 연결이 끊겨 요청을 취소했습니다.")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
+def search_response(q: str, results: List[Tuple[str, float]]):
+    """
+    검색 결과를 바로 JSON으로 직렬화 (후보마다 SubkeyResponse를 만들고 검증하는 비용 생략)
+    ResultResponse와 같은 형식이며, response_model은 API 문서용으로 유지
+    """
+    return FastJSONResponse({"q": q, "subkeys": [{"subkey": text, "prob": prob} for text, prob in results]})
+
+
 @app.get("/api/v2/search", response_model=ResultResponse)
 async def autocomplete(
+        request: Request,
+
         q: str = Query(
             ...,
             min_length=1,
@@ -334,6 +2152,8 @@ async def autocomplete(
 
         n: int = Query(
             default=3,
+            ge=1,
+            le=MAX_NUM_RESULTS,
             title="Number of subkeys",
             description="리턴될 문자열의 개수"
         ),
@@ -343,24 +2163,105 @@ async def autocomplete(
             title="Return Type",
             alias="type",
             description="'full'이면 전체 문장, 'token'이면 마지막 제안되는 단어만 반환"
+        ),
+
+        mode: SearchMode = Query(
+            default=SearchMode.NEXT,
+            title="Search Mode",
+            description="'next'면 다음 토큰 하나, 'phrase'면 여러 토큰으로 이어지는 구문을 제안"
+        ),
+
+        stream: bool = Query(
+            default=False,
+            title="Stream",
+            description="phrase 모드에서 beam이 확장될 때마다 중간 결과를 Server-Sent Events로 전송"
         )
 ):
     """
     GPT-2 모델을 기반으로 자동완성 추천 목록을 반환
     """
-    # 핵심 로직 함수 호출
-    results = get_recommendations(q, num_results=n, return_type=return_type.value)
+    model_state.require_ready()
+
+    if mode == SearchMode.PHRASE:
+        search = PhraseBeamSearch(q, n, return_type.value)
+        if stream:
+            return stream_phrase_search(search)
+        with inference_pool.admit():
+            results = await cancel_on_disconnect(request, inference_pool.run(search.run))
+        return search_response(q, results)
+
+    # 미리 계산해둔 head 쿼리 테이블에 있으면 모델을 거치지 않고 바로 반환
+    results = completion_table.lookup(q, n, return_type.value)
+    if results is not None:
+        return search_response(q, results)
+
+    # 핵심 로직 함수 호출 (blocking 추론은 inference pool에서 실행, 대기열이 가득 차면 503)
+    # 결과를 기다리는 동안 클라이언트 연결이 끊기면 아직 시작하지 않은 추론은 취소
+    with inference_pool.admit():
+        if batch_scheduler is not None:
+            results = await cancel_on_disconnect(
+                request, get_recommendations_batched(q, num_results=n, return_type=return_type.value)
+            )
+        else:
+            results = await cancel_on_disconnect(
+                request, inference_pool.run(get_recommendations, q, n, return_type.value)
+            )
 
     # (v7) 결과를 API 응답 형식(JSON)으로 변환
-    response_data = {
-        "q": q,
-        "subkeys": [
-            SubkeyResponse(subkey=text, prob=prob)
-            for text, prob in results
-        ]
+    return search_response(q, results)
+
+
+@app.get("/api/v2/stats")
+def read_stats():
+    """
+    캐시 크기 조정을 위한 내부 지표 (hit/miss/eviction 등)
+    """
+    return {
+        "context_cache": context_cache.stats(),
+        "model_state": model_state.stats(),
+        "inference_pool": inference_pool.stats(),
+        "cancelled_requests": cancelled_requests,
+        "precision": precision_report or {"precision": MODEL_PRECISION.value},
+        "completion_table": completion_table.stats(),
     }
 
-    return response_data
+
+@app.post("/api/v2/completion-table/reload")
+def reload_completion_table():
+    """
+    자동완성 테이블 파일을 즉시 다시 로드 (새 테이블 배포 후 watch 주기를 기다리지 않을 때)
+    """
+    loaded = completion_table.reload()
+    return {"loaded": loaded, **completion_table.stats()}
+
+
+@app.get("/metrics")
+def read_metrics():
+    """
+    Prometheus scrape endpoint (구간별 지연시간, 대기열 길이, batch 크기, 캐시 hit, 모델 로드 시간)
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="metrics가 비활성화되어 있습니다 (METRICS_ENABLED=0 또는 prometheus_client 미설치).")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness: 프로세스가 살아 있으면 200 (모델 로딩 실패 시에만 500으로 재시작 유도)
+    """
+    if model_state.status == "failed":
+        raise HTTPException(status_code=500, detail=model_state.error)
+    return {"status": model_state.status}
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: 모델 로드 + warm-up이 끝나야 200
+    """
+    model_state.require_ready()
+    return {"status": model_state.status}
 
 
 # --- (선택) 루트 경로 ---
@@ -0,0 +1,357 @@
+import os
+import time
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from importlib.util import find_spec
+
+import httpx
+from fastapi import FastAPI, Query, HTTPException
+from fastapi.responses import Response
+
+# ORJSONResponse는 orjson이 없어도 import되고 응답할 때 실패하므로 설치 여부를 먼저 확인
+if find_spec("orjson") is not None:
+    from fastapi.responses import ORJSONResponse as FastJSONResponse
+else:  # orjson이 없으면 표준 json으로 직렬화
+    from fastapi.responses import JSONResponse as FastJSONResponse
+
+try:
+    from prometheus_client import CollectorRegistry, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+except ImportError:  # prometheus_client가 없으면 /metrics 비활성화
+    Histogram = None
+
+
+# --- 로깅 설정 ---
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+# --- 1. FastAPI 앱 정의 ---
+# 검색창 한 번의 입력에 자동완성 + 연관 검색어를 한 번의 호출로 응답하는 gateway
+# (UI -> ingress 왕복을 두 번에서 한 번으로 줄이고, 두 엔진은 cluster 내부에서 동시에 호출)
+app = FastAPI(title="Search Suggest Gateway")
+
+
+# --- 2. 전역 변수 ---
+# 각 엔진의 search endpoint (cluster 내부 Service 주소)
+AUTOCOMPLETE_URL = os.environ.get(
+    "AUTOCOMPLETE_URL", "http://autocomplete-api-service.autocomplete.svc.cluster.local/api/v1/search"
+)
+RELKEY_URL = os.environ.get(
+    "RELKEY_URL", "http://relkey-api-service.autocomplete.svc.cluster.local/api/v1/related/search"
+)
+
+# 엔진별 응답 기한(ms): 기한을 넘긴 엔진은 결과 없이 "timeout"으로 응답하고 나머지 결과만 반환
+# 전체 응답 시간은 두 기한의 합이 아니라 더 긴 쪽의 기한으로 제한됨
+AUTOCOMPLETE_DEADLINE_MS = float(os.environ.get("AUTOCOMPLETE_DEADLINE_MS", "1000"))
+RELKEY_DEADLINE_MS = float(os.environ.get("RELKEY_DEADLINE_MS", "3000"))
+# 엔진 연결 수립 기한(초) / 엔진별 keep-alive 연결 수
+CONNECT_TIMEOUT_SEC = float(os.environ.get("CONNECT_TIMEOUT_SEC", "0.5"))
+MAX_CONNECTIONS = int(os.environ.get("MAX_CONNECTIONS", "64"))
+
+# 요청 한 번에 받을 수 있는 최대 추천 수 (n, rel_n 공통, 엔진 요청과 캐시 키에 그대로 들어가므로 제한)
+MAX_NUM_RESULTS = int(os.environ.get("MAX_NUM_RESULTS", "20"))
+
+# 두 엔진이 공유하는 결과 캐시: (엔진, 정규화된 검색어, 개수) -> 응답 (TTL / 최대 항목 수)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "20000"))
+RESULT_CACHE_TTL_SEC = float(os.environ.get("RESULT_CACHE_TTL_SEC", "600"))
+
+# Prometheus 지표(/metrics) 사용 여부
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+client = None
+
+
+class Backend:
+    """
+    gateway 뒤의 엔진 하나 (search endpoint, 응답 기한, 호출 결과 집계)
+    """
+
+    def __init__(self, name: str, url: str, deadline_ms: float):
+        self.name = name
+        self.url = url
+        self.deadline_ms = deadline_ms
+
+        self.requests = 0
+        self.timeouts = 0
+        self.errors = 0
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "deadline_ms": self.deadline_ms,
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "errors": self.errors,
+        }
+
+
+backends = {
+    "auto": Backend("auto", AUTOCOMPLETE_URL, AUTOCOMPLETE_DEADLINE_MS),
+    "rel": Backend("rel", RELKEY_URL, RELKEY_DEADLINE_MS),
+}
+
+
+# --- 2-1. 결과 캐시 ---
+def normalize_query(text: str) -> str:
+    """
+    캐시 키에만 사용하는 검색어 (엔진에는 사용자가 입력한 검색어를 그대로 전달)
+    앞 공백 제거, 연속 공백은 하나로
+    끝의 공백은 "다음 단어"를 요청하는 의미가 있으므로 하나만 남김 (e.g. "강남역 " -> 다음 단어 추천)
+    대소문자는 모델 입력에 따라 추천이 달라지므로 통일하지 않음
+    """
+    normalized = " ".join(text.split())
+    if normalized and text[-1:].isspace():
+        normalized += " "
+    return normalized
+
+
+class ResultCache:
+    """
+    (엔진, normalize_query(검색어), 개수) -> (엔진 응답, 만료 시각) LRU 캐시
+    - 엔진별로 성공한 응답만 저장하므로, 한 엔진이 기한을 넘겨도 다른 엔진의 결과는 캐시되고
+      다음 요청에서는 빠진 엔진만 다시 호출
+    - 항목 수가 max_entries를 넘으면 오래 사용하지 않은 항목부터 제거
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: float):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: tuple):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            body, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: tuple, body: dict):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            self.entries[key] = (body, time.monotonic() + self.ttl_sec)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SEC)
+
+
+# --- 2-2. Prometheus 지표 ---
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Metrics:
+    """
+    /metrics로 노출하는 Prometheus 지표
+    - 엔진별 응답 시간 / 전체 응답 시간: Histogram에 직접 기록 (캐시 hit은 기록하지 않음)
+    - 엔진별 timeout / 오류, 캐시 hit 등: scrape 시점에 기존 stats()에서 읽음
+    """
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled and Histogram is not None
+        if not self.enabled:
+            return
+        self.registry = CollectorRegistry()
+        backend_seconds = Histogram(
+            "gateway_backend_seconds", "엔진별 응답 시간", ["backend"],
+            buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.backend_timers = {name: backend_seconds.labels(name) for name in backends}
+        self.request_seconds = Histogram(
+            "gateway_request_seconds", "gateway 전체 응답 시간",
+            buckets=LATENCY_BUCKETS, registry=self.registry
+        )
+        self.registry.register(self)
+
+    def observe(self, name: str, seconds: float):
+        if self.enabled:
+            self.backend_timers[name].observe(seconds)
+
+    def observe_request(self, seconds: float):
+        if self.enabled:
+            self.request_seconds.observe(seconds)
+
+    def collect(self):
+        for label, help_text, field in (
+                ("gateway_backend_requests", "엔진 호출 수", "requests"),
+                ("gateway_backend_timeouts", "응답 기한을 넘겨 결과 없이 응답한 엔진 호출 수", "timeouts"),
+                ("gateway_backend_errors", "연결 실패 / 오류 응답 엔진 호출 수", "errors"),
+        ):
+            counter = CounterMetricFamily(label, help_text, labels=["backend"])
+            for name, backend in backends.items():
+                counter.add_metric([name], getattr(backend, field))
+            yield counter
+
+        cache = result_cache.stats()
+        lookups = CounterMetricFamily("gateway_result_cache_lookups", "결과 캐시 조회 결과", labels=["result"])
+        lookups.add_metric(["hit"], cache["hits"])
+        lookups.add_metric(["miss"], cache["misses"])
+        yield lookups
+        yield CounterMetricFamily("gateway_result_cache_evictions", "결과 캐시 eviction 수", value=cache["evictions"])
+        yield GaugeMetricFamily("gateway_result_cache_entries", "결과 캐시 항목 수", value=cache["entries"])
+
+    def render(self) -> bytes:
+        return generate_latest(self.registry)
+
+
+metrics = Metrics(METRICS_ENABLED)
+
+
+# --- 3. 엔진 연결 ---
+@app.on_event("startup")
+async def open_client():
+    """두 엔진에 대한 keep-alive 연결을 모든 요청이 공유"""
+    global client
+
+    client = httpx.AsyncClient(
+        timeout=httpx.Timeout(None, connect=CONNECT_TIMEOUT_SEC),
+        limits=httpx.Limits(max_connections=MAX_CONNECTIONS * len(backends), max_keepalive_connections=MAX_CONNECTIONS),
+    )
+
+
+@app.on_event("shutdown")
+async def close_client():
+    await client.aclose()
+
+
+# --- 4. 엔진 호출 (fan-out) ---
+async def call_backend(backend: Backend, params: dict, cache_query: str, num_results: int) -> dict:
+    """
+    엔진 하나를 응답 기한 안에서 호출한 결과
+    {"status": "ok" | "timeout" | "error", "latency": ms, "cached": bool, "subkeys": [...], "error": 메시지}
+    - 기한을 넘기면 요청을 취소(연결 종료)하므로 엔진은 아직 시작하지 않은 추론을 실행하지 않음
+    - 성공한 응답만 공유 캐시에 (엔진, cache_query, num_results) 키로 저장
+    """
+    key = (backend.name, cache_query, num_results)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return {"status": "ok", "latency": 0.0, "cached": True, "subkeys": cached["subkeys"], "error": None}
+
+    backend.requests += 1
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(
+            client.get(backend.url, params=params), timeout=backend.deadline_ms / 1000
+        )
+        response.raise_for_status()
+        body = response.json()
+    except asyncio.TimeoutError:
+        backend.timeouts += 1
+        return {
+            "status": "timeout", "latency": (time.perf_counter() - start) * 1000, "cached": False, "subkeys": [],
+            "error": f"응답 기한 초과 (>{backend.deadline_ms:.0f}ms)",
+        }
+    except (httpx.HTTPError, ValueError) as e:
+        backend.errors += 1
+        return {
+            "status": "error", "latency": (time.perf_counter() - start) * 1000, "cached": False, "subkeys": [],
+            "error": str(e) or type(e).__name__,
+        }
+
+    latency = time.perf_counter() - start
+    metrics.observe(backend.name, latency)
+    result_cache.put(key, body)
+    return {"status": "ok", "latency": latency * 1000, "cached": False, "subkeys": body.get("subkeys", []), "error": None}
+
+
+# --- 5. API 엔드포인트 ---
+@app.get("/api/v1/suggest/search")
+async def suggest(
+        q: str = Query(..., min_length=1, max_length=25, title="Search Query"),
+        n: int = Query(5, ge=1, le=MAX_NUM_RESULTS, title="Number of autocomplete subkeys"),
+        rel_n: int = Query(8, ge=1, le=MAX_NUM_RESULTS, title="Number of related keywords"),
+):
+    """
+    자동완성 / 연관 검색어 엔진을 동시에 호출하여 한 번에 응답
+    한 엔진이 기한을 넘기거나 실패해도 나머지 결과는 그대로 반환 (엔진별 status 참고)
+    """
+    start = time.perf_counter()
+    cache_query = normalize_query(q)
+    if not cache_query.strip():
+        raise HTTPException(status_code=422, detail="검색어가 비어 있습니다.")
+
+    auto, rel = await asyncio.gather(
+        call_backend(backends["auto"], {"q": q, "n": n, "type": "full"}, cache_query, n),
+        # 연관 검색어는 끝 공백과 무관하므로 "강남역"과 "강남역 "이 같은 캐시 항목을 사용
+        call_backend(backends["rel"], {"q": q, "n": rel_n}, cache_query.rstrip(), rel_n),
+    )
+
+    metrics.observe_request(time.perf_counter() - start)
+    return FastJSONResponse({"q": q, "auto": auto, "rel": rel})
+
+
+@app.get("/api/v1/suggest/stats")
+def read_stats():
+    """
+    엔진별 호출 / timeout / 오류 수, 결과 캐시 지표
+    """
+    return {
+        "backends": {name: backend.stats() for name, backend in backends.items()},
+        "result_cache": result_cache.stats(),
+    }
+
+
+@app.get("/metrics")
+def read_metrics():
+    """
+    Prometheus scrape endpoint (엔진별 응답 시간, timeout / 오류 수, 캐시 hit)
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="metrics가 비활성화되어 있습니다 (METRICS_ENABLED=0 또는 prometheus_client 미설치).")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness: 프로세스가 살아 있으면 200
+    """
+    return {"status": "ok"}
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: 엔진 연결이 준비되면 200 (엔진 상태와 무관하게 부분 결과로 응답할 수 있으므로 엔진은 확인하지 않음)
+    """
+    if client is None:
+        raise HTTPException(status_code=503, detail="엔진 연결을 준비 중입니다.")
+    return {"status": "ok"}
+
+
+@app.get("/")
+def read_root():
+    return {"message": "Search Suggest Gateway. ' /docs '로 이동하여 API 문서를 확인하세요."}
@@ -3,16 +3,33 @@ import os
 os.environ["KMP_DUPLICATE_LIB_OK"] = "TRUE"
 
 import re
+import json
 import math
 import boto3
 import torch
+import asyncio
 import logging
+import time
+import threading
+import queue
 from typing import List, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager, nullcontext
+from concurrent.futures import ThreadPoolExecutor, Future
 
-from fastapi import FastAPI, Query
+from fastapi import FastAPI, Query, HTTPException, Request
+from fastapi.responses import StreamingResponse, Response
 from pydantic import BaseModel
 from llama_cpp import Llama
 
+from vector_index import VectorIndex
+
+try:
+    from prometheus_client import CollectorRegistry, Histogram, generate_latest, CONTENT_TYPE_LATEST
+    from prometheus_client.core import GaugeMetricFamily, CounterMetricFamily
+except ImportError:  # prometheus_client가 없으면 /metrics 비활성화
+    Histogram = None
+
 
 # --- 로깅 설정 ---
 logging.basicConfig(level=logging.INFO)
@@ -36,12 +53,122 @@ tokenizer = None
 # instruction: 학습 때 사용한 지시문과 동일한 instruction 사용
 # INSTRUCTION_TEXT = "다음 검색어와 연관된 키워드를 쉼표(,)로 구분하여 생성하세요."
 INSTRUCTION_TEXT = "다음 검색어와 연관된 키워드를 반드시 '한글'로 변환하여 쉼표(,)로 구분해 생성하세요."
+# 모든 요청에 공통인 프롬프트 앞부분 (기동 시 한 번만 평가하고 KV 상태를 재사용)
+PROMPT_HEADER = f"### Instruction:\n{INSTRUCTION_TEXT}\n\n### Input:\n"
+header_tokens = []
+
+# 연관 검색어 결과 캐시: normalize_text(검색어) -> 키워드 목록 (TTL / 최대 항목 수)
+RESULT_CACHE_SIZE = int(os.environ.get("RESULT_CACHE_SIZE", "10000"))
+RESULT_CACHE_TTL_SEC = float(os.environ.get("RESULT_CACHE_TTL_SEC", "3600"))
+
+# 단어 벡터 fast path: scripts/build_vector_index.py 결과 디렉토리 (빈 값이면 사용 안 함)
+# 유사도 VECTOR_MIN_SCORE 이상인 키워드가 n개 이상이면 LLM 생성 없이 바로 응답
+VECTOR_INDEX_DIR = os.environ.get("VECTOR_INDEX_DIR", "")
+VECTOR_NPROBE = int(os.environ.get("VECTOR_NPROBE", "8"))
+VECTOR_MIN_SCORE = float(os.environ.get("VECTOR_MIN_SCORE", "0.5"))
+
+
+def cpu_limit() -> float:
+    """Pod의 CPU limit (cgroup v2 cpu.max / v1 cfs quota), limit이 없으면 CPU 개수"""
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            return int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_quota_us") as f:
+            quota = int(f.read())
+        with open("/sys/fs/cgroup/cpu/cpu.cfs_period_us") as f:
+            period = int(f.read())
+        if quota > 0:
+            return quota / period
+    except (OSError, ValueError):
+        pass
+    return float(os.cpu_count() or 1)
+
+
+# llama.cpp context pool 설정: context별 스레드 수 / context 수 (기본값: CPU limit을 스레드 수로 나눈 값)
+# 가중치는 mmap으로 공유되고 context마다 KV(n_ctx=256)만 따로 가지므로 context를 늘려도 메모리 증가는 작음
+CPU_LIMIT = cpu_limit()
+LLAMA_THREADS = int(os.environ.get("LLAMA_THREADS", "2"))
+LLAMA_POOL_SIZE = int(os.environ.get("LLAMA_POOL_SIZE", str(max(1, int(CPU_LIMIT) // LLAMA_THREADS))))
+
+# 추론 Worker Pool 설정: 동시에 실행할 추론 수 / 대기열 길이 (초과 시 503)
+# Llama context 하나는 동시에 여러 스레드에서 호출할 수 없으므로 기본값은 context 수
+INFERENCE_WORKERS = int(os.environ.get("INFERENCE_WORKERS", str(LLAMA_POOL_SIZE)))
+INFERENCE_QUEUE_SIZE = int(os.environ.get("INFERENCE_QUEUE_SIZE", "16"))
+# 클라이언트 연결 끊김 확인 주기(초): 끊긴 요청의 아직 시작하지 않은 추론은 취소
+DISCONNECT_POLL_SEC = float(os.environ.get("DISCONNECT_POLL_SEC", "0.05"))
+
+# 모델 로드 후 readiness 전에 실행할 warm-up 쿼리 (쉼표 구분, 빈 값이면 생략)
+WARMUP_QUERIES = [
+    q for q in os.environ.get("WARMUP_QUERIES", "강남역 맛집,아이폰,제주도 여행").split(",") if q
+]
+
+# Prometheus 지표(/metrics) 사용 여부 (0이면 구간별 타이머도 기록하지 않음)
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "1") == "1"
+
+
+# --- 2-1. 추론 Worker Pool ---
+class InferencePool:
+    """
+    blocking 추론을 event loop 밖의 bounded thread pool에서 실행
+    (torch / llama.cpp 연산은 GIL을 풀기 때문에 thread로 충분)
+    - max_workers: 동시에 실행되는 추론 수
+    - max_queue: 실행을 기다릴 수 있는 요청 수. 가득 차면 대기시키지 않고 바로 503 반환 (load shedding)
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inference")
+        # 실행 중 + 대기 중인 요청 수 (event loop 스레드에서만 변경)
+        self.pending = 0
+        self.rejected = 0
+
+    def check(self):
+        """대기열이 가득 찼으면 503 (자리는 잡지 않음)"""
+        if self.pending >= self.max_workers + self.max_queue:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="추론 대기열이 가득 찼습니다. 잠시 후 다시 시도하세요.",
+                headers={"Retry-After": "1"}
+            )
+
+    @contextmanager
+    def admit(self):
+        self.check()
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def run(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, fn, *args)
+
+    def submit(self, fn, *args) -> Future:
+        """실행을 예약하고 concurrent Future 반환 (아직 시작하지 않았으면 cancel()로 취소 가능)"""
+        return self.executor.submit(fn, *args)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+
+inference_pool = InferencePool(INFERENCE_WORKERS, INFERENCE_QUEUE_SIZE)
 
 
 # --- 3. API 서버 시작 시 모델 로드 ---
-@app.on_event("startup")
 def load_model():
-    global model, tokenizer
+    global model, tokenizer, header_tokens
 
     # 로컬 테스트용
     save_dir = "./model"
@@ -94,19 +221,223 @@ def load_model():
         #     torch_dtype=torch.float16, # 메모리 최적화
         #     trust_remote_code=True
         # )
-        # gguf model load
-        model = Llama(
-            model_path=f"{save_dir}/{gguf_filename}",
-            n_ctx=256,        # 문맥 길이 (입력+출력)
-            n_threads=4,      # CPU 코어 사용 개수 (K8s Limit에 맞춤)
-            n_gpu_layers=0,   # CPU 전용 (GPU 있다면 -1 또는 레이어 수 지정)
-            verbose=False     # 로그 끄기 (성능 향상)
-        )
+        # gguf model load (context마다 Llama 인스턴스 하나, 가중치 파일은 mmap으로 공유)
+        contexts = [
+            Llama(
+                model_path=f"{save_dir}/{gguf_filename}",
+                n_ctx=256,                # 문맥 길이 (입력+출력)
+                n_threads=LLAMA_THREADS,  # context별 CPU 코어 사용 개수 (x LLAMA_POOL_SIZE <= K8s Limit)
+                n_gpu_layers=0,           # CPU 전용 (GPU 있다면 -1 또는 레이어 수 지정)
+                verbose=False             # 로그 끄기 (성능 향상)
+            )
+            for _ in range(LLAMA_POOL_SIZE)
+        ]
+        model = contexts[0]
     except Exception as e:
         logger.error(f"❌ 모델 로드 실패: {e}")
         raise e
 
-    logger.info(f"--- Qwen 모델 로딩 완료 ---")
+    logger.info(f"--- Qwen 모델 로딩 완료 (context {LLAMA_POOL_SIZE}개 x {LLAMA_THREADS} threads) ---")
+
+    header_tokens = model.tokenize(PROMPT_HEADER.encode("utf-8"), add_bos=True)
+    for llm in contexts:
+        llama_pool.add(llm)
+    logger.info(f"--- Instruction header KV 저장 ({len(header_tokens)} tokens) ---")
+
+    load_vector_index()
+
+
+# --- 3-1. llama.cpp Context Pool ---
+class LlamaSlot:
+    __slots__ = ("llm", "header_state")
+
+    def __init__(self, llm):
+        self.llm = llm
+        # 고정된 instruction header를 한 번 평가해두고 KV 상태를 저장
+        # (llama.cpp는 직전에 평가한 토큰과 겹치는 prefix를 재사용하므로,
+        #  header 토큰을 그대로 앞에 붙여 호출하면 매 요청 header를 다시 계산하지 않음)
+        llm.reset()
+        llm.eval(header_tokens)
+        self.header_state = llm.save_state()
+
+    def restore_header(self):
+        """다른 prompt 평가 / 오류 등으로 context가 header로 시작하지 않으면 저장해둔 header 상태 복원"""
+        llm = self.llm
+        if llm.n_tokens < len(header_tokens) or list(llm.input_ids[:len(header_tokens)]) != header_tokens:
+            llm.load_state(self.header_state)
+
+
+class LlamaPool:
+    """
+    독립된 llama.cpp context 여러 개를 두고 요청마다 빈 context 하나를 빌려 생성
+    (inference pool의 worker 수와 context 수가 같아 빌릴 때 대기하지 않음)
+    """
+
+    def __init__(self):
+        self.slots = []
+        self.idle = queue.Queue()
+        self.lock = threading.Lock()
+        self.generations = 0
+        self.generated_tokens = 0
+        self.busy_sec = 0.0
+
+    def add(self, llm):
+        slot = LlamaSlot(llm)
+        self.slots.append(slot)
+        self.idle.put(slot)
+
+    @contextmanager
+    def acquire(self):
+        slot = self.idle.get()
+        try:
+            yield slot
+        finally:
+            self.idle.put(slot)
+
+    def record(self, tokens: int, elapsed: float):
+        with self.lock:
+            self.generations += 1
+            self.generated_tokens += tokens
+            self.busy_sec += elapsed
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "contexts": len(self.slots),
+                "threads_per_context": LLAMA_THREADS,
+                "cpu_limit": CPU_LIMIT,
+                "idle": self.idle.qsize(),
+                "generations": self.generations,
+                "generated_tokens": self.generated_tokens,
+                # context 하나 기준 생성 속도 (전체 처리량은 동시에 돌아가는 context 수만큼 늘어남)
+                "tokens_per_sec": self.generated_tokens / self.busy_sec if self.busy_sec else 0.0,
+            }
+
+
+llama_pool = LlamaPool()
+
+
+# --- 3-2. 단어 벡터 최근접 이웃 인덱스 (연관 검색어 fast path) ---
+# VectorIndex 구현은 vector_index.py (scripts/predictor.py와 공유)
+vector_index = None
+vector_hits = 0
+vector_misses = 0
+
+
+def load_vector_index():
+    global vector_index
+
+    if not VECTOR_INDEX_DIR:
+        return
+    try:
+        vector_index = VectorIndex(VECTOR_INDEX_DIR, VECTOR_NPROBE)
+        logger.info(f"--- 단어 벡터 인덱스 로드 완료: {len(vector_index)}개 단어 ---")
+    except (OSError, ValueError) as e:
+        logger.warning(f"⚠️ 단어 벡터 인덱스 로드 실패, LLM 생성만 사용합니다: {e}")
+
+
+def similar_keywords(query: str, num_results: int):
+    """
+    단어 벡터 인덱스로 찾은 연관 키워드 (생성 결과와 같은 정규화 기준으로 중복 제거)
+    유사도 VECTOR_MIN_SCORE 이상인 키워드가 num_results개 미만이면 None (LLM 생성으로 fallback)
+    """
+    global vector_hits, vector_misses
+
+    if vector_index is None:
+        return None
+    with metrics.stage("vector"):
+        vector, exclude = vector_index.query_vector(query.strip())
+        if vector is None:
+            vector_misses += 1
+            return None
+        neighbours = vector_index.search(vector, num_results * 2, exclude)
+
+    parser = KeywordParser(query, num_results)
+    for word, score in neighbours:
+        if score < VECTOR_MIN_SCORE:
+            break
+        parser.feed(word + ",")
+        if parser.done:
+            vector_hits += 1
+            return parser.keywords[:num_results]
+
+    vector_misses += 1
+    return None
+
+
+# --- 3-3. Prometheus 지표 ---
+STAGE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+NO_TIMER = nullcontext()
+
+
+class Metrics:
+    """
+    /metrics로 노출하는 Prometheus 지표
+    - 요청 경로의 구간별 소요 시간: Histogram에 직접 기록
+      (prefill: 생성 호출 ~ 첫 토큰, decode: 첫 토큰 ~ 생성 종료)
+    - 대기열 길이, 캐시 hit, 모델 로드 시간 등: scrape 시점에 기존 stats()에서 읽음 (요청 경로 비용 없음)
+    비활성화 상태(METRICS_ENABLED=0 또는 prometheus_client 미설치)에서는 stage()가 빈 context manager를 반환
+    """
+
+    STAGES = ("vector", "restore_header", "tokenize", "prefill", "decode")
+
+    def __init__(self, enabled: bool):
+        self.enabled = enabled and Histogram is not None
+        if not self.enabled:
+            return
+        self.registry = CollectorRegistry()
+        stage_seconds = Histogram(
+            "relkey_stage_seconds", "연관 검색어 구간별 소요 시간", ["stage"],
+            buckets=STAGE_BUCKETS, registry=self.registry
+        )
+        # 요청마다 label을 조회하지 않도록 stage별 child를 미리 만들어 둠
+        self.stage_timers = {stage: stage_seconds.labels(stage) for stage in self.STAGES}
+        self.registry.register(self)
+
+    def stage(self, name: str):
+        if not self.enabled:
+            return NO_TIMER
+        return self.stage_timers[name].time()
+
+    def observe(self, name: str, seconds: float):
+        if self.enabled:
+            self.stage_timers[name].observe(seconds)
+
+    def collect(self):
+        pool = inference_pool.stats()
+        yield GaugeMetricFamily("relkey_inference_pending", "실행 중 + 대기 중인 추론 요청 수", value=pool["pending"])
+        yield CounterMetricFamily("relkey_inference_rejected", "대기열이 가득 차 503으로 거절한 요청 수", value=pool["rejected"])
+        yield CounterMetricFamily("relkey_cancelled_requests", "클라이언트 연결이 끊겨 취소한 요청 수", value=cancelled_requests)
+
+        llama = llama_pool.stats()
+        yield GaugeMetricFamily("relkey_llama_idle_contexts", "사용 가능한 llama.cpp context 수", value=llama["idle"])
+        yield CounterMetricFamily("relkey_generated_tokens", "생성한 토큰 수", value=llama["generated_tokens"])
+
+        cache = result_cache.stats()
+        lookups = CounterMetricFamily("relkey_result_cache_lookups", "결과 캐시 조회 결과", labels=["result"])
+        lookups.add_metric(["hit"], cache["hits"])
+        lookups.add_metric(["miss"], cache["misses"])
+        yield lookups
+        yield CounterMetricFamily("relkey_result_cache_evictions", "결과 캐시 eviction 수", value=cache["evictions"])
+        yield GaugeMetricFamily("relkey_result_cache_entries", "결과 캐시 항목 수", value=cache["entries"])
+
+        vector = CounterMetricFamily("relkey_vector_lookups", "단어 벡터 fast path 조회 결과", labels=["result"])
+        vector.add_metric(["hit"], vector_hits)
+        vector.add_metric(["miss"], vector_misses)
+        yield vector
+        yield CounterMetricFamily("relkey_coalesced_requests", "진행 중인 생성 결과를 공유한 요청 수", value=coalesced_requests)
+        yield GaugeMetricFamily("relkey_inflight_generations", "진행 중인 생성 수", value=len(inflight))
+
+        state = model_state.stats()
+        yield GaugeMetricFamily("relkey_model_ready", "모델 준비 완료 여부", value=1 if model_state.ready else 0)
+        if state["load_s"] is not None:
+            yield GaugeMetricFamily("relkey_model_load_seconds", "모델 로드 / warm-up 소요 시간", value=state["load_s"])
+
+    def render(self) -> bytes:
+        return generate_latest(self.registry)
+
+
+metrics = Metrics(METRICS_ENABLED)
 
 
 # --- 4. 연관 검색어 생성 로직 ---
@@ -124,60 +455,449 @@ def normalize_text(text: str) -> str:
 
 
 # --- 4. 연관 검색어 생성 로직 ---
+def build_prompt_tokens(query: str) -> List[int]:
+    """
+    header 토큰 + 검색어/응답 부분 토큰
+    (전체 문자열을 한 번에 tokenize 하면 경계에서 토큰이 달라져 header KV를 재사용하지 못할 수 있음)
+    """
+    body = f"{query}\n\n### Response:\n"
+    return header_tokens + model.tokenize(body.encode("utf-8"), add_bos=False)
+
+
+class KeywordParser:
+    """
+    생성되는 텍스트를 받아 쉼표가 나올 때마다 키워드를 확정 (정규화 기준 중복 / 검색어 자신 / 한 글자 제외)
+    """
+
+    def __init__(self, query: str, num_results: int):
+        self.num_results = num_results
+        self.keywords = []
+        self.seen = {normalize_text(query)}  # 자기 자신 제외
+        self.buffer = ""
+
+    @property
+    def done(self) -> bool:
+        return len(self.keywords) >= self.num_results
+
+    def feed(self, text: str) -> List[str]:
+        """새로 확정된 키워드 목록 반환"""
+        self.buffer += text
+        added = []
+        while "," in self.buffer:
+            part, self.buffer = self.buffer.split(",", 1)
+            added += self._add(part)
+        return added
+
+    def close(self) -> List[str]:
+        """생성이 끝났을 때 마지막 쉼표 뒤에 남은 키워드 확정"""
+        part, self.buffer = self.buffer, ""
+        return self._add(part)
+
+    def _add(self, part: str) -> List[str]:
+        k = part.strip()
+        if len(k) < 2:
+            return []
+        norm = normalize_text(k)
+        if not norm or norm in self.seen:
+            return []
+        self.seen.add(norm)
+        self.keywords.append(k)
+        return [k]
+
+
 def generate_keywords(query: str, num_results: int = 10) -> List[str]:
-    global model
+    keywords, _ = generate_keyword_list(query, num_results)
+    return keywords[:num_results]
+
+
+def generate_keyword_list(query: str, num_results: int, on_keyword=None) -> Tuple[List[str], bool]:
+    with llama_pool.acquire() as slot:
+        return generate_with(slot, query, num_results, on_keyword)
 
-    prompt = (
-        f"### Instruction:\n{INSTRUCTION_TEXT}\n\n"
-        f"### Input:\n{query}\n\n"
-        f"### Response:\n"
-    )
+
+def generate_with(slot: LlamaSlot, query: str, num_results: int, on_keyword=None) -> Tuple[List[str], bool]:
+    """
+    토큰을 stream으로 받으면서 키워드를 파싱하고, 서로 다른 키워드가 num_results개 모이면 바로 생성 중단
+    반환: (키워드 목록, 생성이 끝까지 진행되었는지 여부)
+    - 끝까지 생성한 결과는 n과 무관하게 재사용할 수 있지만, 중간에 멈춘 결과는 더 큰 n에 사용할 수 없음
+    on_keyword: 키워드가 확정될 때마다 호출 (SSE 스트리밍용)
+    """
+    with metrics.stage("restore_header"):
+        slot.restore_header()
+    with metrics.stage("tokenize"):
+        prompt = build_prompt_tokens(query)
+    parser = KeywordParser(query, num_results)
+    complete = True
+    tokens = 0
 
     try:
+        start = time.perf_counter()
         # 🌟 Llama-cpp 추론 실행
-        output = model(
+        stream = slot.llm(
             prompt,
             max_tokens=64,       # 생성 길이 제한 (짧게)
             stop=["<|endoftext|>", "###", "\n"], # 멈춤 조건 (필수!)
             echo=False,          # 프롬프트 제외하고 결과만 받음
             temperature=0.1,     # 낮은 온도로 고정된 결과 유도 (Deterministic)
             top_p=0.9,
-            repeat_penalty=1.2   # 반복 방지
+            repeat_penalty=1.2,  # 반복 방지
+            stream=True
         )
 
-        # 결과 텍스트 추출
-        generated_text = output['choices'][0]['text'].strip()
+        added = []
+        first_token_at = None
+        for chunk in stream:
+            if first_token_at is None:
+                first_token_at = time.perf_counter()
+                metrics.observe("prefill", first_token_at - start)
+            tokens += 1
+            added = parser.feed(chunk['choices'][0]['text'])
+            for keyword in added:
+                if on_keyword is not None:
+                    on_keyword(keyword)
+            if parser.done:
+                complete = False
+                break
+        else:
+            for keyword in parser.close():
+                if on_keyword is not None:
+                    on_keyword(keyword)
+        # generator를 닫으면 남은 토큰을 생성하지 않음
+        stream.close()
+
+        end = time.perf_counter()
+        if first_token_at is not None:
+            metrics.observe("decode", end - first_token_at)
+        llama_pool.record(tokens, end - start)
+        return parser.keywords, complete
 
-        raw_keywords = [k.strip() for k in generated_text.split(',') if k.strip()]
+    except Exception as e:
+        logger.error(f"Inference Error: {e}")
+        return [], False
 
-        final_keywords = []
-        seen = set()
-        seen.add(normalize_text(query))  # 자기 자신 제외
 
-        for k in raw_keywords:
-            if len(k) < 2: continue
-            norm = normalize_text(k)
-            if not norm or norm in seen: continue
-            seen.add(norm)
-            final_keywords.append(k)
+# --- 4-1. 연관 검색어 결과 캐시 / 요청 병합 ---
+class ResultCache:
+    """
+    normalize_text(검색어) -> (키워드 목록, 끝까지 생성했는지 여부, 만료 시각) LRU 캐시
+    - temperature가 낮아 같은 검색어의 결과가 거의 고정이므로 TTL 동안 재사용
+    - n개에서 생성을 멈춘 결과는 n개 이하 요청에만 사용하고, 더 많이 요청하면 다시 생성
+    - 항목 수가 max_entries를 넘으면 오래 사용하지 않은 항목부터 제거
+    """
+
+    def __init__(self, max_entries: int, ttl_sec: float):
+        self.max_entries = max_entries
+        self.ttl_sec = ttl_sec
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+
+    def get(self, key: str, num_results: int):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            keywords, complete, expires_at = entry
+            if expires_at < time.monotonic():
+                del self.entries[key]
+                self.expired += 1
+                self.misses += 1
+                return None
+            if not complete and len(keywords) < num_results:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return keywords[:num_results]
+
+    def put(self, key: str, keywords: List[str], complete: bool):
+        if self.max_entries <= 0:
+            return
+        with self.lock:
+            entry = self.entries.get(key)
+            # 이미 더 많은 결과가 있으면 유지
+            if entry is not None and not complete and (entry[1] or len(entry[0]) > len(keywords)):
+                return
+            self.entries[key] = (keywords, complete, time.monotonic() + self.ttl_sec)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "entries": len(self.entries),
+                "max_entries": self.max_entries,
+                "ttl_sec": self.ttl_sec,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+            }
+
+
+class Generation:
+    """
+    진행 중인 생성 하나 (같은 검색어의 동시 요청은 하나의 생성 결과를 공유)
+    기다리던 요청이 모두 취소되었는데(클라이언트 연결 끊김) 생성이 아직 inference pool 대기열에 있으면 생성도 취소
+    이미 시작한 생성은 캐시에 사용하기 위해 끝까지 진행
+    """
+    __slots__ = ("future", "task", "waiters")
+
+    def __init__(self, future: Future):
+        self.future = future
+        self.task = asyncio.wrap_future(future)
+        self.waiters = 0
+
+    @property
+    def cancelled(self) -> bool:
+        return self.future.cancelled()
+
+    async def wait(self) -> Tuple[List[str], bool]:
+        self.waiters += 1
+        try:
+            return await asyncio.shield(self.task)
+        finally:
+            self.waiters -= 1
+            if self.waiters == 0 and not self.task.done():
+                # 이미 실행 중이면 cancel()은 아무것도 하지 않음
+                self.future.cancel()
+
+
+result_cache = ResultCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SEC)
+# 생성 중인 검색어 -> Generation
+inflight = {}
+coalesced_requests = 0
+
+
+def _on_generation_done(key: str, generation: Generation):
+    if inflight.get(key) is generation:
+        del inflight[key]
+    # 취소된 생성 / 빈 결과(추론 오류 포함)는 캐시하지 않음
+    task = generation.task
+    if not task.cancelled() and task.exception() is None and task.result()[0]:
+        result_cache.put(key, *task.result())
+
+
+async def get_keywords(query: str, num_results: int) -> List[str]:
+    """
+    단어 벡터 인덱스 -> 캐시 -> 진행 중인 같은 검색어의 생성 -> 새 생성 순으로 키워드 조회
+    """
+    global coalesced_requests
+
+    keywords = similar_keywords(query, num_results)
+    if keywords is not None:
+        return keywords
+
+    key = normalize_text(query)
+    if not key:
+        with inference_pool.admit():
+            return await inference_pool.run(generate_keywords, query, num_results)
+
+    keywords = result_cache.get(key, num_results)
+    if keywords is not None:
+        return keywords
+
+    generation = inflight.get(key)
+    if generation is not None and not generation.cancelled:
+        keywords, complete = await generation.wait()
+        # 진행 중이던 생성이 더 적은 n에서 멈췄으면 직접 다시 생성
+        if complete or len(keywords) >= num_results:
+            coalesced_requests += 1
+            return keywords[:num_results]
+
+    # blocking 추론은 inference pool에서 실행 (대기열이 가득 차면 503)
+    with inference_pool.admit():
+        generation = Generation(inference_pool.submit(generate_keyword_list, query, num_results))
+        inflight[key] = generation
+        generation.task.add_done_callback(lambda t: _on_generation_done(key, generation))
+        keywords, _ = await generation.wait()
+        return keywords[:num_results]
 
-        return final_keywords[:num_results]
 
+def format_sse(q: str, keywords: List[str], done: bool) -> str:
+    payload = {"q": q, "p": 0.0, "subkeys": keywords, "done": done}
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+def stream_keywords(query: str, num_results: int) -> StreamingResponse:
+    """
+    키워드가 확정될 때마다 지금까지의 목록을 Server-Sent Events로 전송 (마지막 이벤트는 done=true)
+    """
+    # 대기열이 가득 차면 스트림을 열기 전에 503 반환
+    # 자리는 generator 안에서 잡고 스트림이 끝날 때 반납 (응답이 시작되지 않으면 자리를 잡지 않음)
+    inference_pool.check()
+
+    async def events():
+        with inference_pool.admit():
+            key = normalize_text(query)
+            cached = similar_keywords(query, num_results)
+            if cached is None and key:
+                cached = result_cache.get(key, num_results)
+            if cached is not None:
+                yield format_sse(query, cached, True)
+                return
+
+            # 생성은 inference pool 스레드에서 진행되므로 확정된 키워드를 event loop의 queue로 전달
+            loop = asyncio.get_running_loop()
+            keyword_queue = asyncio.Queue()
+
+            def on_keyword(keyword: str):
+                loop.call_soon_threadsafe(keyword_queue.put_nowait, keyword)
+
+            task = asyncio.ensure_future(
+                inference_pool.run(generate_keyword_list, query, num_results, on_keyword)
+            )
+            task.add_done_callback(lambda t: keyword_queue.put_nowait(None))
+
+            keywords = []
+            while True:
+                keyword = await keyword_queue.get()
+                if keyword is None:
+                    break
+                if len(keywords) < num_results:
+                    keywords.append(keyword)
+                    yield format_sse(query, keywords, False)
+
+            keywords, complete = await task
+            if key and keywords:
+                result_cache.put(key, keywords, complete)
+            yield format_sse(query, keywords[:num_results], True)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+# --- 4-2. 백그라운드 모델 로딩 / Warm-up ---
+class ModelState:
+    """
+    백그라운드 모델 로딩 상태 (starting -> loading -> warming -> ready, 실패 시 failed)
+    - 서버는 바로 뜨고 /healthz(liveness)는 로딩 중에도 200
+    - /readyz(readiness)는 warm-up 쿼리까지 끝난 뒤에만 200이라, 준비된 Pod로만 트래픽이 들어옴
+    """
+
+    def __init__(self):
+        self.status = "starting"
+        self.error = None
+        self.started_at = time.time()
+        self.ready_at = None
+        self.warmup_ms = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == "ready"
+
+    def require_ready(self):
+        if not self.ready:
+            raise HTTPException(
+                status_code=503,
+                detail=f"모델을 준비 중입니다 ({self.status}). 잠시 후 다시 시도하세요.",
+                headers={"Retry-After": "5"}
+            )
+
+    def stats(self) -> dict:
+        return {
+            "status": self.status,
+            "error": self.error,
+            "load_s": self.ready_at - self.started_at if self.ready_at else None,
+            "warmup_ms": self.warmup_ms,
+        }
+
+
+model_state = ModelState()
+model_loader = None
+
+
+def warm_up():
+    """
+    대표 쿼리를 미리 생성해서 첫 요청이 llama.cpp 버퍼 할당 / 연산 초기화 비용을 내지 않도록 함
+    """
+    if not WARMUP_QUERIES:
+        return
+    start = time.perf_counter()
+    # 모든 context를 warm-up
+    for slot in llama_pool.slots:
+        for query in WARMUP_QUERIES:
+            generate_with(slot, query, 5)
+    model_state.warmup_ms = (time.perf_counter() - start) * 1000
+    logger.info(f"--- Warm-up 완료: {len(WARMUP_QUERIES)}개 쿼리 ({model_state.warmup_ms:.0f}ms) ---")
+
+
+async def load_in_background():
+    """모델 로드 / warm-up을 event loop 밖에서 실행"""
+    try:
+        model_state.status = "loading"
+        await asyncio.to_thread(load_model)
+        model_state.status = "warming"
+        # Llama 인스턴스는 inference pool 스레드에서만 사용
+        await inference_pool.run(warm_up)
+        model_state.status = "ready"
+        model_state.ready_at = time.time()
     except Exception as e:
-        logger.error(f"Inference Error: {e}")
-        return []
+        model_state.status = "failed"
+        model_state.error = str(e)
+        logger.error(f"❌ 모델 준비 실패: {e}")
+
+
+@app.on_event("startup")
+async def start_background_loading():
+    global model_loader
+
+    model_loader = asyncio.create_task(load_in_background())
 
 
 # --- 5. API 엔드포인트 ---
+cancelled_requests = 0
+
+
+async def cancel_on_disconnect(request: Request, awaitable):
+    """
+    awaitable을 실행하면서 클라이언트 연결이 끊겼는지 주기적으로 확인하고, 끊기면 취소
+    (e.g. 사용자가 검색어를 바꿔 이전 요청을 버린 경우)
+    아직 inference pool 대기열에 있는 생성은 같은 검색어를 기다리는 다른 요청이 없으면 실행하지 않음
+    """
+    global cancelled_requests
+
+    task = asyncio.ensure_future(awaitable)
+    try:
+        while True:
+            done, _ = await asyncio.wait({task}, timeout=DISCONNECT_POLL_SEC)
+            if done:
+                return task.result()
+            if await request.is_disconnected():
+                task.cancel()
+                cancelled_requests += 1
+                raise HTTPException(status_code=499, detail="클라이언트 연결이 끊겨 요청을 취소했습니다.")
+    except asyncio.CancelledError:
+        task.cancel()
+        raise
+
+
 @app.get("/api/v1/related/search", response_model=RelkeyResponse)
 async def get_related(
+        request: Request,
         q: str = Query(..., title="Query", min_length=1),
-        n: int = Query(5, title="Number of keywords")
+        n: int = Query(5, title="Number of keywords"),
+        stream: bool = Query(
+            False,
+            title="Stream",
+            description="키워드가 생성될 때마다 Server-Sent Events로 전송"
+        )
 ):
     """
     Qwen 모델을 사용하여 연관 검색어를 생성합니다.
     """
-    keywords = generate_keywords(q, num_results=n)
+    model_state.require_ready()
+
+    if stream:
+        return stream_keywords(q, n)
+
+    keywords = await cancel_on_disconnect(request, get_keywords(q, n))
 
     return {
         "q": q,
@@ -186,6 +906,56 @@ async def get_related(
     }
 
 
+@app.get("/api/v1/related/stats")
+def read_stats():
+    """
+    결과 캐시 / 요청 병합 / 추론 pool 지표
+    """
+    return {
+        "model_state": model_state.stats(),
+        "result_cache": result_cache.stats(),
+        "vector_index": {
+            "words": len(vector_index) if vector_index is not None else 0,
+            "hits": vector_hits,
+            "misses": vector_misses,
+        },
+        "coalesced_requests": coalesced_requests,
+        "inflight": len(inflight),
+        "inference_pool": inference_pool.stats(),
+        "cancelled_requests": cancelled_requests,
+        "llama_pool": llama_pool.stats(),
+    }
+
+
+@app.get("/metrics")
+def read_metrics():
+    """
+    Prometheus scrape endpoint (구간별 지연시간, 대기열 길이, 캐시 hit, 모델 로드 시간)
+    """
+    if not metrics.enabled:
+        raise HTTPException(status_code=404, detail="metrics가 비활성화되어 있습니다 (METRICS_ENABLED=0 또는 prometheus_client 미설치).")
+    return Response(content=metrics.render(), media_type=CONTENT_TYPE_LATEST)
+
+
 @app.get("/api/v1/related")
 def read_root():
     return {"message": "Qwen Related Query API is Ready"}
+
+
+@app.get("/healthz")
+def healthz():
+    """
+    Liveness: 프로세스가 살아 있으면 200 (모델 로딩 실패 시에만 500으로 재시작 유도)
+    """
+    if model_state.status == "failed":
+        raise HTTPException(status_code=500, detail=model_state.error)
+    return {"status": model_state.status}
+
+
+@app.get("/readyz")
+def readyz():
+    """
+    Readiness: 모델 로드 + warm-up이 끝나야 200
+    """
+    model_state.require_ready()
+    return {"status": model_state.status}
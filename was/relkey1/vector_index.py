@@ -0,0 +1,114 @@
+import os
+from typing import List, Tuple
+
+import numpy as np
+
+
+# relkey 서비스(main.py)와 w2v predictor(scripts/predictor.py)가 함께 사용하는 단어 벡터 인덱스
+# (relkey 이미지에는 이 파일을 main.py와 함께 복사하고, predictor는 repo 경로로 import)
+class VectorIndex:
+    """
+    word2vec 단어 벡터 최근접 이웃 인덱스 (scripts/build_vector_index.py로 생성)
+    - vectors.npy: L2 정규화된 float32 [단어 수, 차원] (mmap으로 로드, 내적 = cosine 유사도)
+    - words.txt: 행 번호 순 단어 목록
+    - ivf_*.npy (선택): k-means 중심 + 중심별로 모아 정렬한 단어 ID
+      nprobe개 리스트의 단어만 비교하는 근사 검색 (nprobe가 클수록 정확하고 느림, 0이면 전체 비교)
+    - batch_rows: 여러 단어를 전체 비교할 때 한 번에 행렬곱할 단어 수
+      (유사도 행렬 크기 = 단어 수 x vocab x 4 bytes, 1000개를 한 번에 곱하면 vocab 100만 기준 4GB)
+    """
+
+    def __init__(self, index_dir: str, nprobe: int = 8, batch_rows: int = 64):
+        self.vectors = np.load(os.path.join(index_dir, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(index_dir, "words.txt"), "r", encoding="utf-8") as f:
+            self.words = f.read().split("\n")[:len(self.vectors)]
+        self.word_ids = {word: i for i, word in enumerate(self.words)}
+        self.nprobe = nprobe
+        self.batch_rows = batch_rows
+
+        self.centroids = None
+        if os.path.exists(os.path.join(index_dir, "ivf_centroids.npy")):
+            self.centroids = np.load(os.path.join(index_dir, "ivf_centroids.npy"))
+            self.list_offsets = np.load(os.path.join(index_dir, "ivf_list_offsets.npy"))
+            self.list_ids = np.load(os.path.join(index_dir, "ivf_list_ids.npy"), mmap_mode="r")
+
+    def __len__(self):
+        return len(self.words)
+
+    def __contains__(self, word):
+        return word in self.word_ids
+
+    def query_vector(self, text: str):
+        """
+        검색어 벡터와 검색어에 포함된 단어 ID (결과에서 제외)
+        검색어 자체가 단어로 없으면 공백으로 나눈 단어 벡터의 평균, 모르는 단어가 있으면 (None, [])
+        """
+        if text in self.word_ids:
+            word_id = self.word_ids[text]
+            return np.asarray(self.vectors[word_id]), [word_id]
+
+        tokens = text.split()
+        if not tokens or any(token not in self.word_ids for token in tokens):
+            return None, []
+        ids = [self.word_ids[token] for token in tokens]
+        vector = np.asarray(self.vectors[ids]).mean(axis=0)
+        norm = np.linalg.norm(vector)
+        if norm == 0:
+            return None, []
+        return vector / norm, ids
+
+    def candidate_ids(self, vector: np.ndarray, nprobe: int = None):
+        """IVF로 비교할 단어 ID (None이면 전체)"""
+        nprobe = self.nprobe if nprobe is None else nprobe
+        if self.centroids is None or nprobe <= 0 or nprobe >= len(self.centroids):
+            return None
+        lists = np.argpartition(-(self.centroids @ vector), nprobe - 1)[:nprobe]
+        return np.concatenate([self.list_ids[self.list_offsets[c]:self.list_offsets[c + 1]] for c in lists])
+
+    @staticmethod
+    def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+        """마지막 축 기준 점수가 높은 순으로 k개의 위치 (비어 있는 IVF 리스트만 probe한 경우 등 후보가 없으면 빈 결과)"""
+        k = min(k, scores.shape[-1])
+        if k <= 0:
+            return np.zeros(scores.shape[:-1] + (0,), dtype=np.int64)
+        top = np.argpartition(-scores, k - 1, axis=-1)[..., :k]
+        order = np.argsort(-np.take_along_axis(scores, top, axis=-1), axis=-1)
+        return np.take_along_axis(top, order, axis=-1)
+
+    def _results(self, word_ids, scores, exclude, k: int) -> List[Tuple[str, float]]:
+        results = []
+        for word_id, score in zip(word_ids, scores):
+            word_id = int(word_id)
+            if word_id in exclude:
+                continue
+            results.append((self.words[word_id], float(score)))
+            if len(results) == k:
+                break
+        return results
+
+    def search(self, vector: np.ndarray, k: int, exclude=(), nprobe: int = None) -> List[Tuple[str, float]]:
+        """vector와 cosine 유사도가 높은 순으로 (단어, 유사도) k개"""
+        candidates = self.candidate_ids(vector, nprobe)
+        scores = (self.vectors if candidates is None else self.vectors[candidates]) @ vector
+
+        top = self.top_k(scores, k + len(exclude))
+        return self._results(top if candidates is None else candidates[top], scores[top], exclude, k)
+
+    def most_similar_batch(self, words: List[str], topn: int, nprobe: int = None) -> List[List[Tuple[str, float]]]:
+        """
+        단어별 (단어, 유사도) topn개 (자기 자신 제외)
+        IVF 검색은 단어마다 search, 전체 비교는 batch_rows개 단어씩 [단어 수, 차원] x [차원, vocab] 행렬곱으로 계산
+        """
+        ids = [self.word_ids[word] for word in words]
+        queries = np.asarray(self.vectors[ids])
+
+        nprobe = self.nprobe if nprobe is None else nprobe
+        if self.centroids is not None and 0 < nprobe < len(self.centroids):
+            return [self.search(query, topn, {word_id}, nprobe) for word_id, query in zip(ids, queries)]
+
+        results = []
+        for start in range(0, len(queries), self.batch_rows):
+            scores = queries[start:start + self.batch_rows] @ self.vectors.T
+            tops = self.top_k(scores, topn + 1)
+            for word_id, row, top in zip(ids[start:start + self.batch_rows], scores, tops):
+                results.append(self._results(top, row[top], {word_id}, topn))
+        return results